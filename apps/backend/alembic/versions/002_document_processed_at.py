@@ -0,0 +1,24 @@
+"""Track eager document preprocessing
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "002"
+down_revision: str | None = "001"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("documents", sa.Column("processed_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("documents", "processed_at")
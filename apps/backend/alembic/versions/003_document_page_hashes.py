@@ -0,0 +1,28 @@
+"""Per-page content hashes and revision diffs for documents
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "003"
+down_revision: str | None = "002"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("documents", sa.Column("page_hashes", sa.JSON(), nullable=True))
+    op.add_column("documents", sa.Column("revision_of", sa.String(36), nullable=True))
+    op.add_column("documents", sa.Column("changed_pages", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("documents", "changed_pages")
+    op.drop_column("documents", "revision_of")
+    op.drop_column("documents", "page_hashes")
@@ -0,0 +1,41 @@
+"""Job table for analyses run by leased workers
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "004"
+down_revision: str | None = "003"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "analysis_jobs",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("analysis_id", sa.String(36), nullable=False, index=True),
+        sa.Column("session_id", sa.String(36), nullable=False),
+        sa.Column("status", sa.String(20), server_default="queued", index=True),
+        sa.Column("payload", sa.JSON(), nullable=True),
+        sa.Column("attempts", sa.Integer(), server_default="0"),
+        sa.Column("max_attempts", sa.Integer(), server_default="3"),
+        sa.Column("lease_owner", sa.String(100), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("available_at", sa.DateTime()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("analysis_jobs")
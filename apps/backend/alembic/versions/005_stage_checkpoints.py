@@ -0,0 +1,32 @@
+"""Checkpointed outputs of analysis pipeline stages
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "005"
+down_revision: str | None = "004"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stage_checkpoints",
+        sa.Column("id", sa.String(36), primary_key=True),
+        sa.Column("session_id", sa.String(36), nullable=False, index=True),
+        sa.Column("stage", sa.String(50), nullable=False),
+        sa.Column("fingerprint", sa.String(64), nullable=False),
+        sa.Column("output", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("stage_checkpoints")
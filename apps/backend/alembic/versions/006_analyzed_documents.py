@@ -0,0 +1,24 @@
+"""Documents covered by each analysis result, for incremental re-analysis
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "006"
+down_revision: str | None = "005"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("analysis_results", sa.Column("analyzed_documents", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("analysis_results", "analyzed_documents")
@@ -0,0 +1,32 @@
+"""Analysis progress events, fanned out to SSE streams in every process
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "007"
+down_revision: str | None = "006"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "analysis_events",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("session_id", sa.String(36), nullable=False, index=True),
+        sa.Column("origin", sa.String(100), nullable=False),
+        sa.Column("type", sa.String(20), nullable=False),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), index=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("analysis_events")
@@ -0,0 +1,40 @@
+"""One active analysis job per session, enforced by a unique index
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "008"
+down_revision: str | None = "007"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("analysis_jobs", sa.Column("active_session_id", sa.String(36), nullable=True))
+    # Claim the key for the newest active job of each session
+    op.execute(
+        """
+        UPDATE analysis_jobs SET active_session_id = session_id
+        WHERE status IN ('queued', 'running')
+          AND created_at = (
+            SELECT MAX(j.created_at) FROM analysis_jobs j
+            WHERE j.session_id = analysis_jobs.session_id
+              AND j.status IN ('queued', 'running')
+          )
+        """
+    )
+    op.create_index(
+        "ix_analysis_jobs_active_session_id", "analysis_jobs", ["active_session_id"], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_analysis_jobs_active_session_id", table_name="analysis_jobs")
+    op.drop_column("analysis_jobs", "active_session_id")
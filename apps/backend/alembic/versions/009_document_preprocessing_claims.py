@@ -0,0 +1,24 @@
+"""Claim documents for preprocessing so it runs once per document
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18
+
+"""
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "009"
+down_revision: str | None = "008"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column("documents", sa.Column("preprocessing_until", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("documents", "preprocessing_until")
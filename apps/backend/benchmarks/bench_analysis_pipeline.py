@@ -0,0 +1,203 @@
+"""Run the full analysis task offline against replayed AI responses.
+
+Run from apps/backend:
+
+    python -m benchmarks.bench_analysis_pipeline --sessions 20 --documents 3
+    python -m benchmarks.bench_analysis_pipeline --latency fixed:0 --profile
+
+Every session gets its own synthetic PDFs, stored and analyzed through
+``run_analysis_task`` exactly as a worker does. Gemini is replaced by
+``ReplayAIGateway`` (cassette, latency distribution, error rate) and the
+external market APIs by fixed-latency fakes, so nothing leaves the machine.
+With ``--latency fixed:0`` the wall time is everything around the model.
+Time to the first streamed finding shows how soon users see partial results.
+
+To replay real responses, record a cassette first by running the API with
+AI_RECORD_CASSETTE=path and analyzing a few sessions.
+"""
+import argparse
+import asyncio
+import cProfile
+import os
+import pstats
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import fitz
+
+CASSETTE = Path(__file__).parent / "cassettes" / "sample.jsonl"
+
+PAGE_TEXT = [
+    "Vraagprijs € 450.000 k.k. Woonoppervlakte 96 m², bouwjaar 1932.",
+    "Het dak is in 2015 vernieuwd; de fundering bestaat uit houten palen.",
+    "De VvE beschikt over een MJOP en een reservefonds van € 84.300.",
+    "Bouwkundig rapport: achterstallig onderhoud aan de kozijnen.",
+]
+
+
+def make_pdf(seed: int, pages: int) -> bytes:
+    doc = fitz.open()
+    for number in range(pages):
+        page = doc.new_page()
+        y = 60
+        page.insert_text((50, y), f"Document {seed}, pagina {number + 1}", fontsize=10)
+        for line in range(30):
+            y += 14
+            page.insert_text((50, y), PAGE_TEXT[(seed + number + line) % len(PAGE_TEXT)], fontsize=8)
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+class OfflineClient:
+    """Stands in for the BAG, EP-Online and CBS clients."""
+
+    def __init__(self, latency: float):
+        self._latency = latency
+
+    async def lookup_building(self, address: str, postal_code: str) -> dict | None:
+        await asyncio.sleep(self._latency)
+        return {"municipality": "Amsterdam", "building_year": 1932}
+
+    async def lookup_label(self, postal_code: str, house_number: str) -> dict | None:
+        await asyncio.sleep(self._latency)
+        return {"energy_label": "C"}
+
+    async def get_area_statistics(self, municipality: str) -> dict | None:
+        await asyncio.sleep(self._latency)
+        return {"average_woz": 520000}
+
+
+async def seed_sessions(sessions: int, documents: int, pages: int) -> list[tuple[str, str]]:
+    from src.domain.enums import AnalysisStatus
+    from src.domain.models.document import Document
+    from src.infrastructure.database.engine import async_session_factory, init_db
+    from src.infrastructure.database.models import AnalysisResultModel, SessionModel
+    from src.infrastructure.database.repositories.document_repo import SQLDocumentRepository
+    from src.infrastructure.storage.local_storage import LocalDocumentStorage
+
+    await init_db()
+    storage = LocalDocumentStorage()
+    jobs = []
+    async with async_session_factory() as db:
+        repo = SQLDocumentRepository(db)
+        for s in range(sessions):
+            session_id, analysis_id = str(uuid.uuid4()), str(uuid.uuid4())
+            db.add(SessionModel(id=session_id))
+            db.add(AnalysisResultModel(id=analysis_id, session_id=session_id, status=AnalysisStatus.PENDING))
+            await db.commit()
+            for d in range(documents):
+                content = make_pdf(s * documents + d, pages)
+                path = await storage.store(uuid.UUID(session_id), f"document_{d}.pdf", content)
+                await repo.save(
+                    Document(
+                        session_id=uuid.UUID(session_id),
+                        filename=f"document_{d}.pdf",
+                        file_path=path,
+                        file_size_bytes=len(content),
+                    )
+                )
+            jobs.append((session_id, analysis_id))
+    return jobs
+
+
+async def run(args) -> None:
+    from sqlalchemy import select
+
+    from src.api.v1 import analysis
+    from src.infrastructure.ai.replay_gateway import get_replay_gateway
+    from src.infrastructure.database.engine import async_session_factory
+    from src.infrastructure.database.models import AnalysisResultModel
+    from src.infrastructure.external import bag_client, cbs_client, ep_online_client
+    from src.infrastructure.pdf.extractor import shutdown_process_pool
+    from src.infrastructure.pdf.sandbox import shutdown_sandbox_pool
+
+    offline = lambda: OfflineClient(args.external_latency_ms / 1000)  # noqa: E731
+    bag_client.PDOKBAGClient = offline
+    ep_online_client.EPOnlineClient = offline
+    cbs_client.CBSStatLineClient = offline
+
+    partials = []
+
+    class RecordedPartialResults(analysis.PartialResults):
+        def __init__(self, publish):
+            super().__init__(publish)
+            partials.append(self)
+
+    analysis.PartialResults = RecordedPartialResults
+
+    jobs = await seed_sessions(args.sessions, args.documents, args.pages)
+    durations = []
+
+    async def timed(session_id: str, analysis_id: str) -> None:
+        started = time.perf_counter()
+        await analysis.run_analysis_task(session_id, analysis_id)
+        durations.append(time.perf_counter() - started)
+
+    profiler = cProfile.Profile() if args.profile else None
+    started = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    await asyncio.gather(*(timed(*job) for job in jobs))
+    if profiler:
+        profiler.disable()
+    wall = time.perf_counter() - started
+
+    async with async_session_factory() as db:
+        rows = (await db.execute(select(AnalysisResultModel.status))).scalars().all()
+    statuses = {status: rows.count(status) for status in set(rows)}
+    durations.sort()
+    print(f"analyses: {len(jobs)} x {args.documents} documents x {args.pages} pages")
+    print(f"wall time: {wall:.2f}s ({len(jobs) / wall:.2f} analyses/s)")
+    print(
+        f"per analysis: p50 {statistics.median(durations):.2f}s, "
+        f"p95 {durations[int(len(durations) * 0.95) - 1]:.2f}s, max {durations[-1]:.2f}s"
+    )
+    first = sorted(p.time_to_first_item for p in partials if p.time_to_first_item is not None)
+    if first:
+        print(
+            f"first streamed finding: p50 {statistics.median(first):.2f}s, "
+            f"max {first[-1]:.2f}s ({sum(p.published for p in partials)} partial writes)"
+        )
+    print(f"AI calls replayed: {get_replay_gateway().calls}")
+    print(f"statuses: {statuses}")
+    if profiler:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(args.profile_top)
+    shutdown_process_pool()
+    shutdown_sandbox_pool()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--documents", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--cassette", default=str(CASSETTE))
+    parser.add_argument("--latency", default="lognormal:1500,0.5", help="e.g. fixed:0, uniform:500,2000")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--external-latency-ms", type=float, default=100)
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--profile-top", type=int, default=30)
+    args = parser.parse_args()
+
+    # Settings are read at import time, so configure before importing src
+    workdir = Path(tempfile.mkdtemp(prefix="bench-pipeline-"))
+    os.environ.update(
+        DATABASE_URL=f"sqlite+aiosqlite:///{workdir / 'app.db'}",
+        UPLOAD_DIR=str(workdir / "uploads"),
+        CACHE_DIR=str(workdir / "cache"),
+        ENVIRONMENT="benchmark",
+        AI_CACHE_MAX_MB="0",
+        AI_REPLAY_CASSETTE=args.cassette,
+        AI_REPLAY_LATENCY=args.latency,
+        AI_REPLAY_ERROR_RATE=str(args.error_rate),
+    )
+    print(f"working directory: {workdir}")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
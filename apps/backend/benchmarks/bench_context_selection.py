@@ -0,0 +1,161 @@
+"""Relevance-ranked context against plain truncation: evidence recall and size.
+
+Run from apps/backend:
+
+    python -m benchmarks.bench_context_selection
+    python -m benchmarks.bench_context_selection --samples labelled.jsonl
+
+For every AI task the harness builds the context the model would read, once
+with RelevanceRanker and once as the first N characters (what the gateway
+sent before), and reports which share of the known findings made it in.
+Recall of the evidence is an upper bound on the findings recall of the
+model: it cannot report a defect it never read.
+
+Without --samples, sessions are generated from a cover page, a table of
+contents and party details, filler pages, and evidence sentences planted on
+random later pages. A JSONL file with {"documents": [{"label": ..., "text":
+...}], "expected": {"risks": ["phrase", ...], ...}} per line evaluates real
+sessions; an expected phrase counts as found if it occurs in the context.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from src.config import settings
+from src.infrastructure.pdf.corpus import RedactedCorpus, RedactedDocument
+from src.infrastructure.pdf.relevance import RelevanceRanker
+
+BOILERPLATE_PAGES = [
+    "Bouwkundig rapport\nWoonhuis te Utrecht\nOpdrachtnummer 2024-0412\nDatum opname: 4 april",
+    "Inhoudsopgave\n1. Inleiding .......... 3\n2. Algemene gegevens .......... 4\n"
+    "3. Bevindingen .......... 6\n4. Kostenoverzicht .......... 14\n5. Bijlagen .......... 18",
+    "De ondergetekenden:\n1. de heer [NAAM], hierna te noemen: verkoper;\n"
+    "2. mevrouw [NAAM], hierna te noemen: koper;\nverklaren als volgt te zijn overeengekomen.",
+    "Dit rapport is uitsluitend bestemd voor de opdrachtgever. Disclaimer: de inspecteur "
+    "aanvaardt geen aansprakelijkheid voor verborgen zaken. Paraaf opdrachtgever: ____",
+]
+
+FILLER = [
+    "De woning is gelegen in een woonwijk uit de jaren dertig.",
+    "De entree geeft toegang tot de hal met trapopgang naar de eerste verdieping.",
+    "De woonkamer heeft een eikenhouten vloer en een open haard.",
+    "De keuken is voorzien van inbouwapparatuur en een vaatwasser.",
+    "Op de eerste verdieping bevinden zich drie kamers en de badkamer.",
+    "De opname is visueel uitgevoerd; verborgen delen zijn niet geopend.",
+    "De cv-installatie bevindt zich op zolder.",
+    "Het hang- en sluitwerk functioneert naar behoren.",
+    "De meterkast is voorzien van zes groepen en een aardlekschakelaar.",
+    "De gevels zijn opgetrokken in metselwerk met spouw.",
+]
+
+EVIDENCE = {
+    "risks": [
+        "Bij het funderingsonderzoek is paalrot vastgesteld; herstelkosten circa € 60.000.",
+        "In de kruipruimte is asbesthoudend materiaal aangetroffen rond de leidingen.",
+        "Het perceel is uitgegeven in erfpacht; de canon wordt in 2027 herzien.",
+        "Het reservefonds van de VvE dekt het MJOP niet; een bijzondere bijdrage wordt verwacht.",
+        "Er zijn scheuren in het metselwerk die wijzen op verzakking van de achtergevel.",
+        "Aan de kozijnen is achterstallig onderhoud; lekkage bij de dakgoot.",
+    ],
+    "property": [
+        "Vraagprijs € 450.000 kosten koper.",
+        "Woonoppervlakte 96 m², perceel 140 m².",
+        "Bouwjaar 1932; energielabel C.",
+        "Servicekosten / bijdrage VvE € 185 per maand.",
+    ],
+    "strengths": [
+        "De ligging aan een rustige straat vlak bij het centrum is uitstekend.",
+        "Het dak is in 2019 vernieuwd en voorzien van zonnepanelen.",
+        "De zonnige tuin op het zuiden en het dakterras zijn een pluspunt.",
+        "Er is achterstallig onderhoud aan het schilderwerk.",
+    ],
+}
+
+
+def make_session(rng: random.Random, pages: int) -> tuple[list[tuple[str, list[str]]], dict]:
+    """One report of ``pages`` pages with every task's evidence on later pages."""
+    body = [
+        "\n".join(rng.sample(FILLER, k=rng.randint(4, 8)) * 3)
+        for _ in range(max(pages - len(BOILERPLATE_PAGES), 1))
+    ]
+    expected = {}
+    for task, sentences in EVIDENCE.items():
+        planted = rng.sample(sentences, k=rng.randint(2, len(sentences)))
+        for sentence in planted:
+            # Past the first few pages, which is where truncation stops
+            page = rng.randrange(min(3, len(body) - 1), len(body))
+            lines = body[page].split("\n")
+            lines.insert(rng.randrange(len(lines) + 1), sentence)
+            body[page] = "\n".join(lines)
+        expected[task] = planted
+    return [("rapport.pdf (inspection_report)", BOILERPLATE_PAGES + body)], expected
+
+
+def load_sessions(path: str) -> list[tuple[list[tuple[str, list[str]]], dict]]:
+    sessions = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                documents = [(d["label"], d["text"].split("\n\n")) for d in row["documents"]]
+                sessions.append((documents, row["expected"]))
+    return sessions
+
+
+def build_corpus(documents: list[tuple[str, list[str]]]) -> RedactedCorpus:
+    corpus = RedactedCorpus()
+    for label, pages in documents:
+        corpus.add(label, RedactedDocument.from_pages(pages))
+    return corpus
+
+
+def main(sessions, budgets: dict[str, int]) -> None:
+    ranker = RelevanceRanker()
+    print(f"sessions: {len(sessions)}")
+    print(
+        f"{'task':>10} {'budget':>7} {'truncated recall':>17} {'ranked recall':>14} "
+        f"{'ranked chars':>13} {'rank time':>10}"
+    )
+    for task, budget in budgets.items():
+        truncated, ranked, sizes, times = [], [], [], []
+        for documents, expected in sessions:
+            phrases = expected.get(task) or []
+            if not phrases:
+                continue
+            corpus = build_corpus(documents)
+            started = time.perf_counter()
+            selected = ranker.select(corpus, task, budget)
+            times.append(time.perf_counter() - started)
+            head = corpus.text[:budget]
+            truncated.append(sum(p in head for p in phrases) / len(phrases))
+            ranked.append(sum(p in selected for p in phrases) / len(phrases))
+            sizes.append(len(selected))
+        if not ranked:
+            continue
+        print(
+            f"{task:>10} {budget:>7} {statistics.mean(truncated):>17.1%} "
+            f"{statistics.mean(ranked):>14.1%} {statistics.mean(sizes):>13.0f} "
+            f"{statistics.mean(times) * 1000:>8.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", help="JSONL file of sessions with expected findings")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    main(
+        load_sessions(args.samples)
+        if args.samples
+        else [make_session(rng, args.pages) for _ in range(args.count)],
+        {
+            "property": settings.analysis_property_context_chars,
+            "risks": settings.analysis_risks_context_chars,
+            "strengths": settings.analysis_strengths_context_chars,
+        },
+    )
@@ -0,0 +1,131 @@
+"""Local keyword classifier: accuracy, latency and AI calls avoided.
+
+Run from apps/backend:
+
+    python -m benchmarks.bench_document_classifier
+    python -m benchmarks.bench_document_classifier --samples labelled.jsonl
+
+Without --samples a synthetic set is generated from typical sentences of each
+document type, mixed with sentences borrowed from other types. A JSONL file
+with {"label": "<document_type>", "text": "..."} per line benchmarks real
+documents instead.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from src.domain.enums import DocumentType
+from src.infrastructure.pdf.document_classifier import KeywordDocumentClassifier
+
+SENTENCES = {
+    DocumentType.PURCHASE_AGREEMENT: [
+        "Koopovereenkomst woonhuis, model opgesteld door NVM, VEH en Vastgoedpro.",
+        "De koopsom bedraagt € 475.000, zegge vierhonderdvijfenzeventigduizend euro.",
+        "De koper zal uiterlijk op 1 maart een waarborgsom of bankgarantie stellen.",
+        "Deze koop is aangegaan onder de ontbindende voorwaarde van financiering.",
+        "De koper heeft het recht gedurende de bedenktijd van drie dagen te ontbinden.",
+        "De levering geschiedt ten overstaan van notaris mr. J. de Vries te Utrecht.",
+        "De verkoper verklaart dat hem geen aanschrijvingen bekend zijn.",
+    ],
+    DocumentType.ENERGY_LABEL: [
+        "Energielabel woning, geregistreerd in EP-Online.",
+        "Energieprestatie volgens NTA 8800: labelklasse C.",
+        "Primair fossiel energiegebruik: 221,34 kWh/m² per jaar.",
+        "Energiebehoefte: 112 kWh/m² per jaar; aandeel hernieuwbare energie 12%.",
+        "Registratienummer 1234567, opnamedatum 12-03-2021, geldig tot 12-03-2031.",
+    ],
+    DocumentType.INSPECTION_REPORT: [
+        "Bouwkundig rapport, opgesteld na een bouwkundige keuring op 4 april.",
+        "De inspecteur heeft de woning visueel en niet-destructief onderzocht.",
+        "Conditiescore volgens NEN 2767: 4 (matig) voor het dakbeschot.",
+        "Geschatte herstelkosten binnen vijf jaar: € 12.500 inclusief btw.",
+        "Er is sprake van achterstallig onderhoud aan de kozijnen aan de achterzijde.",
+        "Een vochtmeting in de kruipruimte toonde verhoogde waarden.",
+        "De gebreken zijn weergegeven in de fotobijlage.",
+    ],
+    DocumentType.HOA_DOCUMENTS: [
+        "Notulen van de algemene ledenvergadering van de Vereniging van Eigenaren.",
+        "Het meerjarenonderhoudsplan (MJOP) is in 2022 geactualiseerd.",
+        "Het reservefonds bedroeg per 31 december € 84.300.",
+        "De splitsingsakte en het splitsingsreglement zijn ingeschreven in 1998.",
+        "Het appartementsrecht heeft een breukdeel van 12/180.",
+        "De jaarrekening van de VvE is door de kascommissie gecontroleerd.",
+        "Het huishoudelijk reglement verbiedt het plaatsen van schotelantennes.",
+    ],
+    DocumentType.PROPERTY_LISTING: [
+        "Vraagprijs € 450.000 k.k.",
+        "Woonoppervlakte 96 m², perceel 140 m², inhoud 330 m³.",
+        "Deze sfeervolle woning beschikt over drie slaapkamers en een zonnige tuin.",
+        "Aanvaarding in overleg; bezichtiging uitsluitend op afspraak via de makelaar.",
+        "Kenmerken: bouwjaar 1932, cv-ketel 2019, dubbel glas.",
+        "Download de brochure voor de plattegronden.",
+    ],
+    DocumentType.OTHER: [
+        "Hypotheekofferte: rente 3,8% vast voor twintig jaar.",
+        "Taxatierapport ten behoeve van de financiering, marktwaarde vrij van huur.",
+        "Rekeningoverzicht januari, saldo per einde periode.",
+        "Offerte voor het vervangen van de keuken inclusief montage.",
+    ],
+}
+
+
+def make_samples(count: int, seed: int = 7) -> list[tuple[DocumentType, str]]:
+    rng = random.Random(seed)
+    types = list(SENTENCES)
+    samples = []
+    for _ in range(count):
+        label = rng.choice(types)
+        own = rng.sample(SENTENCES[label], k=rng.randint(2, len(SENTENCES[label])))
+        borrowed = [
+            rng.choice(SENTENCES[rng.choice([t for t in types if t != label])])
+            for _ in range(rng.randint(0, 2))
+        ]
+        sentences = own + borrowed
+        rng.shuffle(sentences)
+        samples.append((label, " ".join(sentences)))
+    return samples
+
+
+def load_samples(path: str) -> list[tuple[DocumentType, str]]:
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [(DocumentType(row["label"]), row["text"]) for row in rows]
+
+
+def main(samples: list[tuple[DocumentType, str]], thresholds: list[float]) -> None:
+    classifier = KeywordDocumentClassifier()
+    results, latencies = [], []
+    for label, text in samples:
+        started = time.perf_counter()
+        result = classifier.classify(text)
+        latencies.append(time.perf_counter() - started)
+        results.append((label, result))
+
+    correct = sum(label == r.document_type for label, r in results)
+    latencies_us = sorted(t * 1e6 for t in latencies)
+    print(f"samples: {len(samples)}")
+    print(f"accuracy (every document decided locally): {correct / len(samples):.1%}")
+    print(
+        f"latency: mean {statistics.mean(latencies_us):.0f} us, "
+        f"p99 {latencies_us[int(len(latencies_us) * 0.99) - 1]:.0f} us"
+    )
+    print(f"{'threshold':>10} {'AI avoided':>11} {'local accuracy':>15}")
+    for threshold in thresholds:
+        local = [(label, r) for label, r in results if r.confidence >= threshold]
+        accuracy = (
+            sum(label == r.document_type for label, r in local) / len(local) if local else 0.0
+        )
+        print(f"{threshold:>10.2f} {len(local) / len(results):>11.1%} {accuracy:>15.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", help="JSONL file of labelled documents")
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument(
+        "--thresholds", type=float, nargs="+", default=[0.5, 0.6, 0.7, 0.75, 0.8, 0.9]
+    )
+    args = parser.parse_args()
+    main(load_samples(args.samples) if args.samples else make_samples(args.count), args.thresholds)
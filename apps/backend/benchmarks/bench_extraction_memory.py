@@ -0,0 +1,74 @@
+"""Peak RSS of buffered versus streaming PDF extraction as documents grow.
+
+Each measurement runs in a fresh process so peaks do not carry over. Run
+from apps/backend:
+
+    python -m benchmarks.bench_extraction_memory --pages 50 200 800
+
+"buffer" is the previous behaviour: the whole file is read into memory and
+every page record is kept. "stream" hands the extractor a path and consumes
+``iter_pages`` one page at a time.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import resource
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.bench_pdf_extraction import make_document
+from src.infrastructure.pdf.extractor import PDFExtractor
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def _run(mode: str, path: Path) -> int:
+    extractor = PDFExtractor()
+    if mode == "buffer":
+        pages = await extractor.extract_pages(path.read_bytes())
+        return sum(len(p.text) for p in pages)
+    chars = 0
+    async for page in extractor.iter_pages(path):
+        chars += len(page.text)
+    return chars
+
+
+def _measure(mode: str, path: Path, results) -> None:
+    baseline = _peak_rss_mb()
+    chars = asyncio.run(_run(mode, path))
+    results.put((_peak_rss_mb() - baseline, _peak_rss_mb(), chars))
+
+
+def measure(mode: str, path: Path) -> tuple[float, float, int]:
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    proc = ctx.Process(target=_measure, args=(mode, path, results))
+    proc.start()
+    outcome = results.get()
+    proc.join()
+    return outcome
+
+
+def main(page_counts: list[int], table_every: int) -> None:
+    print(f"{'pages':>6} {'file MB':>8} {'mode':>7} {'growth MB':>10} {'peak MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_pages in page_counts:
+            path = Path(tmp) / f"doc_{num_pages}.pdf"
+            path.write_bytes(make_document(num_pages, table_every))
+            size_mb = path.stat().st_size / (1024 * 1024)
+            for mode in ("buffer", "stream"):
+                growth, peak, _ = measure(mode, path)
+                print(f"{num_pages:>6} {size_mb:>8.1f} {mode:>7} {growth:>10.1f} {peak:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 200, 800])
+    parser.add_argument("--table-every", type=int, default=5)
+    args = parser.parse_args()
+    main(args.pages, args.table_every)
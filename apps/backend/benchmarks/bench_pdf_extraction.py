@@ -0,0 +1,82 @@
+"""Compare serial and page-parallel PDF extraction on large synthetic PDFs.
+
+Run from apps/backend:
+
+    python -m benchmarks.bench_pdf_extraction --pages 60 120 240 --table-every 5
+
+Only pages carrying a ruled table are routed to pdfplumber, so
+``--table-every`` controls how much layout-aware work each document needs.
+"""
+import argparse
+import asyncio
+import time
+
+import fitz
+
+from src.config import settings
+from src.infrastructure.pdf.extractor import (
+    PDFExtractor,
+    engine_stats,
+    shutdown_process_pool,
+)
+
+LINE = (
+    "De woning is gebouwd in 1932 en heeft een woonoppervlakte van 112 m2. "
+    "Het dak is in 2015 vernieuwd; de fundering bestaat uit houten palen."
+)
+
+
+def make_document(num_pages: int, table_every: int = 1) -> bytes:
+    doc = fitz.open()
+    for number in range(num_pages):
+        page = doc.new_page()
+        y = 60
+        for line in range(40):
+            page.insert_text((50, y), f"{number + 1}.{line + 1} {LINE[:90]}", fontsize=8)
+            y += 12
+        if number % table_every:
+            continue
+        # A ruled table so pdfplumber's table finder has real work to do
+        for row in range(6):
+            page.draw_line((50, 560 + row * 20), (550, 560 + row * 20))
+        for col in range(5):
+            page.draw_line((50 + col * 125, 560), (50 + col * 125, 660))
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+async def timed(extractor: PDFExtractor, content: bytes) -> float:
+    start = time.perf_counter()
+    await extractor.extract_pages(content)
+    return time.perf_counter() - start
+
+
+async def main(page_counts: list[int], table_every: int) -> None:
+    serial = PDFExtractor()
+    parallel = PDFExtractor(parallel=True, parallel_threshold=1)
+
+    # Warm the pool so worker start-up is not charged to the first document
+    await parallel.extract_pages(make_document(settings.pdf_process_pool_size))
+
+    print(f"pool size: {settings.pdf_process_pool_size}")
+    print(f"{'pages':>6} {'serial s':>10} {'parallel s':>11} {'speedup':>8}")
+    for num_pages in page_counts:
+        content = make_document(num_pages, table_every)
+        t_serial = await timed(serial, content)
+        t_parallel = await timed(parallel, content)
+        print(
+            f"{num_pages:>6} {t_serial:>10.2f} {t_parallel:>11.2f} "
+            f"{t_serial / t_parallel:>7.2f}x"
+        )
+    shutdown_process_pool()
+    # Parallel runs record their stats in the parent too, so these cover both modes
+    print(f"engine stats (this process): {engine_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[60, 120, 240])
+    parser.add_argument("--table-every", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(main(args.pages, args.table_every))
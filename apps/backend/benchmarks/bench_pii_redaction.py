@@ -0,0 +1,71 @@
+"""Single-pass PII redaction versus the previous four sequential passes.
+
+Run from apps/backend:
+
+    python -m benchmarks.bench_pii_redaction --size-kb 100 1000 5000
+"""
+import argparse
+import random
+import timeit
+
+from src.infrastructure.pdf.preprocessor import PIIPreprocessor
+
+PARAGRAPHS = [
+    "De woning is gelegen aan de Keizersgracht en beschikt over een ruime "
+    "woonkamer met openslaande deuren naar de tuin op het zuiden.",
+    "Het dak is in 2015 vernieuwd. De fundering bestaat uit houten palen; "
+    "een funderingsonderzoek uit 2019 adviseert herstel binnen tien jaar.",
+    "De Vereniging van Eigenaren is actief en beschikt over een MJOP. De "
+    "maandelijkse bijdrage bedraagt € 185,50 en de reserve is € 48.000.",
+    "Koper verklaart bekend te zijn met de erfpachtvoorwaarden van de "
+    "gemeente Amsterdam, tijdvak eindigend op 15 april 2042.",
+]
+PII = [
+    "BSN 123.456.789",
+    "tel. 020-1234567",
+    "+31 6 12345678",
+    "mail: j.devries@example.nl",
+    "IBAN NL91 ABNA 0417 1643 00",
+]
+
+
+def legacy_redact(p: PIIPreprocessor, text: str) -> str:
+    text = p.BSN_PATTERN.sub("[BSN_REDACTED]", text)
+    text = p.PHONE_PATTERN.sub("[PHONE_REDACTED]", text)
+    text = p.EMAIL_PATTERN.sub("[EMAIL_REDACTED]", text)
+    text = p.IBAN_PATTERN.sub("[IBAN_REDACTED]", text)
+    return text
+
+
+def make_document(size_kb: int, seed: int = 42) -> str:
+    rng = random.Random(seed)
+    parts, size = [], 0
+    while size < size_kb * 1024:
+        paragraph = rng.choice(PARAGRAPHS)
+        if rng.random() < 0.2:
+            paragraph += f" Contact: {rng.choice(PII)}."
+        parts.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(parts)
+
+
+def main(sizes: list[int], repeat: int) -> None:
+    p = PIIPreprocessor()
+    print(f"{'size KB':>8} {'legacy ms':>10} {'single ms':>10} {'speedup':>8} {'identical':>10}")
+    for size_kb in sizes:
+        text = make_document(size_kb)
+        legacy = min(timeit.repeat(lambda text=text: legacy_redact(p, text), number=1, repeat=repeat))
+        single = min(timeit.repeat(lambda text=text: p.redact(text), number=1, repeat=repeat))
+        same = legacy_redact(p, text) == p.redact(text)
+        print(
+            f"{size_kb:>8} {legacy * 1000:>10.1f} {single * 1000:>10.1f} "
+            f"{legacy / single:>7.2f}x {same!s:>10}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-kb", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.size_kb, args.repeat)
@@ -0,0 +1,203 @@
+"""Load test for analysis progress streams: thousands of open streams at once.
+
+Run from apps/backend:
+
+    python -m benchmarks.bench_progress_stream --streams 5000 --sessions 1000
+    python -m benchmarks.bench_progress_stream --url http://localhost:8000 --streams 2000
+
+In-process (the default), an API-side ``ProgressHub`` holds the streams and a
+second hub with its own origin plays the worker processes, publishing status
+and partial events through the same SQLite database. The report shows
+delivery latency, database queries while streams idle, while events flow and
+after the streams close (which should be none), and memory per stream.
+
+With --url, that many real SSE connections are opened against a running API,
+spread over the given session ids (or fresh sessions with an analysis
+queued), and the harness reports connect time and heartbeats received.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+
+async def count_queries(engine) -> list[int]:
+    from sqlalchemy import event
+
+    queries = [0]
+
+    def count(*args) -> None:
+        queries[0] += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    return queries
+
+
+async def run_in_process(args) -> None:
+    from src.infrastructure.database.engine import async_session_factory, engine, init_db
+    from src.infrastructure.events.progress import ProgressHub, ProgressPublisher
+
+    await init_db()
+    queries = await count_queries(engine)
+    api = ProgressHub(async_session_factory, poll_seconds=args.poll, origin="api")
+    worker = ProgressHub(async_session_factory, poll_seconds=args.poll, origin="worker")
+    sessions = [str(uuid.uuid4()) for _ in range(args.sessions)]
+    latencies: list[float] = []
+    received = [0]
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    subscriptions = [api.subscribe(sessions[i % len(sessions)]) for i in range(args.streams)]
+    per_stream = (tracemalloc.get_traced_memory()[0] - before) / args.streams
+
+    async def consume(subscription) -> None:
+        while True:
+            event = await subscription.get(args.poll * 10)
+            if event is None:
+                continue
+            received[0] += 1
+            latencies.append(time.time() - event.data["sent"])
+
+    consumers = [asyncio.create_task(consume(s)) for s in subscriptions]
+
+    # Idle: open streams cost one query per poll, whatever their number
+    queries[0] = 0
+    await asyncio.sleep(args.idle_seconds)
+    idle_rate = queries[0] / args.idle_seconds
+
+    # Busy: every session gets a run of status and partial events
+    queries[0] = 0
+    started = time.perf_counter()
+    publishers = [ProgressPublisher(worker, s, str(uuid.uuid4())) for s in sessions]
+    for round in range(args.events):
+        for publisher in publishers:
+            publisher.emit(
+                "partial" if round % 2 else "status",
+                {"status": "analyzing", "sent": time.time(), "strengths": ["Centrale ligging"] * 5},
+            )
+        await asyncio.sleep(args.interval)
+    await asyncio.gather(*(p.aclose() for p in publishers))
+    expected = args.events * args.streams
+    deadline = time.perf_counter() + args.poll * 20
+    while received[0] < expected and time.perf_counter() < deadline:
+        await asyncio.sleep(args.poll)
+    busy = time.perf_counter() - started
+    busy_queries = queries[0]
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    for consumer in consumers:
+        consumer.cancel()
+    await asyncio.gather(*consumers, return_exceptions=True)
+    for subscription in subscriptions:
+        api.unsubscribe(subscription)
+    await asyncio.sleep(args.poll * 2)
+    queries[0] = 0
+    await asyncio.sleep(args.idle_seconds)
+    closed_queries = queries[0]
+    dropped = sum(s.dropped for s in subscriptions)
+    await api.close()
+    await worker.close()
+
+    latencies.sort()
+    print(f"streams: {args.streams} over {args.sessions} sessions, poll {args.poll}s")
+    print(f"memory: {per_stream / 1024:.1f} KiB per idle stream, peak {peak / 2**20:.1f} MiB")
+    print(f"idle: {idle_rate:.1f} queries/s")
+    print(
+        f"busy: {args.events} events per session in {busy:.2f}s, {busy_queries} queries "
+        f"({api.polls} polls, {worker.published} events stored)"
+    )
+    print(f"delivered: {received[0]} of {expected} ({dropped} dropped by full buffers)")
+    if latencies:
+        print(
+            f"latency: p50 {statistics.median(latencies) * 1000:.0f}ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f}ms, "
+            f"max {latencies[-1] * 1000:.0f}ms"
+        )
+    print(f"after close: {closed_queries} queries in {args.idle_seconds:.1f}s")
+
+
+async def run_http(args) -> None:
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.streams + 10)
+    timeout = httpx.Timeout(10.0, read=None)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=timeout) as client:
+        sessions = args.session_ids or []
+        for _ in range(args.sessions - len(sessions)):
+            session_id = (await client.post("/api/v1/sessions")).json()["session_id"]
+            await client.post(f"/api/v1/sessions/{session_id}/analyze")
+            sessions.append(session_id)
+
+        connect_times: list[float] = []
+        lines = [0]
+        failures = [0]
+        stop = asyncio.Event()
+
+        async def stream(session_id: str) -> None:
+            started = time.perf_counter()
+            try:
+                async with client.stream("GET", f"/api/v1/sessions/{session_id}/analysis/events") as response:
+                    response.raise_for_status()
+                    connect_times.append(time.perf_counter() - started)
+                    async for _ in response.aiter_lines():
+                        lines[0] += 1
+                        if stop.is_set():
+                            return
+            except Exception:
+                failures[0] += 1
+
+        tasks = [asyncio.create_task(stream(sessions[i % len(sessions)])) for i in range(args.streams)]
+        await asyncio.sleep(args.duration)
+        stop.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    connect_times.sort()
+    print(f"streams: {args.streams} over {len(sessions)} sessions for {args.duration:.0f}s")
+    print(f"connected: {len(connect_times)}, failed: {failures[0]}")
+    if connect_times:
+        print(
+            f"connect: p50 {statistics.median(connect_times) * 1000:.0f}ms, "
+            f"max {connect_times[-1] * 1000:.0f}ms"
+        )
+    print(f"lines received: {lines[0]}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--streams", type=int, default=5000)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=10, help="events per session")
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between event rounds")
+    parser.add_argument("--poll", type=float, default=0.5)
+    parser.add_argument("--idle-seconds", type=float, default=2.0)
+    parser.add_argument("--url", help="load a running API instead")
+    parser.add_argument("--session-ids", nargs="*", help="with --url: stream these sessions")
+    parser.add_argument("--duration", type=float, default=30.0, help="with --url: seconds to hold streams")
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(run_http(args))
+        return
+
+    # Settings are read at import time, so configure before importing src
+    workdir = Path(tempfile.mkdtemp(prefix="bench-progress-"))
+    os.environ.update(
+        DATABASE_URL=f"sqlite+aiosqlite:///{workdir / 'app.db'}",
+        UPLOAD_DIR=str(workdir / "uploads"),
+        CACHE_DIR=str(workdir / "cache"),
+        ENVIRONMENT="benchmark",
+    )
+    print(f"working directory: {workdir}")
+    asyncio.run(run_in_process(args))
+
+
+if __name__ == "__main__":
+    main()
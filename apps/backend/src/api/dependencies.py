@@ -6,12 +6,18 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.infrastructure.database.engine import get_session
 from src.infrastructure.database.repositories.document_repo import SQLDocumentRepository
 from src.infrastructure.database.repositories.property_repo import SQLPropertyRepository
+from src.infrastructure.database.repositories.job_repo import SQLJobQueue
 from src.infrastructure.storage.local_storage import LocalDocumentStorage
-from src.infrastructure.ai.gemini_gateway import GeminiGateway
+from src.infrastructure.ai.caching_gateway import CachingAIGateway, get_response_cache
+from src.infrastructure.ai.gemini_gateway import get_gemini_gateway
+from src.infrastructure.ai.replay_gateway import get_replay_gateway
+from src.infrastructure.events.progress import ProgressHub, get_progress_hub
+from src.config import settings
 from src.domain.interfaces.document_repository import DocumentRepository
 from src.domain.interfaces.property_repository import PropertyRepository
 from src.domain.interfaces.document_storage import DocumentStorage
 from src.domain.interfaces.ai_gateway import AIGateway
+from src.domain.interfaces.job_queue import JobQueue
 
 
 async def get_db_session():
@@ -30,15 +36,23 @@ def get_property_repository(session: DbSession) -> PropertyRepository:
     return SQLPropertyRepository(session)
 
 
+def get_job_queue(session: DbSession) -> JobQueue:
+    return SQLJobQueue(session)
+
+
 def get_document_storage() -> DocumentStorage:
     return LocalDocumentStorage()
 
 
 def get_ai_gateway() -> AIGateway:
-    return GeminiGateway()
+    if settings.ai_replay_cassette:
+        return CachingAIGateway(get_replay_gateway(), get_response_cache())
+    return CachingAIGateway(get_gemini_gateway(), get_response_cache())
 
 
 DocRepo = Annotated[DocumentRepository, Depends(get_document_repository)]
 PropRepo = Annotated[PropertyRepository, Depends(get_property_repository)]
 Storage = Annotated[DocumentStorage, Depends(get_document_storage)]
 AI = Annotated[AIGateway, Depends(get_ai_gateway)]
+Jobs = Annotated[JobQueue, Depends(get_job_queue)]
+Progress = Annotated[ProgressHub, Depends(get_progress_hub)]
@@ -1,16 +1,20 @@
+import json
 import uuid
 import logging
 from datetime import datetime
 
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from sqlalchemy import select, update
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.api.dependencies import DbSession, DocRepo, Storage, AI, get_db_session
+from src.api.dependencies import DbSession, DocRepo, Jobs, Progress, get_db_session
+from src.config import settings
 from src.application.services.document_analysis import DocumentAnalysisService
 from src.application.services.market_intelligence import MarketIntelligenceService
 from src.application.services.risk_scoring import RiskScoringService
 from src.application.services.bidding_strategy import BiddingStrategyService
+from src.application.services.partial_results import PartialResults
 from src.application.dto.analysis_dto import (
     AnalysisResponse,
     AnalysisStatusResponse,
@@ -19,24 +23,69 @@ from src.application.dto.analysis_dto import (
     BiddingAdviceDTO,
     PropertyDTO,
 )
-from src.infrastructure.database.models import SessionModel, AnalysisResultModel
-from src.domain.enums import AnalysisStatus
+from src.infrastructure.database.models import AnalysisJobModel, AnalysisResultModel, SessionModel
+from src.infrastructure.events.progress import TERMINAL_STATUSES, ProgressEvent
+from src.domain.enums import AnalysisStatus, JobStatus, RiskCategory, Severity
+from src.domain.models.analysis import AnalysisResult
+from src.domain.interfaces.job_queue import JobQueue
+from src.domain.models.job import AnalysisJob
+from src.domain.models.risk import RiskFinding, RiskScore
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/sessions", tags=["analysis"])
 
+# Suggested wait for clients turned away by a full queue
+QUEUE_FULL_RETRY_AFTER_SECONDS = 30
+
+PROGRESS_MESSAGES = {
+    "pending": "Waiting to start...",
+    "extracting": "Extracting text from documents...",
+    "analyzing": "AI is analyzing your documents...",
+    "enriching": "Enriching with market data...",
+    "scoring": "Computing risk scores...",
+    "complete": "Analysis complete!",
+    "cancelled": "Analysis cancelled.",
+}
+
+
+def _progress_message(status: str, error_message: str | None = None, position: int = 0) -> str:
+    if status == AnalysisStatus.FAILED:
+        return f"Analysis failed: {error_message or 'Unknown error'}"
+    if status == AnalysisStatus.COMPLETE and error_message:
+        return f"Analysis complete; adding the latest documents failed: {error_message}"
+    if status == AnalysisStatus.PENDING and error_message:
+        return f"Retrying after an error: {error_message}"
+    if status == AnalysisStatus.PENDING and position:
+        return f"Waiting to start (number {position} in the queue)..."
+    return PROGRESS_MESSAGES.get(status, "Processing...")
+
+
+def _status_event(status: str, error_message: str | None = None, position: int = 0) -> dict:
+    return {
+        "status": str(status),
+        "progress_message": _progress_message(status, error_message, position),
+    }
+
 
 @router.post("/{session_id}/analyze", status_code=202)
 async def trigger_analysis(
     session_id: str,
-    background_tasks: BackgroundTasks,
     db: DbSession,
     doc_repo: DocRepo,
-    storage: Storage,
-    ai: AI,
+    jobs: Jobs,
+    bypass_cache: bool = False,
 ):
-    """Trigger full analysis pipeline (runs in background)."""
+    """Queue the full analysis pipeline for a worker.
+
+    Once an analysis has completed, documents uploaded later are analyzed
+    incrementally: the AI reads only them and their findings are merged into
+    the stored result. A session has one queued or running analysis at most,
+    also when requests race on different API processes; further requests
+    get that analysis back. When the queue holds ``analysis_queue_max_depth``
+    jobs the request is refused with 503 and Retry-After. ``bypass_cache``
+    sends every AI call to the model, for debugging.
+    """
     # Verify session exists
     result = await db.execute(
         select(SessionModel).where(SessionModel.id == session_id)
@@ -51,88 +100,366 @@ async def trigger_analysis(
         )
     )
     existing = result.scalar_one_or_none()
-    if existing and existing.status == AnalysisStatus.COMPLETE:
+    incremental = bool(existing and existing.analyzed_documents is not None)
+    if incremental and existing.status == AnalysisStatus.COMPLETE:
+        documents = await doc_repo.get_by_session(uuid.UUID(session_id))
+        if all(str(d.id) in existing.analyzed_documents for d in documents):
+            raise HTTPException(
+                status_code=409,
+                detail="Analysis is up to date. Upload documents to extend it.",
+            )
+    elif existing and existing.status == AnalysisStatus.COMPLETE:
         raise HTTPException(
             status_code=409,
             detail="Analysis already complete. Delete session to re-analyze.",
         )
 
-    # Create pending analysis record
+    if existing:
+        active = await jobs.get_active(existing.id)
+        if active:
+            return await _in_flight(session_id, active, existing.status, jobs)
+
+    # Backpressure: refuse new work rather than let the queue grow unbounded
+    queue = await jobs.stats()
+    if queue["queued"] >= settings.analysis_queue_max_depth:
+        logger.warning(f"Analysis queue full ({queue['queued']} queued)")
+        raise HTTPException(
+            status_code=503,
+            detail="Too many analyses are waiting. Please try again shortly.",
+            headers={"Retry-After": str(QUEUE_FULL_RETRY_AFTER_SECONDS)},
+        )
+
+    # The record moves to pending in the same transaction that queues the
+    # job; a concurrent request that got there first makes both roll back
     analysis_id = str(uuid.uuid4())
     if not existing:
-        analysis_model = AnalysisResultModel(
-            id=analysis_id, session_id=session_id, status=AnalysisStatus.PENDING
-        )
-        db.add(analysis_model)
-        await db.commit()
+        db.add(AnalysisResultModel(id=analysis_id, session_id=session_id, status=AnalysisStatus.PENDING))
     else:
         analysis_id = existing.id
-        await db.execute(
+        values = {"status": AnalysisStatus.PENDING, "error_message": None}
+        if not incremental:
+            # Drop partial results of an earlier, interrupted run; an
+            # incremental run keeps the stored result readable until the
+            # merged one replaces it
+            values.update(property_data=None, strengths=None, weaknesses=None, risk_score=None)
+        # Only from the state read above: of two requests, one moves it
+        moved = await db.execute(
             update(AnalysisResultModel)
-            .where(AnalysisResultModel.id == analysis_id)
-            .values(status=AnalysisStatus.PENDING, error_message=None)
+            .where(
+                AnalysisResultModel.id == analysis_id,
+                AnalysisResultModel.status == existing.status,
+            )
+            .values(**values)
         )
-        await db.commit()
-
-    # Run analysis in background
-    background_tasks.add_task(_run_analysis_task, session_id, analysis_id)
+        if moved.rowcount != 1:
+            await db.rollback()
+            return await _current(session_id, analysis_id, db, jobs)
+
+    # Queue for a worker; see src/worker.py
+    job = AnalysisJob(
+        analysis_id=analysis_id,
+        session_id=session_id,
+        bypass_cache=bypass_cache,
+        incremental=incremental,
+        max_attempts=settings.analysis_job_max_attempts,
+    )
+    queued = await jobs.enqueue(job)
+    if queued.id != job.id:
+        logger.info(f"Analysis of session {session_id} already queued; not queueing it twice")
+        return await _current(session_id, queued.analysis_id, db, jobs)
 
     return {
         "session_id": session_id,
         "analysis_id": analysis_id,
         "status": "pending",
+        "mode": "incremental" if incremental else "full",
+        "queue_position": await jobs.position(job),
     }
 
 
-async def _run_analysis_task(session_id: str, analysis_id: str):
-    """Background task to run the full analysis pipeline."""
+async def _in_flight(session_id: str, job: AnalysisJob, status: str, jobs: JobQueue) -> dict:
+    return {
+        "session_id": session_id,
+        "analysis_id": job.analysis_id,
+        "status": status,
+        "mode": "incremental" if job.incremental else "full",
+        "queue_position": await jobs.position(job),
+    }
+
+
+async def _current(session_id: str, analysis_id: str, db: AsyncSession, jobs: JobQueue) -> dict:
+    """Answer for a request that lost the race to start an analysis."""
+    result = await db.execute(
+        select(AnalysisResultModel).where(AnalysisResultModel.id == analysis_id)
+    )
+    analysis = result.scalar_one_or_none()
+    active = await jobs.get_active(analysis_id) if analysis else None
+    if not active:
+        raise HTTPException(
+            status_code=409, detail="The analysis changed state meanwhile; please retry."
+        )
+    return await _in_flight(session_id, active, analysis.status, jobs)
+
+
+@router.post("/{session_id}/analysis/cancel")
+async def cancel_analysis(
+    session_id: str, request: Request, db: DbSession, jobs: Jobs, hub: Progress
+):
+    """Cancel the session's queued or running analysis.
+
+    The run stops within a worker poll interval, aborting its AI and HTTP
+    calls. A cancelled incremental run leaves the previous result in place;
+    any other analysis ends as cancelled and can be started again.
+    """
+    result = await db.execute(
+        select(AnalysisResultModel).where(
+            AnalysisResultModel.session_id == session_id
+        )
+    )
+    analysis = result.scalar_one_or_none()
+    if not analysis:
+        raise HTTPException(
+            status_code=404, detail="No analysis found for this session"
+        )
+
+    job = await jobs.cancel(analysis.id)
+    if not job:
+        raise HTTPException(
+            status_code=409, detail="No analysis is queued or running for this session"
+        )
+    # Without waiting for the next poll when the run is in this process
+    worker = getattr(request.app.state, "analysis_worker", None)
+    if worker is not None:
+        worker.cancel(job.id)
+
+    status = AnalysisStatus.COMPLETE if job.incremental else AnalysisStatus.CANCELLED
+    await db.execute(
+        update(AnalysisResultModel)
+        .where(
+            AnalysisResultModel.id == analysis.id,
+            # A run that finished first keeps its result
+            AnalysisResultModel.status.notin_(TERMINAL_STATUSES),
+        )
+        .values(status=status, error_message=None)
+    )
+    await db.commit()
+    logger.info(f"Analysis of session {session_id} cancelled")
+    hub.publish(ProgressEvent(session_id, "status", _status_event(status)))
+
+    return {"session_id": session_id, "analysis_id": analysis.id, "status": status}
+
+
+def _serialize_risk_score(risk_score: RiskScore | None) -> dict | None:
+    if not risk_score:
+        return None
+    return {
+        "overall_score": risk_score.overall_score,
+        "risk_level": risk_score.risk_level.value,
+        "category_scores": {
+            k.value: v
+            for k, v in risk_score.category_scores.items()
+        },
+        "findings": [
+            {
+                "category": f.category.value,
+                "severity": f.severity.value,
+                "title": f.title,
+                "description": f.description,
+                "source": f.source,
+            }
+            for f in risk_score.findings
+        ],
+    }
+
+
+def _deserialize_risk_score(data: dict | None) -> RiskScore | None:
+    if not data:
+        return None
+    findings = []
+    for f in data.get("findings", []):
+        try:
+            findings.append(
+                RiskFinding(
+                    category=RiskCategory(f["category"]),
+                    severity=Severity(f["severity"]),
+                    title=f.get("title", ""),
+                    description=f.get("description", ""),
+                    source=f.get("source", ""),
+                )
+            )
+        except (ValueError, KeyError):
+            continue
+    return RiskScore.compute(findings)
+
+
+async def _load_previous(db: AsyncSession, analysis_id: str) -> AnalysisResult | None:
+    """The stored result of an analysis, to be extended incrementally."""
+    result = await db.execute(
+        select(AnalysisResultModel).where(AnalysisResultModel.id == analysis_id)
+    )
+    model = result.scalar_one_or_none()
+    if not model or model.analyzed_documents is None:
+        return None
+    return AnalysisResult(
+        session_id=uuid.UUID(model.session_id),
+        property_data=model.property_data,
+        strengths=model.strengths or [],
+        weaknesses=model.weaknesses or [],
+        risk_score=_deserialize_risk_score(model.risk_score),
+        market_position=model.market_position,
+        document_ids=list(model.analyzed_documents),
+    )
+
+
+async def run_analysis_task(
+    session_id: str, analysis_id: str, bypass_cache: bool = False, incremental: bool = False
+):
+    """Run the full analysis pipeline for a leased job.
+
+    ``incremental`` extends the stored result with documents it does not
+    cover yet; the result stays in place until the merged one is saved.
+    An unexpected error is raised again, so the queue retries the job; the
+    analysis waits as pending and only fails once the job is out of attempts.
+    A failed incremental run leaves the analysis complete, with the error.
+    """
     from src.infrastructure.database.engine import async_session_factory
     from src.infrastructure.database.repositories.document_repo import (
         SQLDocumentRepository,
     )
+    from src.infrastructure.database.repositories.checkpoint_repo import SQLCheckpointStore
     from src.infrastructure.storage.local_storage import LocalDocumentStorage
-    from src.infrastructure.ai.gemini_gateway import GeminiGateway
+    from src.api.dependencies import get_ai_gateway
+    from src.infrastructure.ai.caching_gateway import bypass_ai_cache
+    from src.infrastructure.cache.disk_cache import cache_scope
+    from src.infrastructure.events.progress import ProgressPublisher, get_progress_hub
     from src.infrastructure.external.bag_client import PDOKBAGClient
     from src.infrastructure.external.ep_online_client import EPOnlineClient
     from src.infrastructure.external.cbs_client import CBSStatLineClient
     from src.domain.enums import BiddingStrategyType
     from dataclasses import asdict
 
+    hub = get_progress_hub()
+    # Outcomes are not written once the job has ended: a run cancelled just
+    # before it noticed (an incremental one leaves the result COMPLETE) must
+    # not overwrite what the cancellation left in place. Runs without a job,
+    # like the pipeline benchmark's, always write.
+    jobs = select(AnalysisJobModel.id).where(AnalysisJobModel.analysis_id == analysis_id)
+    still_running = (
+        AnalysisResultModel.id == analysis_id,
+        AnalysisResultModel.status != AnalysisStatus.CANCELLED,
+        or_(
+            jobs.where(AnalysisJobModel.status == JobStatus.RUNNING).exists(),
+            ~jobs.exists(),
+        ),
+    )
+    # Streams see progress at once; the status column follows with the events
+    publisher = ProgressPublisher(hub, session_id, analysis_id)
+
+    def on_progress(type: str, data: dict) -> None:
+        if type == "status":
+            data = _status_event(data["status"])
+        publisher.emit(type, data)
+
+    async def save_outcome(db: AsyncSession, **values) -> bool:
+        result = await db.execute(
+            update(AnalysisResultModel).where(*still_running).values(**values)
+        )
+        await db.commit()
+        if result.rowcount != 1:
+            logger.warning(
+                f"Discarded the {values['status']} outcome of analysis {analysis_id}: "
+                "it was cancelled or its job ended"
+            )
+            return False
+        publisher.emit("status", _status_event(values["status"], values.get("error_message")))
+        return True
+
     async with async_session_factory() as db:
         try:
             doc_repo = SQLDocumentRepository(db)
             storage = LocalDocumentStorage()
-            ai = GeminiGateway()
+            ai = get_ai_gateway()
 
-            service = DocumentAnalysisService(ai, doc_repo, storage)
+            market_service = MarketIntelligenceService(
+                PDOKBAGClient(), EPOnlineClient(), CBSStatLineClient()
+            )
+            # Stage outputs are checkpointed, so a rerun after a failure resumes
+            service = DocumentAnalysisService(
+                ai, doc_repo, storage, market_service, SQLCheckpointStore(async_session_factory)
+            )
 
-            # Update status
-            await db.execute(
+            previous = await _load_previous(db, analysis_id) if incremental else None
+
+            # Written directly: a retry starts from the failed status, which
+            # progress events never overwrite. A cancelled analysis stays so.
+            started = await db.execute(
                 update(AnalysisResultModel)
-                .where(AnalysisResultModel.id == analysis_id)
+                .where(
+                    AnalysisResultModel.id == analysis_id,
+                    AnalysisResultModel.status.notin_(
+                        [AnalysisStatus.COMPLETE, AnalysisStatus.CANCELLED]
+                    ),
+                )
                 .values(status=AnalysisStatus.EXTRACTING)
             )
             await db.commit()
-
-            # Run analysis
-            result = await service.run_analysis(uuid.UUID(session_id))
-
-            # Enrich with market data
-            market_data = None
-            if result.property_data and result.status == AnalysisStatus.COMPLETE:
-                await db.execute(
-                    update(AnalysisResultModel)
-                    .where(AnalysisResultModel.id == analysis_id)
-                    .values(status=AnalysisStatus.ENRICHING)
+            if started.rowcount != 1:
+                logger.info(f"Analysis {analysis_id} was cancelled before it started")
+                return
+            on_progress("status", {"status": AnalysisStatus.EXTRACTING})
+
+            async def publish_partial(snapshot: dict) -> None:
+                risk_score = _serialize_risk_score(snapshot["risk_score"])
+                publisher.emit(
+                    "partial",
+                    {
+                        "property_data": snapshot["property_data"],
+                        "strengths": snapshot["strengths"],
+                        "weaknesses": snapshot["weaknesses"],
+                        "risk_score": risk_score,
+                    },
                 )
-                await db.commit()
-
-                bag = PDOKBAGClient()
-                energy = EPOnlineClient()
-                cbs = CBSStatLineClient()
-                market_service = MarketIntelligenceService(bag, energy, cbs)
-                market_data = await market_service.enrich(result.property_data)
+                # Own session: the task's session is busy with the pipeline
+                async with async_session_factory() as partial_db:
+                    await partial_db.execute(
+                        update(AnalysisResultModel)
+                        .where(
+                            AnalysisResultModel.id == analysis_id,
+                            AnalysisResultModel.status.notin_(TERMINAL_STATUSES),
+                        )
+                        .values(
+                            status=AnalysisStatus.ANALYZING,
+                            property_data=snapshot["property_data"],
+                            strengths=snapshot["strengths"],
+                            weaknesses=snapshot["weaknesses"],
+                            risk_score=risk_score,
+                        )
+                    )
+                    await partial_db.commit()
+
+            # Run analysis, storing findings as they stream in; an incremental
+            # run leaves the stored result as it is until the end
+            partial = PartialResults(publish_partial) if previous is None else None
+            try:
+                with bypass_ai_cache(bypass_cache), cache_scope(session_id):
+                    result = await service.run_analysis(
+                        uuid.UUID(session_id), partial, previous, on_progress
+                    )
+            finally:
+                if partial is not None:
+                    await partial.aclose()
+
+            if previous is not None and result.status != AnalysisStatus.COMPLETE:
+                # The stored result still stands and keeps its documents; only
+                # extending it failed
+                await save_outcome(
+                    db, status=AnalysisStatus.COMPLETE, error_message=result.error_message
+                )
+                return
 
+            # Market data was gathered alongside the AI stages
+            market_data = result.market_position
+            if result.property_data and result.status == AnalysisStatus.COMPLETE:
                 # Re-score with market data
                 risk_service = RiskScoringService()
                 result.risk_score = risk_service.compute_score(
@@ -152,27 +479,7 @@ async def _run_analysis_task(session_id: str, analysis_id: str):
                         asking_price, result.risk_score, market_data
                     )
 
-            # Serialize risk score
-            risk_score_dict = None
-            if result.risk_score:
-                risk_score_dict = {
-                    "overall_score": result.risk_score.overall_score,
-                    "risk_level": result.risk_score.risk_level.value,
-                    "category_scores": {
-                        k.value: v
-                        for k, v in result.risk_score.category_scores.items()
-                    },
-                    "findings": [
-                        {
-                            "category": f.category.value,
-                            "severity": f.severity.value,
-                            "title": f.title,
-                            "description": f.description,
-                            "source": f.source,
-                        }
-                        for f in result.risk_score.findings
-                    ],
-                }
+            risk_score_dict = _serialize_risk_score(result.risk_score)
 
             # Serialize bidding advice
             bidding_dict = None
@@ -188,36 +495,58 @@ async def _run_analysis_task(session_id: str, analysis_id: str):
                     for k, v in result.bidding_advice.items()
                 }
 
-            # Save results
-            await db.execute(
-                update(AnalysisResultModel)
-                .where(AnalysisResultModel.id == analysis_id)
-                .values(
-                    status=result.status.value,
-                    property_data=result.property_data,
-                    strengths=result.strengths,
-                    weaknesses=result.weaknesses,
-                    risk_score=risk_score_dict,
-                    market_position=market_data,
-                    bidding_advice=bidding_dict,
-                    completed_at=result.completed_at,
-                    error_message=result.error_message,
-                )
+            # Save results; only then does a stream that ends on the status
+            # event fetch the saved result
+            await save_outcome(
+                db,
+                status=result.status.value,
+                property_data=result.property_data,
+                strengths=result.strengths,
+                weaknesses=result.weaknesses,
+                risk_score=risk_score_dict,
+                market_position=market_data,
+                bidding_advice=bidding_dict,
+                completed_at=result.completed_at,
+                error_message=result.error_message,
+                analyzed_documents=(
+                    result.document_ids
+                    if result.status == AnalysisStatus.COMPLETE
+                    else None
+                ),
             )
-            await db.commit()
 
         except Exception as e:
             logger.error(f"Analysis task failed: {e}")
-            await db.execute(
-                update(AnalysisResultModel)
-                .where(AnalysisResultModel.id == analysis_id)
-                .values(status=AnalysisStatus.FAILED, error_message=str(e))
-            )
-            await db.commit()
+            await db.rollback()
+            # Raising lets the queue retry the job after a backoff; the
+            # analysis only fails once the job is out of attempts
+            job = (
+                await db.execute(
+                    select(AnalysisJobModel.attempts, AnalysisJobModel.max_attempts).where(
+                        AnalysisJobModel.analysis_id == analysis_id,
+                        AnalysisJobModel.status == JobStatus.RUNNING,
+                    )
+                )
+            ).first()
+            if job is not None and job.attempts < job.max_attempts:
+                status = AnalysisStatus.PENDING
+            elif incremental:
+                # An incremental run leaves the stored result in place
+                status = AnalysisStatus.COMPLETE
+            else:
+                status = AnalysisStatus.FAILED
+            await save_outcome(db, status=status, error_message=str(e))
+            raise
+        finally:
+            await publisher.aclose()
+            try:
+                await hub.prune()
+            except Exception as e:
+                logger.warning(f"Pruning progress events failed: {e}")
 
 
 @router.get("/{session_id}/analysis/status", response_model=AnalysisStatusResponse)
-async def get_analysis_status(session_id: str, db: DbSession):
+async def get_analysis_status(session_id: str, db: DbSession, jobs: Jobs):
     """Poll analysis progress."""
     result = await db.execute(
         select(AnalysisResultModel).where(
@@ -230,26 +559,88 @@ async def get_analysis_status(session_id: str, db: DbSession):
             status_code=404, detail="No analysis found for this session"
         )
 
-    progress_messages = {
-        "pending": "Waiting to start...",
-        "extracting": "Extracting text from documents...",
-        "analyzing": "AI is analyzing your documents...",
-        "enriching": "Enriching with market data...",
-        "scoring": "Computing risk scores...",
-        "complete": "Analysis complete!",
-        "failed": f"Analysis failed: {analysis.error_message or 'Unknown error'}",
-    }
+    position = 0
+    if analysis.status == AnalysisStatus.PENDING:
+        job = await jobs.get_active(analysis.id)
+        position = await jobs.position(job) if job else 0
 
     return AnalysisStatusResponse(
         session_id=uuid.UUID(session_id),
         status=analysis.status,
-        progress_message=progress_messages.get(analysis.status, "Processing..."),
+        progress_message=_progress_message(analysis.status, analysis.error_message, position),
+    )
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@router.get("/{session_id}/analysis/events")
+async def stream_analysis_events(
+    session_id: str, request: Request, db: DbSession, jobs: Jobs, hub: Progress
+):
+    """Stream analysis progress as Server-Sent Events.
+
+    The stream opens with a ``status`` event for the current state, then
+    pushes ``status`` transitions, ``document`` progress and ``partial``
+    results as they happen, and ends after the complete or failed status.
+    A comment line every ``progress_heartbeat_seconds`` keeps proxies from
+    closing an idle stream. Reconnecting starts again from the current state.
+    """
+    # Subscribe before reading the state, so no transition falls in between
+    subscription = hub.subscribe(session_id)
+    try:
+        result = await db.execute(
+            select(AnalysisResultModel).where(
+                AnalysisResultModel.session_id == session_id
+            )
+        )
+        analysis = result.scalar_one_or_none()
+        if not analysis:
+            raise HTTPException(
+                status_code=404, detail="No analysis found for this session"
+            )
+        position = 0
+        if analysis.status == AnalysisStatus.PENDING:
+            job = await jobs.get_active(analysis.id)
+            position = await jobs.position(job) if job else 0
+        snapshot = _status_event(analysis.status, analysis.error_message, position)
+    except BaseException:
+        hub.unsubscribe(subscription)
+        raise
+    # Nothing below reads the database; don't hold a connection for the stream
+    await db.close()
+
+    async def stream():
+        try:
+            yield _sse("status", snapshot)
+            if snapshot["status"] in TERMINAL_STATUSES:
+                return
+            while not await request.is_disconnected():
+                event = await subscription.get(settings.progress_heartbeat_seconds)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(event.type, event.data)
+                if event.type == "status" and event.data.get("status") in TERMINAL_STATUSES:
+                    return
+        finally:
+            hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
 @router.get("/{session_id}/analysis", response_model=AnalysisResponse)
 async def get_analysis(session_id: str, db: DbSession):
-    """Get complete analysis results."""
+    """Get analysis results.
+
+    While the analysis runs this returns the findings stored so far, with
+    ``partial`` set; the list grows until the status is complete.
+    """
     result = await db.execute(
         select(AnalysisResultModel).where(
             AnalysisResultModel.session_id == session_id
@@ -294,6 +685,7 @@ async def get_analysis(session_id: str, db: DbSession):
         id=uuid.UUID(analysis.id),
         session_id=uuid.UUID(analysis.session_id),
         status=analysis.status,
+        partial=analysis.status != AnalysisStatus.COMPLETE,
         property_data=property_dto,
         strengths=analysis.strengths or [],
         weaknesses=analysis.weaknesses or [],
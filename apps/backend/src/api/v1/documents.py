@@ -1,16 +1,31 @@
+import asyncio
+import logging
 import uuid
+from functools import lru_cache
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Response
+from fastapi import APIRouter, BackgroundTasks, File, HTTPException, Response, UploadFile
 from sqlalchemy import select
 
 from src.api.dependencies import DbSession, DocRepo, Storage
+from src.application.dto.document_dto import DocumentListResponse, DocumentUploadResponse
+from src.application.services.document_analysis import DocumentAnalysisService
 from src.config import settings
 from src.domain.models.document import Document
-from src.application.dto.document_dto import DocumentUploadResponse, DocumentListResponse
+from src.infrastructure.cache.disk_cache import cache_scope
 from src.infrastructure.database.models import SessionModel
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/sessions", tags=["documents"])
 
+@lru_cache
+def _preprocess_slots() -> asyncio.Semaphore:
+    """Caps eager preprocessing so upload bursts cannot monopolise the worker.
+
+    Created on first use, so it belongs to the event loop that serves requests.
+    """
+    return asyncio.Semaphore(settings.preprocess_concurrency)
+
 
 @router.post("", status_code=201)
 async def create_session(db: DbSession):
@@ -28,6 +43,7 @@ async def create_session(db: DbSession):
 )
 async def upload_document(
     session_id: str,
+    background_tasks: BackgroundTasks,
     db: DbSession,
     doc_repo: DocRepo,
     storage: Storage,
@@ -70,6 +86,9 @@ async def upload_document(
     )
     saved = await doc_repo.save(doc)
 
+    # Extract and classify now so the analysis only has cross-document work left
+    background_tasks.add_task(_preprocess_document_task, saved.id)
+
     return DocumentUploadResponse(
         id=saved.id,
         session_id=saved.session_id,
@@ -80,6 +99,41 @@ async def upload_document(
     )
 
 
+async def _preprocess_document_task(doc_id: uuid.UUID):
+    """Background task to extract and classify a freshly uploaded document."""
+    from src.api.dependencies import get_ai_gateway
+    from src.infrastructure.database.engine import async_session_factory
+    from src.infrastructure.database.repositories.document_repo import (
+        SQLDocumentRepository,
+    )
+    from src.infrastructure.storage.local_storage import LocalDocumentStorage
+
+    async with _preprocess_slots(), async_session_factory() as db:
+        doc_repo = SQLDocumentRepository(db)
+        doc = await doc_repo.get_by_id(doc_id)
+        # An analysis run that got to the document first prepares it itself
+        if not doc or not await doc_repo.claim_preprocessing(
+            doc_id, settings.preprocess_claim_seconds
+        ):
+            return
+        try:
+            service = DocumentAnalysisService(
+                get_ai_gateway(), doc_repo, LocalDocumentStorage()
+            )
+            # Scoped so erasing the session also evicts its cached text
+            with cache_scope(str(doc.session_id)):
+                await service.extract_document(doc)
+                await doc_repo.save(doc)
+                await service.classify_document(doc)
+                await doc_repo.save(doc)
+        except Exception as e:
+            # The analysis run retries whatever did not complete here
+            logger.warning(f"Preprocessing failed for document {doc_id}: {e}")
+            await db.rollback()
+        finally:
+            await doc_repo.release_preprocessing([doc_id])
+
+
 @router.get("/{session_id}/documents", response_model=DocumentListResponse)
 async def list_documents(session_id: str, doc_repo: DocRepo):
     """List all documents in a session."""
@@ -45,6 +45,8 @@ class AnalysisResponse(BaseModel):
     id: UUID
     session_id: UUID
     status: str
+    # True until the analysis completes; findings may still be added
+    partial: bool = False
     property_data: PropertyDTO | None = None
     strengths: list[str] = []
     weaknesses: list[str] = []
@@ -0,0 +1,115 @@
+import asyncio
+import re
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from src.domain.enums import RiskCategory, Severity
+from src.domain.models.risk import RiskFinding, RiskScore
+
+T = TypeVar("T")
+
+SEVERITY_RANK = {s.value: rank for rank, s in enumerate(Severity)}
+NOTE_RANK = {"confirmed": 2, "inferred": 1}
+
+
+async def map_chunks(
+    chunks: list[str], call: Callable[[str], Awaitable[T]], concurrency: int
+) -> list[T]:
+    """Run ``call`` on every chunk, at most ``concurrency`` at once, in order."""
+    slots = asyncio.Semaphore(max(concurrency, 1))
+
+    async def run(chunk: str) -> T:
+        async with slots:
+            return await call(chunk)
+
+    return await asyncio.gather(*(run(chunk) for chunk in chunks))
+
+
+def _risk_key(risk: dict) -> tuple[str, str]:
+    title = re.sub(r"[^a-z0-9]+", " ", str(risk.get("title", "")).lower()).strip()
+    return str(risk.get("category", "")), title
+
+
+def merge_risks(results: list[list[dict]]) -> list[dict]:
+    """Combine per-chunk risks, keeping one finding per category and title.
+
+    Of duplicates the most severe wins, then the most detailed description.
+    """
+    merged: dict[tuple[str, str], dict] = {}
+    for risks in results:
+        for risk in risks:
+            key = _risk_key(risk)
+            current = merged.get(key)
+            rank = (
+                SEVERITY_RANK.get(risk.get("severity"), -1),
+                len(risk.get("description") or ""),
+            )
+            if current is None or rank > (
+                SEVERITY_RANK.get(current.get("severity"), -1),
+                len(current.get("description") or ""),
+            ):
+                merged[key] = risk
+    return list(merged.values())
+
+
+def merge_property_data(results: list[dict]) -> dict:
+    """Combine per-chunk property data field by field.
+
+    A value marked 'confirmed' beats 'inferred', which beats an unmarked one;
+    among equals the earliest chunk wins. List fields are unioned.
+    """
+    merged: dict = {}
+    notes: dict = {}
+    ranks: dict[str, int] = {}
+    for data in results:
+        chunk_notes = data.get("confidence_notes") or {}
+        for name, value in data.items():
+            if name == "confidence_notes" or value is None:
+                continue
+            if isinstance(value, list):
+                existing = merged.setdefault(name, [])
+                existing.extend(v for v in value if v not in existing)
+                notes.setdefault(name, chunk_notes.get(name))
+                continue
+            rank = NOTE_RANK.get(chunk_notes.get(name), 0)
+            if name not in merged or rank > ranks[name]:
+                merged[name] = value
+                ranks[name] = rank
+                notes[name] = chunk_notes.get(name)
+    merged["confidence_notes"] = {k: v for k, v in notes.items() if v is not None}
+    return merged
+
+
+def to_findings(risk_dicts: list[dict]) -> list[RiskFinding]:
+    """Risk findings from the AI's risk dicts, skipping malformed ones."""
+    findings = []
+    for r in risk_dicts:
+        try:
+            findings.append(
+                RiskFinding(
+                    category=RiskCategory(r.get("category", "structural")),
+                    severity=Severity(r.get("severity", "low")),
+                    title=r.get("title", "Unknown"),
+                    description=r.get("description", ""),
+                    source="ai_extraction",
+                )
+            )
+        except (ValueError, KeyError):
+            continue
+    return findings
+
+
+def to_risk_dicts(risk_score: RiskScore | None) -> list[dict]:
+    """The AI's risk dicts back from a score, leaving out market-derived findings."""
+    if risk_score is None:
+        return []
+    return [
+        {
+            "category": f.category.value,
+            "severity": f.severity.value,
+            "title": f.title,
+            "description": f.description,
+        }
+        for f in risk_score.findings
+        if f.source == "ai_extraction"
+    ]
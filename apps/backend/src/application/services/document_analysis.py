@@ -1,18 +1,92 @@
+import asyncio
+import hashlib
+import json
 import logging
-from uuid import UUID
+import time
+from collections.abc import Awaitable, Callable
 from datetime import datetime
+from typing import Any
+from uuid import UUID
 
-from src.domain.enums import AnalysisStatus, RiskCategory, Severity, BiddingStrategyType
-from src.domain.models.risk import RiskFinding, RiskScore
-from src.domain.models.analysis import AnalysisResult
-from src.domain.models.bidding import BiddingAdvice
+import anyio
+
+from src.application.services.chunked_analysis import (
+    map_chunks,
+    merge_property_data,
+    merge_risks,
+    to_findings,
+    to_risk_dicts,
+)
+from src.application.services.market_intelligence import MarketIntelligenceService
+from src.application.services.partial_results import PartialResults
+from src.application.services.stage_graph import StageGraph
+from src.config import settings
+from src.domain.enums import (
+    AnalysisStatus,
+    BiddingStrategyType,
+    DocumentType,
+)
 from src.domain.interfaces.ai_gateway import AIGateway
+from src.domain.interfaces.checkpoint_store import CheckpointStore
 from src.domain.interfaces.document_repository import DocumentRepository
 from src.domain.interfaces.document_storage import DocumentStorage
-from src.infrastructure.pdf.extractor import PDFExtractor
+from src.domain.models.analysis import AnalysisResult
+from src.domain.models.bidding import BiddingAdvice
+from src.domain.models.document import Document
+from src.domain.models.risk import RiskScore
+from src.infrastructure.ai.caching_gateway import SCHEMA_VERSION, ai_cache_bypassed
+from src.infrastructure.ai.prompts.document_parse import EXTRACT_PROPERTY_DATA_TOOL
+from src.infrastructure.pdf.corpus import (
+    CHARS_PER_TOKEN,
+    DocumentRedactor,
+    RedactedCorpus,
+    RedactedText,
+    get_redaction_cache,
+)
+from src.infrastructure.pdf.document_classifier import KeywordDocumentClassifier
+from src.infrastructure.pdf.extractor import PDFExtractor, get_extraction_cache
+from src.infrastructure.pdf.field_parser import ParsedFields, StructuredFieldParser
+from src.infrastructure.pdf.relevance import RelevanceRanker
+from src.infrastructure.pdf.sandbox import get_sandbox_pool
 
 logger = logging.getLogger(__name__)
 
+# How often a run checks on documents that upload preprocessing is handling
+PREPROCESS_POLL_SECONDS = 0.5
+
+# (event type, data): "status" when the pipeline enters a stage, "document"
+# as each document is extracted and classified
+ProgressCallback = Callable[[str, dict], None]
+
+# How each AI task reads a corpus too long for one prompt, in order of
+# preference. Risks can hide anywhere, so they read everything chunk by chunk;
+# property facts sit in a few passages; strengths and weaknesses are one
+# judgement over the property and need a single prompt.
+CONTEXT_STRATEGIES = {
+    "property": ("ranked", "map_reduce"),
+    "risks": ("map_reduce", "ranked"),
+    "strengths": ("ranked",),
+}
+
+PROPERTY_FIELDS = [
+    name
+    for name in EXTRACT_PROPERTY_DATA_TOOL["input_schema"]["properties"]
+    if name != "confidence_notes"
+]
+
+
+def _union(*lists: list[str]) -> list[str]:
+    merged: list[str] = []
+    for items in lists:
+        merged.extend(item for item in items if item not in merged)
+    return merged
+
+
+def fingerprint(*inputs: Any) -> str:
+    """Hash of a stage's inputs; a checkpoint is reused only if it matches."""
+    payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
 
 class DocumentAnalysisService:
     def __init__(
@@ -20,14 +94,130 @@ class DocumentAnalysisService:
         ai_gateway: AIGateway,
         doc_repo: DocumentRepository,
         storage: DocumentStorage,
+        market_service: MarketIntelligenceService | None = None,
+        checkpoints: CheckpointStore | None = None,
     ):
         self._ai = ai_gateway
         self._doc_repo = doc_repo
         self._storage = storage
-        self._extractor = PDFExtractor()
+        self._market = market_service
+        self._checkpoints = checkpoints
+        self._extractor = PDFExtractor(
+            cache=get_extraction_cache(),
+            parallel=True,
+            sandbox=get_sandbox_pool() if settings.pdf_sandbox_enabled else None,
+        )
+        self._field_parser = StructuredFieldParser()
+        self._classifier = KeywordDocumentClassifier()
+        self._redactor = DocumentRedactor(cache=get_redaction_cache())
+        self._ranker = RelevanceRanker()
+
+    async def extract_document(self, doc: Document) -> Document:
+        """Extract text and structured fields unless extracted before."""
+        if not doc.extracted_text:
+            await self._extract_text(doc)
+            await self._diff_against_previous(doc)
+        return doc
+
+    async def _extract_text(self, doc: Document) -> None:
+        # Stream from disk when possible so the PDF is never held in memory
+        source = await self._storage.local_path(doc.file_path)
+        if source is None:
+            source = await self._storage.retrieve(doc.file_path)
+        texts, tables, hashes = [], [], []
+        async for page in self._extractor.iter_pages(source):
+            texts.append(page.text)
+            tables.extend(page.tables)
+            hashes.append(page.content_hash or "")
+        doc.extracted_text = "\n\n".join(t for t in texts if t)
+        # Redact while page boundaries are known; later lookups hit the cache.
+        # Redaction is CPU-bound, so it runs off the event loop
+        await anyio.to_thread.run_sync(self._redactor.redact_pages, texts)
+        doc.parsed_data = self._field_parser.parse(doc.extracted_text, tables).to_dict()
+        doc.page_hashes = hashes
+
+    async def _diff_against_previous(
+        self, doc: Document, siblings: list[Document] | None = None
+    ) -> None:
+        """Link a re-uploaded revision to its predecessor and record changed pages.
+
+        The predecessor is the latest earlier upload in the session with the
+        same filename, or failing that sharing at least half of the pages.
+        ``siblings`` are the session's documents, fetched if not given.
+        """
+        hashes = set(doc.page_hashes or [])
+        if not hashes:
+            return
+        if siblings is None:
+            siblings = await self._doc_repo.get_by_session(doc.session_id)
+        # Only earlier uploads: a batch extracted together must not link the
+        # original to its own revision
+        others = [
+            d for d in siblings
+            if d.id != doc.id and d.page_hashes and d.created_at < doc.created_at
+        ]
+
+        def overlap(other: Document) -> int:
+            return len(hashes & set(other.page_hashes))
+
+        candidates = [d for d in others if d.filename == doc.filename] or [
+            d for d in others if overlap(d) * 2 >= len(hashes)
+        ]
+        if not candidates:
+            return
+        previous = max(candidates, key=lambda d: d.created_at)
+        known = set(previous.page_hashes)
+        doc.revision_of = previous.id
+        doc.changed_pages = [
+            number
+            for number, page_hash in enumerate(doc.page_hashes, start=1)
+            if page_hash not in known
+        ]
+
+    async def classify_document(self, doc: Document) -> Document:
+        """Classify an extracted document unless it has been classified before.
 
-    async def run_analysis(self, session_id: UUID) -> AnalysisResult:
-        """Run full analysis pipeline on all documents in a session."""
+        The local keyword classifier decides when it is confident enough;
+        only ambiguous documents are sent to the AI.
+        """
+        if not doc.processed_at:
+            local = self._classifier.classify(doc.extracted_text)
+            if local.confidence >= settings.local_classifier_min_confidence:
+                doc.document_type = local.document_type
+            else:
+                redacted = await anyio.to_thread.run_sync(
+                    self._redactor.redact, doc.extracted_text
+                )
+                doc.document_type = await self._ai.classify_document(RedactedText(redacted.text))
+            doc.processed_at = datetime.utcnow()
+        return doc
+
+    async def prepare_document(self, doc: Document) -> Document:
+        """Run the per-document stages: extraction and classification."""
+        await self.extract_document(doc)
+        return await self.classify_document(doc)
+
+    async def run_analysis(
+        self,
+        session_id: UUID,
+        partial: PartialResults | None = None,
+        previous: AnalysisResult | None = None,
+        on_progress: ProgressCallback | None = None,
+    ) -> AnalysisResult:
+        """Run full analysis pipeline on all documents in a session.
+
+        Findings are added to ``partial`` as the AI produces them, and stage
+        and per-document progress is reported to ``on_progress``. Documents
+        keep their extracted text and classification; with a checkpoint store
+        the AI and market stages keep their outputs too, so a rerun after a
+        failure resumes at the first stage whose inputs changed.
+
+        Given the ``previous`` result, only documents it does not cover are
+        read by the AI, and their findings are merged into it.
+
+        A session without usable text gives a FAILED result; an error in the
+        AI or market stages is raised.
+        """
         analysis = AnalysisResult(
             session_id=session_id, status=AnalysisStatus.EXTRACTING
         )
@@ -38,66 +228,141 @@ class DocumentAnalysisService:
             analysis.error_message = "No documents found for this session"
             return analysis
 
-        all_text = ""
+        documents, claimed = await self._claim_documents(session_id, documents)
+        corpus = RedactedCorpus()
+        local_fields = ParsedFields()
+        covered = set(previous.document_ids) if previous else set()
+        new_documents = [d for d in documents if str(d.id) not in covered]
+
+        try:
+            failed = await self._prepare_documents(
+                [d for d in documents if not d.processed_at], documents, on_progress
+            )
+        finally:
+            await self._doc_repo.release_preprocessing(claimed)
 
         for doc in documents:
+            if doc.id in failed:
+                continue
             try:
-                if not doc.extracted_text:
-                    content = await self._storage.retrieve(doc.file_path)
-                    text = await self._extractor.extract_text(content)
-                    doc.extracted_text = text
-                    await self._doc_repo.save(doc)
-
-                doc_type = await self._ai.classify_document(doc.extracted_text)
-                doc.document_type = doc_type
-                await self._doc_repo.save(doc)
-
-                all_text += f"\n\n--- {doc.filename} ({doc_type.value}) ---\n{doc.extracted_text}"
+                if str(doc.id) not in covered:
+                    corpus.add(
+                        f"{doc.filename} ({doc.document_type.value})",
+                        await anyio.to_thread.run_sync(
+                            self._redactor.redact, doc.extracted_text
+                        ),
+                    )
+                if doc.parsed_data is None:
+                    doc.parsed_data = self._field_parser.parse(doc.extracted_text).to_dict()
+                local_fields.merge(ParsedFields.from_dict(doc.parsed_data))
+                analysis.document_ids.append(str(doc.id))
             except Exception as e:
                 logger.error(f"Failed to process {doc.filename}: {e}")
                 continue
 
-        if not all_text.strip():
+        if previous is not None:
+            # Previously covered documents that were deleted since stay covered
+            analysis.document_ids = sorted(covered | set(analysis.document_ids))
+            if not corpus:
+                if new_documents:
+                    analysis.status = AnalysisStatus.FAILED
+                    analysis.error_message = "Could not extract text from the new documents"
+                    return analysis
+                return self._carry_over(analysis, previous)
+            logger.info(
+                f"Incremental analysis of {session_id}: {len(corpus.entries)} new of "
+                f"{len(documents)} documents"
+            )
+
+        if not corpus:
             analysis.status = AnalysisStatus.FAILED
             analysis.error_message = "Could not extract text from any documents"
             return analysis
 
+        # Redacted once here; every AI call below reads views of the same text
+        property_chunks = self._context(corpus, "property")
+        risk_chunks = self._context(corpus, "risks")
+        [strengths_text] = self._context(corpus, "strengths")
+        doc_type = (new_documents or documents)[0].document_type
+        known = previous.property_data if previous else None
         analysis.status = AnalysisStatus.ANALYZING
-        try:
-            property_data = await self._ai.extract_property_data(
-                all_text, documents[0].document_type
-            )
-            analysis.property_data = property_data
+        if on_progress is not None:
+            on_progress("status", {"status": analysis.status.value})
+
+        on_item = partial.add if partial is not None else None
 
-            risk_dicts = await self._ai.detect_risks(
-                all_text, documents[0].document_type
+        async def extract_property_data(g: StageGraph) -> dict:
+            property_data = await self._checkpointed(
+                session_id,
+                "property",
+                [
+                    settings.route("extract").model,
+                    property_chunks,
+                    doc_type,
+                    local_fields.to_dict(),
+                    settings.local_fields_min_confidence,
+                    known,
+                ],
+                lambda: self._extract_property_data(
+                    property_chunks, doc_type, local_fields, known
+                ),
             )
-            findings = []
-            for r in risk_dicts:
-                try:
-                    findings.append(
-                        RiskFinding(
-                            category=RiskCategory(r.get("category", "structural")),
-                            severity=Severity(r.get("severity", "low")),
-                            title=r.get("title", "Unknown"),
-                            description=r.get("description", ""),
-                            source="ai_extraction",
-                        )
-                    )
-                except (ValueError, KeyError):
-                    continue
+            if partial is not None:
+                partial.set_property_data(property_data)
+            return property_data
 
-            sw = await self._ai.identify_strengths_weaknesses(all_text, property_data)
-            analysis.strengths = sw.get("strengths", [])
-            analysis.weaknesses = sw.get("weaknesses", [])
+        # Risk detection only needs the text, so it overlaps property extraction;
+        # market enrichment starts as soon as the address is known
+        graph = StageGraph()
+        graph.add("property", extract_property_data)
+        graph.add(
+            "risks",
+            lambda g: self._checkpointed(
+                session_id,
+                "risks",
+                [settings.route("risks").model, risk_chunks, doc_type],
+                lambda: self._detect_risks(risk_chunks, doc_type, on_item),
+            ),
+        )
+        graph.add(
+            "strengths",
+            lambda g: self._checkpointed(
+                session_id,
+                "strengths",
+                [settings.route("strengths").model, strengths_text, g["property"]],
+                lambda: self._ai.identify_strengths_weaknesses(
+                    strengths_text, g["property"], on_item=on_item
+                ),
+            ),
+            after=["property"],
+        )
+        if self._market is not None:
+            graph.add("market", lambda g: self._enrich_market(session_id, local_fields, g))
 
+        try:
+            stages = await graph.run()
         except Exception as e:
+            # Raised, not returned: the job is retried, resuming at this stage
             logger.error(f"AI analysis failed: {e}")
-            analysis.status = AnalysisStatus.FAILED
-            analysis.error_message = f"AI analysis failed: {str(e)}"
-            return analysis
+            raise
+
+        property_data = analysis.property_data = stages["property"]
+        findings = to_findings(stages["risks"])
+        analysis.strengths = stages["strengths"].get("strengths", [])
+        analysis.weaknesses = stages["strengths"].get("weaknesses", [])
+        analysis.market_position = stages.get("market")
+        if previous is not None:
+            # New findings join the stored ones; duplicates keep the stronger
+            findings = to_findings(
+                merge_risks([to_risk_dicts(previous.risk_score), stages["risks"]])
+            )
+            analysis.strengths = _union(previous.strengths, analysis.strengths)
+            analysis.weaknesses = _union(previous.weaknesses, analysis.weaknesses)
+            analysis.market_position = analysis.market_position or previous.market_position
 
         analysis.status = AnalysisStatus.SCORING
+        if on_progress is not None:
+            on_progress("status", {"status": analysis.status.value})
         analysis.risk_score = RiskScore.compute(findings)
 
         asking_price = property_data.get("asking_price")
@@ -129,3 +394,228 @@ class DocumentAnalysisService:
         analysis.status = AnalysisStatus.COMPLETE
         analysis.completed_at = datetime.utcnow()
         return analysis
+
+    @staticmethod
+    def _carry_over(analysis: AnalysisResult, previous: AnalysisResult) -> AnalysisResult:
+        """Nothing new to read: the previous result stands."""
+        analysis.property_data = previous.property_data
+        analysis.strengths = list(previous.strengths)
+        analysis.weaknesses = list(previous.weaknesses)
+        analysis.risk_score = RiskScore.compute(to_findings(to_risk_dicts(previous.risk_score)))
+        analysis.market_position = previous.market_position
+        analysis.status = AnalysisStatus.COMPLETE
+        analysis.completed_at = datetime.utcnow()
+        return analysis
+
+    async def _claim_documents(
+        self, session_id: UUID, documents: list[Document]
+    ) -> tuple[list[Document], list[UUID]]:
+        """Claim the unprocessed documents, waiting for those claimed elsewhere.
+
+        Upload preprocessing holds a claim while it extracts and classifies a
+        document; the run reads its outcome rather than repeat the work. Claims
+        lapse, so a holder that died delays the run by one claim period at
+        most. Returns the documents, re-read if the run waited, and the ids
+        of those it claimed.
+        """
+        seconds = settings.preprocess_claim_seconds
+        deadline = time.monotonic() + seconds
+        claimed: list[UUID] = []
+        while True:
+            held = False
+            for doc in documents:
+                if doc.processed_at or doc.id in claimed:
+                    continue
+                if await self._doc_repo.claim_preprocessing(doc.id, seconds):
+                    claimed.append(doc.id)
+                else:
+                    held = True
+            if not held or time.monotonic() > deadline:
+                return documents, claimed
+            await asyncio.sleep(PREPROCESS_POLL_SECONDS)
+            documents = await self._doc_repo.get_by_session(session_id)
+
+    async def _prepare_documents(
+        self,
+        docs: list[Document],
+        siblings: list[Document],
+        on_progress: ProgressCallback | None = None,
+    ) -> set[UUID]:
+        """Extract and classify documents concurrently, then save them in one batch.
+
+        Returns the ids of documents that failed; the others are unaffected.
+        Revision diffs run in between, in upload order, so they see every
+        sibling's page hashes regardless of which extraction finished first.
+        """
+        slots = asyncio.Semaphore(settings.analysis_document_concurrency)
+        failed: set[UUID] = set()
+        done = 0
+
+        def report(doc: Document, stage: str) -> None:
+            nonlocal done
+            if stage != "extracted":
+                done += 1
+            if on_progress is not None:
+                on_progress(
+                    "document",
+                    {
+                        "document_id": str(doc.id),
+                        "filename": doc.filename,
+                        "stage": stage,
+                        "document_type": doc.document_type.value,
+                        "done": done,
+                        "total": len(docs),
+                    },
+                )
+
+        async def run(stage, doc: Document, reached: str) -> None:
+            async with slots:
+                try:
+                    await stage(doc)
+                except Exception as e:
+                    logger.error(f"Failed to process {doc.filename}: {e}")
+                    failed.add(doc.id)
+                    report(doc, "failed")
+                    return
+            report(doc, reached)
+
+        extracting = [d for d in docs if not d.extracted_text]
+        await asyncio.gather(*(run(self._extract_text, d, "extracted") for d in extracting))
+        for doc in extracting:
+            if doc.id not in failed:
+                await self._diff_against_previous(doc, siblings)
+
+        await asyncio.gather(
+            *(run(self.classify_document, d, "classified") for d in docs if d.id not in failed)
+        )
+        # Documents that failed half-way keep whatever stages they completed
+        await self._doc_repo.save_many(docs)
+        return failed
+
+    async def _enrich_market(
+        self, session_id: UUID, local_fields: ParsedFields, graph: StageGraph
+    ) -> dict | None:
+        """Market data for the property's location; best effort, like the clients."""
+        confident = local_fields.confident(settings.local_fields_min_confidence)
+        if "address" in confident and "postal_code" in confident:
+            location = confident
+        else:
+            location = await graph.result("property")
+        if not location.get("address") and not location.get("postal_code"):
+            return None
+
+        async def enrich() -> dict | None:
+            try:
+                return await self._market.enrich(location)
+            except Exception as e:
+                logger.warning(f"Market enrichment failed: {e}")
+                return None
+
+        return await self._checkpointed(session_id, "market", [location], enrich)
+
+    async def _checkpointed(
+        self,
+        session_id: UUID,
+        stage: str,
+        inputs: list,
+        run: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Reuse the stage's checkpoint if its inputs are unchanged, else run it
+        and checkpoint the output. Checkpoints are best effort: a store that
+        fails only costs the rerun. Empty outputs are not kept, so a stage
+        that came up with nothing (a failed market lookup) is tried again."""
+        if self._checkpoints is None or ai_cache_bypassed():
+            return await run()
+        key = fingerprint(SCHEMA_VERSION, stage, inputs)
+        try:
+            output = await self._checkpoints.load(session_id, stage, key)
+        except Exception as e:
+            logger.warning(f"Loading the {stage} checkpoint failed: {e}")
+            output = None
+        if output is not None:
+            logger.info(f"Resuming analysis of {session_id}: {stage} restored from checkpoint")
+            return output
+
+        output = await run()
+        if output is not None:
+            try:
+                await self._checkpoints.save(session_id, stage, key, output)
+            except Exception as e:
+                logger.warning(f"Saving the {stage} checkpoint failed: {e}")
+        return output
+
+    def _context(self, corpus: RedactedCorpus, task: str) -> list[RedactedText]:
+        """What the AI reads for a task: the whole corpus if it fits one prompt,
+        else map-reduce chunks or the most relevant passages, per
+        ``CONTEXT_STRATEGIES``. With neither enabled the gateway truncates."""
+        for strategy in CONTEXT_STRATEGIES[task]:
+            if strategy == "map_reduce" and settings.analysis_map_reduce:
+                max_tokens = settings.analysis_chunk_tokens
+                if len(corpus) <= max_tokens * CHARS_PER_TOKEN:
+                    return [corpus.text]
+                chunks = corpus.chunks(max_tokens)
+                logger.info(f"Analyzing {len(corpus)} characters as {len(chunks)} chunks")
+                return chunks
+            if strategy == "ranked" and settings.analysis_context_ranking:
+                budget = {
+                    "property": settings.analysis_property_context_chars,
+                    "risks": settings.analysis_risks_context_chars,
+                    "strengths": settings.analysis_strengths_context_chars,
+                }[task]
+                selected = self._ranker.select(corpus, task, budget)
+                if len(selected) < len(corpus):
+                    logger.info(
+                        f"Sending {len(selected)} of {len(corpus)} characters for {task}"
+                    )
+                return [selected]
+        return [corpus.text]
+
+    async def _detect_risks(
+        self, chunks: list[RedactedText], doc_type: DocumentType, on_item=None
+    ) -> list[dict]:
+        results = await map_chunks(
+            chunks,
+            lambda chunk: self._ai.detect_risks(chunk, doc_type, on_item=on_item),
+            settings.analysis_chunk_concurrency,
+        )
+        return results[0] if len(results) == 1 else merge_risks(results)
+
+    async def _extract_property_data(
+        self,
+        chunks: list[RedactedText],
+        doc_type: DocumentType,
+        local_fields: ParsedFields,
+        known: dict | None = None,
+    ) -> dict:
+        """Use locally parsed fields, asking the AI only for what is missing.
+
+        ``known`` is property data from an earlier analysis; its fields are
+        not asked for again, and it wins over new values of equal confidence.
+        """
+        threshold = settings.local_fields_min_confidence
+        confident = local_fields.confident(threshold)
+        known = known or {}
+        present = {name for name, value in known.items() if value is not None}
+
+        property_data: dict = {}
+        missing = [name for name in local_fields.missing(threshold) if name not in present]
+        if missing:
+            wanted = [f for f in PROPERTY_FIELDS if f not in confident and f not in present]
+            results = await map_chunks(
+                chunks,
+                lambda chunk: self._ai.extract_property_data(chunk, doc_type, fields=wanted),
+                settings.analysis_chunk_concurrency,
+            )
+            property_data = results[0] if len(results) == 1 else merge_property_data(results)
+        else:
+            logger.info("All required property fields known locally; skipping AI extraction")
+        if known:
+            property_data = merge_property_data([known, property_data])
+
+        notes = dict(property_data.get("confidence_notes") or {})
+        for name, value in local_fields.values.items():
+            if name in confident or property_data.get(name) is None:
+                property_data[name] = value
+                notes[name] = "confirmed" if name in confident else "inferred"
+        property_data["confidence_notes"] = notes
+        return property_data
@@ -2,6 +2,7 @@ import logging
 from uuid import UUID
 from datetime import datetime
 
+import anyio
 from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -12,7 +13,13 @@ from src.infrastructure.database.models import (
     AnalysisResultModel,
     PropertyModel,
     AuditLogModel,
+    AnalysisJobModel,
+    StageCheckpointModel,
+    AnalysisEventModel,
 )
+from src.infrastructure.ai.caching_gateway import get_response_cache
+from src.infrastructure.pdf.corpus import get_redaction_cache
+from src.infrastructure.pdf.extractor import get_extraction_cache, page_cache_key
 
 logger = logging.getLogger(__name__)
 
@@ -121,8 +128,17 @@ class GDPRService:
             "analyses": 0,
             "properties": 0,
             "audit_logs": 0,
+            "checkpoints": 0,
+            "cache_entries": 0,
         }
 
+        # Page hashes are only on the documents, so read them before deleting
+        documents = await self._doc_repo.get_by_session(session_id)
+        page_hashes = {h for doc in documents for h in doc.page_hashes or [] if h}
+        deleted["cache_entries"] = await anyio.to_thread.run_sync(
+            _evict_cached_text, sid, page_hashes
+        )
+
         deleted["files"] = await self._storage.delete_session(session_id)
         deleted["documents"] = await self._doc_repo.delete_by_session(session_id)
 
@@ -131,6 +147,17 @@ class GDPRService:
         )
         deleted["analyses"] = result.rowcount
 
+        await self._db.execute(
+            delete(AnalysisJobModel).where(AnalysisJobModel.session_id == sid)
+        )
+        result = await self._db.execute(
+            delete(StageCheckpointModel).where(StageCheckpointModel.session_id == sid)
+        )
+        deleted["checkpoints"] = result.rowcount
+        await self._db.execute(
+            delete(AnalysisEventModel).where(AnalysisEventModel.session_id == sid)
+        )
+
         result = await self._db.execute(
             delete(PropertyModel).where(PropertyModel.session_id == sid)
         )
@@ -146,3 +173,19 @@ class GDPRService:
 
         logger.info(f"Deleted all data for session {session_id}: {deleted}")
         return deleted
+
+
+def _evict_cached_text(sid: str, page_hashes: set[str]) -> int:
+    """Drop a session's extracted, redacted and AI-processed text from the caches.
+
+    Entries are found through the session's cache scope; pages extracted in
+    worker processes are found through their content hashes instead.
+    """
+    evicted = 0
+    extraction = get_extraction_cache()
+    if extraction is not None:
+        evicted += sum(extraction.delete(page_cache_key(h)) for h in page_hashes)
+    for cache in (extraction, get_redaction_cache(), get_response_cache()):
+        if cache is not None:
+            evicted += cache.forget_scope(sid)
+    return evicted
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import re
 
@@ -18,7 +19,11 @@ class MarketIntelligenceService:
         self._cbs = cbs_client
 
     async def enrich(self, property_data: dict) -> dict:
-        """Enrich property data with external API data."""
+        """Enrich property data with external API data.
+
+        BAG and EP-Online are queried concurrently; CBS follows once BAG has
+        supplied the municipality.
+        """
         result = {
             "bag_data": None,
             "energy_label_data": None,
@@ -28,15 +33,20 @@ class MarketIntelligenceService:
         address = property_data.get("address", "")
         postal_code = property_data.get("postal_code", "")
 
-        if address and postal_code:
-            result["bag_data"] = await self._bag.lookup_building(address, postal_code)
+        async def bag() -> dict | None:
+            if address and postal_code:
+                return await self._bag.lookup_building(address, postal_code)
+            return None
 
-        if postal_code:
+        async def energy_label() -> dict | None:
             house_number = re.search(r"\d+", address or "")
-            if house_number:
-                result["energy_label_data"] = await self._energy.lookup_label(
-                    postal_code, house_number.group()
-                )
+            if postal_code and house_number:
+                return await self._energy.lookup_label(postal_code, house_number.group())
+            return None
+
+        result["bag_data"], result["energy_label_data"] = await asyncio.gather(
+            bag(), energy_label()
+        )
 
         municipality = None
         if result["bag_data"]:
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from src.application.services.chunked_analysis import merge_risks, to_findings
+from src.domain.models.risk import RiskScore
+
+logger = logging.getLogger(__name__)
+
+
+class PartialResults:
+    """Findings of a running analysis, published while the AI is still working.
+
+    Items arrive through ``add`` (an ``ItemCallback``) and ``set_property_data``.
+    Every change schedules ``publish`` with a snapshot; changes made while a
+    publish is running are folded into the next one, so a slow store sees the
+    latest state rather than a backlog. Publishing is best effort: a failure
+    is logged and never fails the analysis.
+    """
+
+    def __init__(self, publish: Callable[[dict], Awaitable[None]]):
+        self._publish = publish
+        self.property_data: dict | None = None
+        self.risks: list[dict] = []
+        self.strengths: list[str] = []
+        self.weaknesses: list[str] = []
+        self.published = 0
+        self._started = time.perf_counter()
+        self._first_item: float | None = None
+        self._dirty = False
+        self._task: asyncio.Task | None = None
+
+    @property
+    def time_to_first_item(self) -> float | None:
+        """Seconds from creation to the first published finding."""
+        return self._first_item
+
+    def add(self, field: str, item: Any) -> None:
+        if field == "risks" and isinstance(item, dict):
+            self.risks.append(item)
+        elif field in ("strengths", "weaknesses") and isinstance(item, str):
+            getattr(self, field).append(item)
+        else:
+            return
+        if self._first_item is None:
+            self._first_item = time.perf_counter() - self._started
+            logger.info(f"First streamed finding after {self._first_item:.2f}s")
+        self._changed()
+
+    def set_property_data(self, property_data: dict) -> None:
+        self.property_data = property_data
+        self._changed()
+
+    def snapshot(self) -> dict:
+        risks = merge_risks([self.risks])
+        return {
+            "property_data": self.property_data,
+            "strengths": list(self.strengths),
+            "weaknesses": list(self.weaknesses),
+            "risk_score": RiskScore.compute(to_findings(risks)) if risks else None,
+        }
+
+    async def aclose(self) -> None:
+        """Wait for pending publishes, so none lands after the final result."""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    def _changed(self) -> None:
+        self._dirty = True
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._dirty:
+            self._dirty = False
+            try:
+                await self._publish(self.snapshot())
+                self.published += 1
+            except Exception as e:
+                logger.warning(f"Publishing partial results failed: {e}")
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[["StageGraph"], Awaitable[Any]]
+    after: tuple[str, ...] = ()
+
+
+class StageGraph:
+    """Runs async pipeline stages as soon as the stages they depend on finish.
+
+    Dependencies are declared with ``after`` and must be added first, so the
+    graph cannot contain cycles. A stage that only sometimes needs another one
+    can ``await graph.result(name)`` instead of declaring it. The first failure
+    cancels every stage still running and is re-raised from ``run``.
+    """
+
+    def __init__(self):
+        self._stages: dict[str, Stage] = {}
+        self._futures: dict[str, asyncio.Future] = {}
+        self.timings: dict[str, float] = {}
+
+    def add(
+        self,
+        name: str,
+        run: Callable[["StageGraph"], Awaitable[Any]],
+        after: tuple[str, ...] | list[str] = (),
+    ) -> None:
+        if name in self._stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        unknown = [dep for dep in after if dep not in self._stages]
+        if unknown:
+            raise ValueError(f"Stage {name} depends on unknown stages: {unknown}")
+        self._stages[name] = Stage(name, run, tuple(after))
+
+    def __getitem__(self, name: str) -> Any:
+        """Result of a finished stage; use inside stages that declared it."""
+        return self._futures[name].result()
+
+    async def result(self, name: str) -> Any:
+        """Wait for a stage that was added before the calling stage."""
+        return await asyncio.shield(self._futures[name])
+
+    async def run(self) -> dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        self._futures = {name: loop.create_future() for name in self._stages}
+        tasks = [asyncio.create_task(self._run_stage(s)) for s in self._stages.values()]
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            for future in self._futures.values():
+                # Failures surface through run(); don't warn about them again
+                if future.done() and not future.cancelled():
+                    future.exception()
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Stage graph finished in {elapsed:.2f}s: "
+            + ", ".join(f"{name}={seconds:.2f}s" for name, seconds in self.timings.items())
+        )
+        return {name: future.result() for name, future in self._futures.items()}
+
+    async def _run_stage(self, stage: Stage) -> None:
+        future = self._futures[stage.name]
+        try:
+            for dep in stage.after:
+                await asyncio.shield(self._futures[dep])
+            started = time.perf_counter()
+            value = await stage.run(self)
+            self.timings[stage.name] = time.perf_counter() - started
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        future.set_result(value)
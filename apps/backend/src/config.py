@@ -1,7 +1,29 @@
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 from pathlib import Path
 
 
+class ModelRoute(BaseModel):
+    """How one AI task calls Gemini; an empty model means ``gemini_model``."""
+
+    model: str = ""
+    max_output_tokens: int = 2000
+    timeout_seconds: float = 60.0
+    # Tried once when the model times out or stays overloaded
+    fallback_model: str = ""
+    # Calls slower than this count as SLO breaches in /metrics
+    latency_slo_seconds: float | None = None
+
+
+# Defaults per task; GEMINI_ROUTES overrides individual fields
+DEFAULT_ROUTES = {
+    "classify": ModelRoute(max_output_tokens=50, timeout_seconds=15, latency_slo_seconds=3),
+    "extract": ModelRoute(max_output_tokens=2000, timeout_seconds=60, latency_slo_seconds=20),
+    "risks": ModelRoute(max_output_tokens=3000, timeout_seconds=90, latency_slo_seconds=30),
+    "strengths": ModelRoute(max_output_tokens=2000, timeout_seconds=60, latency_slo_seconds=20),
+}
+
+
 class Settings(BaseSettings):
     # API
     environment: str = "development"
@@ -16,9 +38,85 @@ class Settings(BaseSettings):
     max_file_size_mb: int = 25
     max_session_size_mb: int = 100
 
+    # Caches (shared by all worker processes on the host)
+    cache_dir: str = "./data/cache"
+    extraction_cache_max_mb: int = 512
+    extraction_cache_ttl_hours: float = 72
+    redaction_cache_max_mb: int = 128
+    redaction_cache_ttl_hours: float = 72
+    ai_cache_max_mb: int = 256
+    ai_cache_ttl_hours: float = 168
+
+    # PDF extraction
+    pdf_process_pool_size: int = 4
+    pdf_parallel_page_threshold: int = 40
+    preprocess_concurrency: int = 2
+    # How long a document's extraction and classification is claimed by the
+    # upload task or an analysis run before the other may take it over
+    preprocess_claim_seconds: float = 120.0
+    # Documents extracted and classified at once within one analysis run
+    analysis_document_concurrency: int = 4
+    pdf_sandbox_enabled: bool = True
+    pdf_worker_timeout_seconds: float = 60.0
+    pdf_worker_max_pages: int = 500
+    pdf_worker_max_rss_mb: int = 1024
+
     # AI
     google_api_key: str = ""
     gemini_model: str = "gemini-2.0-flash"
+    # Point at a local fake server in tests; empty uses the public endpoint
+    gemini_base_url: str = ""
+    gemini_requests_per_minute: int = 60
+    gemini_tokens_per_minute: int = 1_000_000
+    # Upper bound for the adaptive concurrency limit
+    gemini_max_concurrency: int = 8
+    gemini_max_attempts: int = 4
+    gemini_retry_base_seconds: float = 1.0
+    gemini_retry_max_seconds: float = 30.0
+    # Per-task route overrides as JSON, e.g.
+    # {"classify": {"model": "gemini-2.0-flash-lite", "fallback_model": "gemini-2.0-flash"}}
+    gemini_routes: dict[str, dict] = {}
+    # Stream risks and strengths/weaknesses so findings are stored as they arrive
+    ai_streaming: bool = True
+    # Offline runs: record real responses to, or replay them from, a cassette file
+    ai_record_cassette: str = ""
+    ai_replay_cassette: str = ""
+    ai_replay_latency: str = "lognormal:1500,0.5"
+    ai_replay_error_rate: float = 0.0
+    ai_replay_seed: int = 0
+    # Locally parsed fields at or above this confidence are not sent to the AI
+    local_fields_min_confidence: float = 0.9
+    # Documents the keyword classifier is less sure about go to the AI
+    local_classifier_min_confidence: float = 0.75
+    # Opt-in: corpora longer than one chunk are analyzed chunk by chunk and
+    # merged, one AI call per chunk. Chunks are sized to what the gateway
+    # sends per call (8000 characters), so long sessions cost many calls.
+    analysis_map_reduce: bool = False
+    analysis_chunk_tokens: int = 1800
+    analysis_chunk_concurrency: int = 4
+    # Otherwise each task gets the passages most relevant to it, within a budget
+    analysis_context_ranking: bool = True
+    analysis_property_context_chars: int = 8000
+    analysis_risks_context_chars: int = 8000
+    analysis_strengths_context_chars: int = 6000
+
+    # Analysis jobs (run by `python -m src.worker`, or inside the API process)
+    analysis_inline_worker: bool = True
+    analysis_worker_concurrency: int = 2
+    analysis_job_visibility_seconds: float = 120.0
+    analysis_job_poll_seconds: float = 1.0
+    analysis_job_max_attempts: int = 3
+    # Queued analyses beyond this are refused with 503 and Retry-After
+    analysis_queue_max_depth: int = 100
+
+    # Progress streams (SSE): events reach other processes through the database
+    progress_poll_seconds: float = 0.5
+    # Polls look back this far, so events committed late are not skipped
+    progress_poll_overlap_seconds: float = 5.0
+    progress_heartbeat_seconds: float = 15.0
+    # Events buffered per open stream; a slow client loses the oldest first
+    progress_queue_size: int = 100
+    progress_event_retention_minutes: float = 60.0
 
     # External APIs
     ep_online_api_key: str = ""
@@ -31,5 +129,20 @@ class Settings(BaseSettings):
         path.mkdir(parents=True, exist_ok=True)
         return path
 
+    @property
+    def cache_path(self) -> Path:
+        path = Path(self.cache_dir)
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def route(self, task: str) -> ModelRoute:
+        """The route for an AI task: its defaults with any configured overrides."""
+        route = ModelRoute(
+            **{**DEFAULT_ROUTES[task].model_dump(), **self.gemini_routes.get(task, {})}
+        )
+        if not route.model:
+            route.model = self.gemini_model
+        return route
+
 
 settings = Settings()
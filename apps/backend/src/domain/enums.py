@@ -45,3 +45,12 @@ class AnalysisStatus(StrEnum):
     SCORING = "scoring"
     COMPLETE = "complete"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobStatus(StrEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
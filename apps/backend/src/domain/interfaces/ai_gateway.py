@@ -1,16 +1,29 @@
 from abc import ABC, abstractmethod
+from collections.abc import Callable
+from typing import Any
+
 from ..enums import DocumentType
 
+# Receives each finished list item of a response as soon as it is generated,
+# as (field, item): ("risks", {...}), ("strengths", "...") or ("weaknesses", "...")
+ItemCallback = Callable[[str, Any], None]
+
 
 class AIGateway(ABC):
     @abstractmethod
     async def classify_document(self, text: str) -> DocumentType: ...
 
     @abstractmethod
-    async def extract_property_data(self, text: str, doc_type: DocumentType) -> dict: ...
+    async def extract_property_data(
+        self, text: str, doc_type: DocumentType, fields: list[str] | None = None
+    ) -> dict: ...
 
     @abstractmethod
-    async def detect_risks(self, text: str, doc_type: DocumentType) -> list[dict]: ...
+    async def detect_risks(
+        self, text: str, doc_type: DocumentType, on_item: ItemCallback | None = None
+    ) -> list[dict]: ...
 
     @abstractmethod
-    async def identify_strengths_weaknesses(self, text: str, property_data: dict) -> dict: ...
+    async def identify_strengths_weaknesses(
+        self, text: str, property_data: dict, on_item: ItemCallback | None = None
+    ) -> dict: ...
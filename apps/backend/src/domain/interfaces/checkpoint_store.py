@@ -0,0 +1,12 @@
+from abc import ABC, abstractmethod
+from typing import Any
+from uuid import UUID
+
+
+class CheckpointStore(ABC):
+    @abstractmethod
+    async def load(self, session_id: UUID, stage: str, fingerprint: str) -> Any | None:
+        """The stage's saved output if it was computed from the same inputs."""
+
+    @abstractmethod
+    async def save(self, session_id: UUID, stage: str, fingerprint: str, output: Any) -> None: ...
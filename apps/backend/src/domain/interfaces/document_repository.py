@@ -7,12 +7,26 @@ class DocumentRepository(ABC):
     @abstractmethod
     async def save(self, document: Document) -> Document: ...
 
+    @abstractmethod
+    async def save_many(self, documents: list[Document]) -> list[Document]: ...
+
     @abstractmethod
     async def get_by_id(self, doc_id: UUID) -> Document | None: ...
 
     @abstractmethod
     async def get_by_session(self, session_id: UUID) -> list[Document]: ...
 
+    @abstractmethod
+    async def claim_preprocessing(self, doc_id: UUID, seconds: float) -> bool:
+        """Claim an unprocessed document for extraction and classification.
+
+        Returns False if it is processed or claimed already. A claim lapses
+        after ``seconds``, so a holder that died does not block the document.
+        """
+
+    @abstractmethod
+    async def release_preprocessing(self, doc_ids: list[UUID]) -> None: ...
+
     @abstractmethod
     async def delete(self, doc_id: UUID) -> bool: ...
 
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from pathlib import Path
 from uuid import UUID
 
 
@@ -9,6 +10,9 @@ class DocumentStorage(ABC):
     @abstractmethod
     async def retrieve(self, file_path: str) -> bytes: ...
 
+    @abstractmethod
+    async def local_path(self, file_path: str) -> Path | None: ...
+
     @abstractmethod
     async def delete(self, file_path: str) -> bool: ...
 
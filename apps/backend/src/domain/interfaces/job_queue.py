@@ -0,0 +1,41 @@
+from abc import ABC, abstractmethod
+
+from ..models.job import AnalysisJob
+
+
+class JobQueue(ABC):
+    @abstractmethod
+    async def enqueue(self, job: AnalysisJob) -> AnalysisJob: ...
+
+    @abstractmethod
+    async def get_active(self, analysis_id: str) -> AnalysisJob | None: ...
+
+    @abstractmethod
+    async def lease(self, worker_id: str, limit: int, visibility_seconds: float) -> list[AnalysisJob]: ...
+
+    @abstractmethod
+    async def heartbeat(self, job_id: str, worker_id: str, visibility_seconds: float) -> bool: ...
+
+    @abstractmethod
+    async def complete(self, job_id: str, worker_id: str) -> bool: ...
+
+    @abstractmethod
+    async def fail(self, job_id: str, worker_id: str, error: str, retry_in: float | None = None) -> bool: ...
+
+    @abstractmethod
+    async def release(self, job_id: str, worker_id: str) -> bool: ...
+
+    @abstractmethod
+    async def cancel(self, analysis_id: str) -> AnalysisJob | None: ...
+
+    @abstractmethod
+    async def cancelled(self, job_ids: list[str]) -> set[str]: ...
+
+    @abstractmethod
+    async def reap(self) -> list[AnalysisJob]: ...
+
+    @abstractmethod
+    async def position(self, job: AnalysisJob) -> int: ...
+
+    @abstractmethod
+    async def stats(self) -> dict: ...
@@ -20,3 +20,5 @@ class AnalysisResult:
     created_at: datetime = field(default_factory=datetime.utcnow)
     completed_at: datetime | None = None
     error_message: str | None = None
+    # Ids of the documents this result covers
+    document_ids: list[str] = field(default_factory=list)
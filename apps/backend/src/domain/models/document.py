@@ -15,3 +15,9 @@ class Document:
     extracted_text: str | None = None
     parsed_data: dict | None = None
     created_at: datetime = field(default_factory=datetime.utcnow)
+    processed_at: datetime | None = None
+    # Content hash per page, and for a revised upload the earlier document it
+    # revises plus the 1-based page numbers whose content changed
+    page_hashes: list[str] | None = None
+    revision_of: UUID | None = None
+    changed_pages: list[int] | None = None
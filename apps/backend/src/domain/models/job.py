@@ -0,0 +1,23 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from uuid import uuid4
+
+from ..enums import JobStatus
+
+
+@dataclass
+class AnalysisJob:
+    analysis_id: str
+    session_id: str
+    id: str = field(default_factory=lambda: str(uuid4()))
+    status: JobStatus = JobStatus.QUEUED
+    bypass_cache: bool = False
+    # Analyze only documents added since the stored result, and merge
+    incremental: bool = False
+    # Claims so far, the current one included; a lease that expires counts too
+    attempts: int = 0
+    max_attempts: int = 3
+    lease_owner: str | None = None
+    lease_expires_at: datetime | None = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    error: str | None = None
@@ -0,0 +1,237 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+
+import anyio
+
+from src.config import settings
+from src.domain.enums import DocumentType
+from src.domain.interfaces.ai_gateway import AIGateway, ItemCallback
+from src.infrastructure.ai.prompts import document_parse, risk_detect, weakness_detect
+from src.infrastructure.cache.disk_cache import DiskCache
+from src.infrastructure.pdf.corpus import RedactedText
+from src.infrastructure.pdf.preprocessor import PIIPreprocessor
+
+logger = logging.getLogger(__name__)
+
+
+def _schema_version() -> str:
+    """Fingerprint of every prompt template and tool schema.
+
+    Editing a prompt or tool changes the version, which retires all cached
+    responses produced with the old wording.
+    """
+    parts = [
+        value
+        for module in (document_parse, risk_detect, weakness_detect)
+        for name, value in sorted(vars(module).items())
+        if name.isupper()
+    ]
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+SCHEMA_VERSION = _schema_version()
+
+
+@dataclass
+class ResponseCacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    bypassed: int = 0
+    # Prompt and response bytes that did not have to go over the wire
+    bytes_saved: int = 0
+
+
+# Process-wide, shared by every gateway instance
+_stats = ResponseCacheStats()
+_inflight: dict[str, asyncio.Future] = {}
+_bypass: ContextVar[bool] = ContextVar("ai_cache_bypass", default=False)
+
+
+def response_cache_stats() -> dict:
+    return {**asdict(_stats), "inflight": len(_inflight)}
+
+
+@contextmanager
+def bypass_ai_cache(enabled: bool = True):
+    """Send AI calls made inside this block straight to the model."""
+    token = _bypass.set(enabled)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def ai_cache_bypassed() -> bool:
+    return _bypass.get()
+
+
+def _replay_items(on_item: ItemCallback | None, lists: dict) -> None:
+    """Hand a reused response to ``on_item`` item by item, like a streamed one."""
+    if on_item is None:
+        return
+    for field, items in lists.items():
+        if isinstance(items, list):
+            for item in items:
+                on_item(field, item)
+
+
+@lru_cache
+def get_response_cache() -> DiskCache | None:
+    """Process-wide cache of AI responses."""
+    if settings.ai_cache_max_mb <= 0:
+        return None
+    return DiskCache(
+        settings.cache_path / "ai_responses",
+        settings.ai_cache_max_mb * 1024 * 1024,
+        ttl_seconds=settings.ai_cache_ttl_hours * 3600,
+    )
+
+
+class CachingAIGateway(AIGateway):
+    """Caches another gateway's responses on disk, keyed by the redacted prompt.
+
+    The key covers the method, the model, the prompt/tool schema version and
+    a hash of the redacted input the model receives, so a response is only
+    reused for exactly the request that produced it. Concurrent identical requests share one
+    upstream call. Failed calls are never cached.
+    """
+
+    def __init__(
+        self,
+        inner: AIGateway,
+        cache: DiskCache | None,
+        ttl_seconds: float | None = None,
+    ):
+        self._inner = inner
+        self._cache = cache
+        self._ttl = settings.ai_cache_ttl_hours * 3600 if ttl_seconds is None else ttl_seconds
+        self._model = getattr(inner, "model", type(inner).__name__)
+        self._preprocessor = PIIPreprocessor()
+
+    async def classify_document(self, text: str) -> DocumentType:
+        text = self._redact("classify_document", text)
+        value = await self._cached(
+            "classify_document", [text], lambda: self._inner.classify_document(text), lambda r: r.value
+        )
+        return DocumentType(value)
+
+    async def extract_property_data(
+        self, text: str, doc_type: DocumentType, fields: list[str] | None = None
+    ) -> dict:
+        text = self._redact("extract_property_data", text)
+        return await self._cached(
+            "extract_property_data",
+            [text, doc_type.value, sorted(fields) if fields is not None else None],
+            lambda: self._inner.extract_property_data(text, doc_type, fields=fields),
+        )
+
+    async def detect_risks(
+        self, text: str, doc_type: DocumentType, on_item: ItemCallback | None = None
+    ) -> list[dict]:
+        text = self._redact("detect_risks", text)
+        return await self._cached(
+            "detect_risks",
+            [text, doc_type.value],
+            lambda: self._inner.detect_risks(text, doc_type, on_item=on_item),
+            on_reuse=lambda risks: _replay_items(on_item, {"risks": risks}),
+        )
+
+    async def identify_strengths_weaknesses(
+        self, text: str, property_data: dict, on_item: ItemCallback | None = None
+    ) -> dict:
+        text = self._redact("identify_strengths_weaknesses", text)
+        return await self._cached(
+            "identify_strengths_weaknesses",
+            [text, property_data],
+            lambda: self._inner.identify_strengths_weaknesses(text, property_data, on_item=on_item),
+            on_reuse=lambda result: _replay_items(on_item, result),
+        )
+
+    def cache_key(self, method: str, args: list) -> str:
+        payload = json.dumps(
+            [method, self._model_for(method), SCHEMA_VERSION, args],
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        ).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def _model_for(self, method: str) -> str:
+        # Gateways that route methods to different models key by that model
+        model_for = getattr(self._inner, "model_for", None)
+        return model_for(method) if model_for is not None else self._model
+
+    def _redact(self, method: str, text: str) -> RedactedText:
+        # Redact before keying so raw PII never reaches the cache key or the model
+        if not isinstance(text, RedactedText):
+            text = RedactedText(self._preprocessor.redact(text))
+        # Gateways that send part of the text key by that part, so requests
+        # differing only in what is not sent share a response
+        input_limit = getattr(self._inner, "input_limit", None)
+        if input_limit is not None:
+            text = RedactedText(text[: input_limit(method)])
+        return text
+
+    async def _cached(
+        self, method: str, args: list, call, encode=lambda r: r, on_reuse=lambda r: None
+    ):
+        """``call``'s result, or a cached or in-flight one passed to ``on_reuse``."""
+        if self._cache is None or _bypass.get():
+            _stats.bypassed += 1
+            return await call()
+
+        key = self.cache_key(method, args)
+        request_bytes = sum(len(str(a).encode("utf-8")) for a in args)
+        # File I/O, so off the event loop like the extraction cache
+        entry = await anyio.to_thread.run_sync(self._cache.get, key)
+        if entry is not None and time.time() - entry["created_at"] < self._ttl:
+            _stats.hits += 1
+            _stats.bytes_saved += request_bytes + entry["size"]
+            on_reuse(entry["value"])
+            return entry["value"]
+
+        pending = _inflight.get(key)
+        if pending is not None:
+            try:
+                value = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The leading request was cancelled; make our own
+                return await self._cached(method, args, call, encode, on_reuse)
+            _stats.coalesced += 1
+            _stats.bytes_saved += request_bytes
+            on_reuse(value)
+            return value
+
+        _stats.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        _inflight[key] = future
+        try:
+            value = encode(await call())
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved: with no waiters nobody else will look at it
+            future.exception()
+            raise
+        finally:
+            _inflight.pop(key, None)
+
+        future.set_result(value)
+        size = len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        entry = {"created_at": time.time(), "size": size, "value": value}
+        await anyio.to_thread.run_sync(self._cache.put, key, entry)
+        logger.debug(f"Cached {method} response under {key[:12]}")
+        return value
@@ -1,10 +1,18 @@
+import asyncio
 import json
 import logging
+import random
+import time
+from collections import defaultdict, deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from functools import lru_cache
+
 from google import genai
-from google.genai import types
-from src.config import settings
+from google.genai import errors, types
+from src.config import DEFAULT_ROUTES, ModelRoute, settings
 from src.domain.enums import DocumentType
-from src.domain.interfaces.ai_gateway import AIGateway
+from src.domain.interfaces.ai_gateway import AIGateway, ItemCallback
 from src.infrastructure.ai.prompts.document_parse import (
     CLASSIFY_DOCUMENT_PROMPT,
     EXTRACT_PROPERTY_DATA_PROMPT,
@@ -15,10 +23,71 @@ from src.infrastructure.ai.prompts.weakness_detect import (
     STRENGTHS_WEAKNESSES_PROMPT,
     STRENGTHS_WEAKNESSES_TOOL,
 )
+from src.infrastructure.ai.json_stream import IncompleteJSONError, JSONItemStream
+from src.infrastructure.ai.replay_gateway import Cassette, request_key
+from src.infrastructure.ai.rate_limiter import AdaptiveConcurrencyLimiter, TokenBucket
+from src.infrastructure.pdf.corpus import CHARS_PER_TOKEN, RedactedText
 from src.infrastructure.pdf.preprocessor import PIIPreprocessor
 
 logger = logging.getLogger(__name__)
 
+# Quota and overload responses; anything else is not worth retrying
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Route (see Settings.route) each gateway method calls
+METHOD_TASKS = {
+    "classify_document": "classify",
+    "extract_property_data": "extract",
+    "detect_risks": "risks",
+    "identify_strengths_weaknesses": "strengths",
+}
+
+# Characters of input text each method sends; the rest is not read
+METHOD_INPUT_CHARS = {
+    "classify_document": 3000,
+    "extract_property_data": 8000,
+    "detect_risks": 8000,
+    "identify_strengths_weaknesses": 6000,
+}
+
+# Recent call latencies kept per route for the percentiles in /metrics
+LATENCY_WINDOW = 500
+
+
+@dataclass
+class RouteStats:
+    calls: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    fallbacks: int = 0
+    slo_breaches: int = 0
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def summary(self, route: ModelRoute) -> dict:
+        ordered = sorted(self.latencies)
+
+        def percentile(q: float) -> float | None:
+            if not ordered:
+                return None
+            return round(ordered[min(int(len(ordered) * q), len(ordered) - 1)], 3)
+
+        return {
+            "model": route.model,
+            "fallback_model": route.fallback_model or None,
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "fallbacks": self.fallbacks,
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+            "latency_slo": route.latency_slo_seconds,
+            "slo_breaches": self.slo_breaches,
+        }
+
 
 def _claude_tool_to_gemini_declaration(tool: dict) -> types.FunctionDeclaration:
     """Convert a Claude-style tool dict to a Gemini FunctionDeclaration."""
@@ -30,37 +99,97 @@ def _claude_tool_to_gemini_declaration(tool: dict) -> types.FunctionDeclaration:
     )
 
 
+def _restrict_tool_properties(tool: dict, fields: list[str]) -> dict:
+    """Copy of a tool dict whose schema only asks for the given properties."""
+    schema = tool["input_schema"]
+    return {
+        **tool,
+        "input_schema": {
+            **schema,
+            "properties": {k: v for k, v in schema["properties"].items() if k in fields},
+            "required": [k for k in schema.get("required", []) if k in fields],
+        },
+    }
+
+
 class GeminiGateway(AIGateway):
-    def __init__(self):
-        self._client = genai.Client(api_key=settings.google_api_key)
+    """Gemini-backed gateway; one instance per process shares its client and limits.
+
+    Every call passes a requests-per-minute and a tokens-per-minute bucket and
+    an AIMD concurrency limiter that halves on 429/5xx responses. Those are
+    retried with jittered exponential backoff.
+
+    Each method calls its task's route from ``Settings.route``: model,
+    output-token budget, timeout and a fallback model tried once when the
+    model times out or stays overloaded. Latency and token usage are kept
+    per route.
+
+    Risk detection and strengths/weaknesses stream when given an ``on_item``
+    callback: the model then answers in JSON mode and every list item is
+    passed on as soon as it is complete.
+    """
+
+    def __init__(self, base_url: str | None = None):
+        base_url = base_url or settings.gemini_base_url
+        self._client = genai.Client(
+            api_key=settings.google_api_key,
+            http_options=types.HttpOptions(base_url=base_url) if base_url else None,
+        )
         self._model = settings.gemini_model
         self._preprocessor = PIIPreprocessor()
+        self._requests = TokenBucket(settings.gemini_requests_per_minute)
+        self._tokens = TokenBucket(settings.gemini_tokens_per_minute)
+        self._concurrency = AdaptiveConcurrencyLimiter(settings.gemini_max_concurrency)
+        self._calls = 0
+        self._retries = 0
+        self._throttled = 0
+        self._route_stats: dict[str, RouteStats] = defaultdict(RouteStats)
+        # Record mode: capture every response for offline replay
+        self._recorder = (
+            Cassette(settings.ai_record_cassette) if settings.ai_record_cassette else None
+        )
+
+    @property
+    def model(self) -> str:
+        return self._model
+
+    def model_for(self, method: str) -> str:
+        """Model currently routed to a gateway method."""
+        return settings.route(METHOD_TASKS[method]).model
+
+    def input_limit(self, method: str) -> int:
+        """Characters of input text a gateway method sends to the model."""
+        return METHOD_INPUT_CHARS[method]
 
     async def classify_document(self, text: str) -> DocumentType:
-        redacted = self._preprocessor.redact(text[:3000])
-        response = await self._client.aio.models.generate_content(
-            model=self._model,
+        redacted = self._redact(text, self.input_limit("classify_document"))
+        response = await self._generate(
+            "classify",
             contents=CLASSIFY_DOCUMENT_PROMPT.format(text=redacted),
-            config=types.GenerateContentConfig(
-                max_output_tokens=50,
-            ),
+            config=types.GenerateContentConfig(),
         )
         result = response.text.strip().lower()
         try:
-            return DocumentType(result)
+            doc_type = DocumentType(result)
         except ValueError:
-            return DocumentType.OTHER
+            doc_type = DocumentType.OTHER
+        self._record("classify_document", [text], doc_type.value)
+        return doc_type
 
-    async def extract_property_data(self, text: str, doc_type: DocumentType) -> dict:
-        redacted = self._preprocessor.redact(text[:8000])
-        func_decl = _claude_tool_to_gemini_declaration(EXTRACT_PROPERTY_DATA_TOOL)
-        response = await self._client.aio.models.generate_content(
-            model=self._model,
+    async def extract_property_data(
+        self, text: str, doc_type: DocumentType, fields: list[str] | None = None
+    ) -> dict:
+        redacted = self._redact(text, self.input_limit("extract_property_data"))
+        tool = EXTRACT_PROPERTY_DATA_TOOL
+        if fields is not None:
+            tool = _restrict_tool_properties(tool, [*fields, "confidence_notes"])
+        func_decl = _claude_tool_to_gemini_declaration(tool)
+        response = await self._generate(
+            "extract",
             contents=EXTRACT_PROPERTY_DATA_PROMPT.format(
                 doc_type=doc_type.value, text=redacted
             ),
             config=types.GenerateContentConfig(
-                max_output_tokens=2000,
                 tools=[types.Tool(function_declarations=[func_decl])],
                 tool_config=types.ToolConfig(
                     function_calling_config=types.FunctionCallingConfig(
@@ -70,18 +199,26 @@ class GeminiGateway(AIGateway):
                 ),
             ),
         )
-        return self._extract_function_call_args(response)
+        result = self._extract_function_call_args(response)
+        self._record("extract_property_data", [text, doc_type.value, fields], result)
+        return result
 
-    async def detect_risks(self, text: str, doc_type: DocumentType) -> list[dict]:
-        redacted = self._preprocessor.redact(text[:8000])
+    async def detect_risks(
+        self, text: str, doc_type: DocumentType, on_item: ItemCallback | None = None
+    ) -> list[dict]:
+        redacted = self._redact(text, self.input_limit("detect_risks"))
+        contents = DETECT_RISKS_PROMPT.format(doc_type=doc_type.value, text=redacted)
+        if on_item is not None and settings.ai_streaming:
+            risks = (await self._generate_items("risks", contents, DETECT_RISKS_TOOL, on_item)).get(
+                "risks", []
+            )
+            self._record("detect_risks", [text, doc_type.value], risks)
+            return risks
         func_decl = _claude_tool_to_gemini_declaration(DETECT_RISKS_TOOL)
-        response = await self._client.aio.models.generate_content(
-            model=self._model,
-            contents=DETECT_RISKS_PROMPT.format(
-                doc_type=doc_type.value, text=redacted
-            ),
+        response = await self._generate(
+            "risks",
+            contents=contents,
             config=types.GenerateContentConfig(
-                max_output_tokens=3000,
                 tools=[types.Tool(function_declarations=[func_decl])],
                 tool_config=types.ToolConfig(
                     function_calling_config=types.FunctionCallingConfig(
@@ -91,34 +228,226 @@ class GeminiGateway(AIGateway):
                 ),
             ),
         )
-        result = self._extract_function_call_args(response)
-        return result.get("risks", [])
-
-    async def identify_strengths_weaknesses(self, text: str, property_data: dict) -> dict:
-        redacted = self._preprocessor.redact(text[:6000])
-        func_decl = _claude_tool_to_gemini_declaration(STRENGTHS_WEAKNESSES_TOOL)
-        response = await self._client.aio.models.generate_content(
-            model=self._model,
-            contents=STRENGTHS_WEAKNESSES_PROMPT.format(
-                property_data=json.dumps(property_data, indent=2),
-                text=redacted,
-            ),
-            config=types.GenerateContentConfig(
-                max_output_tokens=2000,
-                tools=[types.Tool(function_declarations=[func_decl])],
-                tool_config=types.ToolConfig(
-                    function_calling_config=types.FunctionCallingConfig(
-                        mode="ANY",
-                        allowed_function_names=["identify_strengths_weaknesses"],
-                    )
-                ),
-            ),
+        risks = self._extract_function_call_args(response).get("risks", [])
+        self._record("detect_risks", [text, doc_type.value], risks)
+        return risks
+
+    async def identify_strengths_weaknesses(
+        self, text: str, property_data: dict, on_item: ItemCallback | None = None
+    ) -> dict:
+        redacted = self._redact(text, self.input_limit("identify_strengths_weaknesses"))
+        contents = STRENGTHS_WEAKNESSES_PROMPT.format(
+            property_data=json.dumps(property_data, indent=2),
+            text=redacted,
         )
-        result = self._extract_function_call_args(response)
+        if on_item is not None and settings.ai_streaming:
+            result = await self._generate_items(
+                "strengths", contents, STRENGTHS_WEAKNESSES_TOOL, on_item
+            )
+        else:
+            func_decl = _claude_tool_to_gemini_declaration(STRENGTHS_WEAKNESSES_TOOL)
+            response = await self._generate(
+                "strengths",
+                contents=contents,
+                config=types.GenerateContentConfig(
+                    tools=[types.Tool(function_declarations=[func_decl])],
+                    tool_config=types.ToolConfig(
+                        function_calling_config=types.FunctionCallingConfig(
+                            mode="ANY",
+                            allowed_function_names=["identify_strengths_weaknesses"],
+                        )
+                    ),
+                ),
+            )
+            result = self._extract_function_call_args(response)
         if not result:
-            return {"strengths": [], "weaknesses": []}
+            result = {"strengths": [], "weaknesses": []}
+        self._record("identify_strengths_weaknesses", [text, property_data], result)
         return result
 
+    def _record(self, method: str, args: list, response) -> None:
+        if self._recorder is not None:
+            self._recorder.record(method, request_key(method, args), response)
+
+    def metrics(self) -> dict:
+        return {
+            "calls": self._calls,
+            "retries": self._retries,
+            "throttled": self._throttled,
+            "concurrency_limit": int(self._concurrency.limit),
+            "in_flight": self._concurrency.in_flight,
+            "queued": self._concurrency.waiting
+            + self._requests.waiting
+            + self._tokens.waiting,
+            "requests_available": round(self._requests.available, 1),
+            "tokens_available": round(self._tokens.available),
+            "routes": {
+                task: self._route_stats[task].summary(settings.route(task))
+                for task in DEFAULT_ROUTES
+            },
+        }
+
+    async def aclose(self) -> None:
+        await self._client.aio.aclose()
+
+    async def _generate_items(
+        self, task: str, contents: str, tool: dict, on_item: ItemCallback
+    ) -> dict:
+        """Stream a JSON answer shaped like ``tool``'s input, passing on list items.
+
+        A cut-off answer raises IncompleteJSONError, so it is neither cached
+        nor checkpointed as if it were the whole response.
+        """
+        parser = JSONItemStream()
+
+        def on_text(text: str) -> None:
+            for name, item in parser.feed(text):
+                on_item(name, item)
+
+        await self._generate(
+            task,
+            contents=contents,
+            config=types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_json_schema=tool["input_schema"],
+            ),
+            on_text=on_text,
+        )
+        try:
+            return parser.result()
+        except IncompleteJSONError as e:
+            received = sum(len(items) for items in e.items.values())
+            logger.warning(f"Streamed {task} response was cut off after {received} items")
+            raise
+
+    async def _generate(
+        self,
+        task: str,
+        contents: str,
+        config: types.GenerateContentConfig,
+        on_text: Callable[[str], None] | None = None,
+    ):
+        """generate_content on a task's route, falling back to its fallback model.
+
+        With ``on_text`` the response is streamed instead and each text chunk
+        passed on as it arrives. Once text has been handed out it cannot be
+        taken back, so a stream that fails half-way is neither retried nor
+        sent to the fallback model.
+        """
+        route = settings.route(task)
+        stats = self._route_stats[task]
+        config = config.model_copy(update={"max_output_tokens": route.max_output_tokens})
+        streamed = False
+
+        def forward(text: str) -> None:
+            nonlocal streamed
+            streamed = True
+            on_text(text)
+
+        async def call(model: str):
+            return await self._call(
+                model, contents, config, route.timeout_seconds, forward if on_text else None, stats
+            )
+
+        stats.calls += 1
+        started = time.perf_counter()
+        try:
+            try:
+                return await call(route.model)
+            except (errors.APIError, TimeoutError) as e:
+                overloaded = isinstance(e, TimeoutError) or e.code in RETRYABLE_STATUS_CODES
+                if not route.fallback_model or not overloaded or streamed:
+                    raise
+                stats.fallbacks += 1
+                logger.warning(
+                    f"Gemini {task} call to {route.model} failed ({e!r}); "
+                    f"falling back to {route.fallback_model}"
+                )
+                return await call(route.fallback_model)
+        except Exception:
+            stats.failures += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            stats.latencies.append(elapsed)
+            if route.latency_slo_seconds is not None and elapsed > route.latency_slo_seconds:
+                stats.slo_breaches += 1
+
+    async def _call(
+        self,
+        model: str,
+        contents: str,
+        config: types.GenerateContentConfig,
+        timeout: float,
+        on_text: Callable[[str], None] | None,
+        stats: RouteStats,
+    ):
+        """One model behind the rate limits, retrying overload responses.
+
+        Timeouts are not retried on the same model; a model that is too slow
+        now will likely be too slow again.
+        """
+        tokens = len(contents) // CHARS_PER_TOKEN + (config.max_output_tokens or 0)
+        attempts = max(settings.gemini_max_attempts, 1)
+        for attempt in range(1, attempts + 1):
+            await self._requests.acquire()
+            await self._tokens.acquire(tokens)
+            await self._concurrency.acquire()
+            overloaded = None
+            streamed = False
+            try:
+                self._calls += 1
+                async with asyncio.timeout(timeout):
+                    if on_text is None:
+                        response = await self._client.aio.models.generate_content(
+                            model=model, contents=contents, config=config
+                        )
+                        usage = response.usage_metadata
+                    else:
+                        response = await self._client.aio.models.generate_content_stream(
+                            model=model, contents=contents, config=config
+                        )
+                        usage = None
+                        async for chunk in response:
+                            usage = chunk.usage_metadata or usage
+                            if chunk.text:
+                                streamed = True
+                                on_text(chunk.text)
+                overloaded = False
+                if usage is not None:
+                    stats.prompt_tokens += usage.prompt_token_count or 0
+                    stats.output_tokens += usage.candidates_token_count or 0
+                return response
+            except TimeoutError:
+                overloaded = True
+                stats.timeouts += 1
+                logger.warning(f"Gemini {model} did not answer within {timeout:.0f}s")
+                raise
+            except errors.APIError as e:
+                if e.code not in RETRYABLE_STATUS_CODES:
+                    raise
+                overloaded = True
+                self._throttled += 1
+                if attempt == attempts or streamed:
+                    raise
+                delay = min(
+                    settings.gemini_retry_max_seconds,
+                    settings.gemini_retry_base_seconds * 2 ** (attempt - 1),
+                ) * random.uniform(0.5, 1.5)
+                logger.warning(
+                    f"Gemini returned {e.code}; retry {attempt}/{attempts - 1} in {delay:.1f}s"
+                )
+            finally:
+                await self._concurrency.release(overloaded)
+            self._retries += 1
+            await asyncio.sleep(delay)
+
+    def _redact(self, text: str, limit: int) -> str:
+        """First ``limit`` characters of the text, redacted unless it already is."""
+        if isinstance(text, RedactedText):
+            return text[:limit]
+        return self._preprocessor.redact(text[:limit])
+
     @staticmethod
     def _extract_function_call_args(response) -> dict:
         """Extract arguments from the first function call in the response."""
@@ -128,3 +457,22 @@ class GeminiGateway(AIGateway):
                     # function_call.args is a dict-like object
                     return dict(part.function_call.args)
         return {}
+
+
+@lru_cache
+def get_gemini_gateway() -> GeminiGateway:
+    """Process-wide gateway, so all requests share one client and one set of limits."""
+    return GeminiGateway()
+
+
+def gemini_gateway_metrics() -> dict | None:
+    """Client metrics, or None while no Gemini call has been made."""
+    if not get_gemini_gateway.cache_info().currsize:
+        return None
+    return get_gemini_gateway().metrics()
+
+
+async def close_gemini_gateway() -> None:
+    if get_gemini_gateway.cache_info().currsize:
+        await get_gemini_gateway().aclose()
+        get_gemini_gateway.cache_clear()
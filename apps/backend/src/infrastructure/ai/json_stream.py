@@ -0,0 +1,98 @@
+import json
+from typing import Any
+
+
+class IncompleteJSONError(ValueError):
+    """The stream ended before its top-level object was closed."""
+
+    def __init__(self, items: dict[str, list]):
+        super().__init__("streamed response ended before the JSON object was complete")
+        # The list items that did complete, already passed on by ``feed``
+        self.items = items
+
+
+class JSONItemStream:
+    """Incremental parser for a streamed JSON object of lists.
+
+    Text is fed as it arrives; ``feed`` returns every element of a top-level
+    list that was completed by the new text, as (field, item). Only the
+    object's top-level lists are looked into, which is the shape of every
+    structured response the gateway streams.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._expect_key = False
+        self._key: str | None = None
+        self._list_field: str | None = None
+        self._item_start: int | None = None
+        self.items: dict[str, list] = {}
+
+    def feed(self, text: str) -> list[tuple[str, Any]]:
+        self._text += text
+        completed = []
+        while self._pos < len(self._text):
+            i, ch = self._pos, self._text[self._pos]
+            self._pos += 1
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._end_string(i, completed)
+                continue
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                if self._depth == 1:
+                    self._list_field = self._key if ch == "[" else None
+                elif self._depth == 2 and self._list_field is not None:
+                    self._item_start = i
+                self._depth += 1
+                self._expect_key = self._depth == 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 2 and self._item_start is not None:
+                    self._emit(self._text[self._item_start : i + 1], completed)
+                    self._item_start = None
+                elif self._depth == 1:
+                    self._list_field = None
+            elif self._depth == 1:
+                if ch == ",":
+                    self._expect_key = True
+                elif ch == ":":
+                    self._expect_key = False
+        return completed
+
+    def result(self) -> dict:
+        """The whole object; raises IncompleteJSONError if it was cut off."""
+        try:
+            value = json.loads(self._text)
+        except ValueError as e:
+            raise IncompleteJSONError(
+                {field: list(items) for field, items in self.items.items()}
+            ) from e
+        return value if isinstance(value, dict) else {}
+
+    def _end_string(self, end: int, completed: list) -> None:
+        raw = self._text[self._string_start : end + 1]
+        if self._depth == 1 and self._expect_key:
+            self._key = json.loads(raw)
+        elif self._depth == 2 and self._list_field is not None:
+            self._emit(raw, completed)
+
+    def _emit(self, raw: str, completed: list) -> None:
+        try:
+            item = json.loads(raw)
+        except ValueError:
+            return
+        self.items.setdefault(self._list_field, []).append(item)
+        completed.append((self._list_field, item))
@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at ``per_minute`` tokens a minute.
+
+    Waiters are served in arrival order. A request larger than the bucket is
+    clipped to its capacity so it can still go through once the bucket is full.
+    """
+
+    def __init__(self, per_minute: float, capacity: float | None = None):
+        self._rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waiting = 0
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self._tokens
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        amount = min(amount, self.capacity)
+        self.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    self._refill()
+                    if self._tokens >= amount:
+                        self._tokens -= amount
+                        return
+                    await asyncio.sleep((amount - self._tokens) / self._rate)
+        finally:
+            self.waiting -= 1
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+
+class AdaptiveConcurrencyLimiter:
+    """Concurrency cap tuned by additive-increase/multiplicative-decrease.
+
+    Every successful call raises the limit by ``1/limit`` (about one slot per
+    round of calls); an overload signal halves it. Calls beyond the current
+    limit wait in arrival order.
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int | None = None):
+        self.minimum = minimum
+        self.maximum = maximum if maximum is not None else initial
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.in_flight = 0
+        self.waiting = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            self.waiting += 1
+            try:
+                await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+
+    async def release(self, overloaded: bool | None) -> None:
+        """Free a slot; ``overloaded`` is True on 429/5xx, False on success."""
+        async with self._cond:
+            self.in_flight -= 1
+            if overloaded:
+                self.limit = max(float(self.minimum), self.limit / 2)
+            elif overloaded is False:
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            self._cond.notify_all()
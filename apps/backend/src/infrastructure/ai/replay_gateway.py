@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+from src.config import settings
+from src.domain.enums import DocumentType
+from src.domain.interfaces.ai_gateway import AIGateway, ItemCallback
+
+logger = logging.getLogger(__name__)
+
+
+def request_key(method: str, args: list) -> str:
+    """Stable identity of a gateway call, independent of model and prompt wording."""
+    payload = json.dumps([method, args], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Recorded gateway responses, one JSON object per line.
+
+    Each line holds ``method``, ``key`` (see ``request_key``) and ``response``.
+    Lookups fall back to a recorded response of the same method, picked by
+    key, so replays stay deterministic for documents that were never recorded.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._entries: dict[str, dict] = {}
+        self._by_method: dict[str, list[dict]] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with self.path.open(encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._add(json.loads(line))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, method: str, key: str, exact: bool = False):
+        entry = self._entries.get(key)
+        if entry is None and not exact:
+            candidates = self._by_method.get(method)
+            if candidates:
+                entry = candidates[int(key[:8], 16) % len(candidates)]
+        if entry is None:
+            raise KeyError(f"No recorded {method} response in {self.path}")
+        return entry["response"]
+
+    def record(self, method: str, key: str, response) -> None:
+        entry = {"method": method, "key": key, "response": response}
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            self._add(entry)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def _add(self, entry: dict) -> None:
+        if entry["key"] not in self._entries:
+            self._by_method.setdefault(entry["method"], []).append(entry)
+        self._entries[entry["key"]] = entry
+
+
+class LatencyModel:
+    """Samples simulated model latency in seconds from a spec string.
+
+    ``fixed:MS``, ``uniform:MIN_MS,MAX_MS`` or ``lognormal:MEDIAN_MS,SIGMA``.
+    """
+
+    def __init__(self, spec: str, rng: random.Random):
+        kind, _, params = spec.partition(":")
+        values = [float(v) for v in params.split(",") if v]
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+        self._kind = kind
+        self._values = values
+        self._rng = rng
+
+    def sample(self) -> float:
+        if self._kind == "fixed":
+            ms = self._values[0]
+        elif self._kind == "uniform":
+            ms = self._rng.uniform(self._values[0], self._values[1])
+        else:
+            median, sigma = self._values
+            ms = median * self._rng.lognormvariate(0, sigma)
+        return ms / 1000
+
+
+class InjectedAIError(Exception):
+    """Failure injected by ``ReplayAIGateway`` to exercise error handling."""
+
+
+class ReplayAIGateway(AIGateway):
+    """Offline gateway answering from a cassette with simulated latency and errors.
+
+    Latency and error draws come from a seeded generator, so a run with the
+    same inputs, seed and call order is reproducible.
+    """
+
+    model = "replay"
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        latency: str = "fixed:0",
+        error_rate: float = 0.0,
+        seed: int = 0,
+        exact: bool = False,
+    ):
+        self._cassette = cassette
+        self._rng = random.Random(seed)
+        self._latency = LatencyModel(latency, self._rng)
+        self._error_rate = error_rate
+        self._exact = exact
+        self.calls = 0
+
+    async def classify_document(self, text: str) -> DocumentType:
+        return DocumentType(await self._replay("classify_document", [text]))
+
+    async def extract_property_data(
+        self, text: str, doc_type: DocumentType, fields: list[str] | None = None
+    ) -> dict:
+        data = await self._replay("extract_property_data", [text, doc_type.value, fields])
+        if fields is not None:
+            data = {k: v for k, v in data.items() if k in fields or k == "confidence_notes"}
+        return data
+
+    async def detect_risks(
+        self, text: str, doc_type: DocumentType, on_item: ItemCallback | None = None
+    ) -> list[dict]:
+        return await self._replay(
+            "detect_risks", [text, doc_type.value], on_item, lambda risks: {"risks": risks}
+        )
+
+    async def identify_strengths_weaknesses(
+        self, text: str, property_data: dict, on_item: ItemCallback | None = None
+    ) -> dict:
+        return await self._replay(
+            "identify_strengths_weaknesses", [text, property_data], on_item, lambda r: r
+        )
+
+    async def _replay(self, method: str, args: list, on_item=None, lists=None):
+        """Recorded response after a sampled latency.
+
+        With ``on_item`` the response's list items are handed out spread
+        evenly over the latency, as a streamed answer would be.
+        """
+        self.calls += 1
+        latency = self._latency.sample()
+        if self._rng.random() < self._error_rate:
+            await asyncio.sleep(latency)
+            raise InjectedAIError(f"Injected {method} failure")
+        # Copy so callers can mutate the result without touching the cassette
+        response = json.loads(
+            json.dumps(self._cassette.lookup(method, request_key(method, args), self._exact))
+        )
+        if on_item is None:
+            await asyncio.sleep(latency)
+            return response
+        items = [
+            (field, item)
+            for field, values in lists(response).items()
+            if isinstance(values, list)
+            for item in values
+        ]
+        step = latency / (len(items) + 1)
+        for field, item in items:
+            await asyncio.sleep(step)
+            on_item(field, item)
+        await asyncio.sleep(step)
+        return response
+
+
+@lru_cache
+def get_replay_gateway() -> ReplayAIGateway:
+    """Process-wide replay gateway configured from settings."""
+    cassette = Cassette(settings.ai_replay_cassette)
+    logger.info(f"Replaying AI responses from {cassette.path} ({len(cassette)} entries)")
+    return ReplayAIGateway(
+        cassette,
+        latency=settings.ai_replay_latency,
+        error_rate=settings.ai_replay_error_rate,
+        seed=settings.ai_replay_seed,
+    )
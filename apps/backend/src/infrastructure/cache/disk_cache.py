@@ -0,0 +1,217 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_scope: ContextVar[str | None] = ContextVar("disk_cache_scope", default=None)
+
+
+@contextmanager
+def cache_scope(scope: str):
+    """Record the cache entries read or written inside this block under ``scope``.
+
+    ``DiskCache.forget_scope`` deletes exactly those entries later, so a
+    session's cached text can be erased together with the session.
+    """
+    token = _scope.set(scope)
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+class DiskCache:
+    """Size-bounded key/value cache of JSON documents on the local filesystem.
+
+    Entries are stored one file per key, so the cache can be shared by every
+    worker process on the host. File atime is the LRU clock: hits touch the
+    entry, and when the total size exceeds ``max_bytes`` the least recently
+    used entries are evicted until the cache is back under 90% of the budget.
+    File mtime stays the write time, so with ``ttl_seconds`` set an entry is
+    dropped that long after it was written, however often it is read.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int, ttl_seconds: float | None = None):
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._size: int | None = None
+        self._next_prune = 0.0
+        # Keys of each scope index as last read, with the (inode, size) read
+        self._recorded: dict[str, tuple[tuple[int, int], set[str]]] = {}
+
+    def __getstate__(self) -> dict:
+        # Picklable so extraction workers can share the cache directory
+        return {"directory": self._dir, "max_bytes": self._max_bytes, "ttl_seconds": self._ttl}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["directory"], state["max_bytes"], state.get("ttl_seconds"))
+
+    def get(self, key: str) -> dict | None:
+        path = self._path(key)
+        try:
+            written = path.stat().st_mtime
+            if self._expired(written):
+                path.unlink(missing_ok=True)
+                return None
+            value = json.loads(path.read_bytes())
+            os.utime(path, (time.time(), written))
+            self._remember(key, written=False)
+            return value
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable cache entry {key}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def put(self, key: str, value: dict) -> None:
+        path = self._path(key)
+        payload = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so concurrent readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            try:
+                replaced = path.stat().st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry {key}: {e}")
+            Path(tmp).unlink(missing_ok=True)
+            return
+        self._remember(key, written=True)
+
+        with self._lock:
+            if self._ttl is not None and time.time() >= self._next_prune:
+                self._prune()
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(payload) - replaced
+            if self._size > self._max_bytes:
+                self._evict()
+
+    def delete(self, key: str) -> bool:
+        try:
+            self._path(key).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def forget_scope(self, scope: str) -> int:
+        """Delete every entry used under ``cache_scope(scope)``; returns the count."""
+        index = self._scope_path(scope)
+        try:
+            keys = set(index.read_text().split())
+        except FileNotFoundError:
+            return 0
+        deleted = sum(self.delete(key) for key in keys)
+        index.unlink(missing_ok=True)
+        with self._lock:
+            self._size = None
+        return deleted
+
+    def _remember(self, key: str, written: bool) -> None:
+        """Record ``key`` in the index of the current scope, once."""
+        scope = _scope.get()
+        if scope is None:
+            return
+        index = self._scope_path(scope)
+        line = f"{key}\n"
+        try:
+            with self._lock:
+                version, keys = self._read_index(scope, index)
+                if key in keys:
+                    if written:
+                        # Pruning goes by the index's age, which must not
+                        # fall behind the entries it lists
+                        os.utime(index)
+                    return
+                index.parent.mkdir(exist_ok=True)
+                # One short line per append, so concurrent writers do not interleave
+                with open(index, "a") as f:
+                    f.write(line)
+                stat = index.stat()
+                if version == (stat.st_ino, stat.st_size - len(line)):
+                    keys.add(key)
+                    self._recorded[scope] = ((stat.st_ino, stat.st_size), keys)
+        except OSError as e:
+            logger.warning(f"Failed to record cache entry {key} for scope {scope}: {e}")
+
+    def _read_index(self, scope: str, index: Path) -> tuple[tuple[int, int] | None, set[str]]:
+        # Re-read only when another writer appended to it or it was replaced
+        try:
+            stat = index.stat()
+        except FileNotFoundError:
+            self._recorded.pop(scope, None)
+            return None, set()
+        version = (stat.st_ino, stat.st_size)
+        recorded = self._recorded.get(scope)
+        if recorded is None or recorded[0] != version:
+            recorded = (version, set(index.read_text().split()))
+            self._recorded[scope] = recorded
+        return recorded
+
+    def _expired(self, written: float) -> bool:
+        return self._ttl is not None and time.time() - written >= self._ttl
+
+    def _path(self, key: str) -> Path:
+        return self._dir / key[:2] / f"{key}.json"
+
+    def _scope_path(self, scope: str) -> Path:
+        return self._dir / "scopes" / f"{scope}.keys"
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries = []
+        for path in self._dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _prune(self) -> None:
+        # An index older than the TTL only lists entries that have expired too
+        expired = 0
+        for path in [*self._dir.glob("*/*.json"), *self._dir.glob("scopes/*.keys")]:
+            try:
+                if self._expired(path.stat().st_mtime):
+                    path.unlink()
+                    expired += 1
+            except FileNotFoundError:
+                continue
+        self._size = None
+        self._next_prune = time.time() + self._ttl / 10
+        if expired:
+            logger.info(f"Removed {expired} expired entries from cache {self._dir}")
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self._max_bytes * 0.9)
+        evicted = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+        self._size = total
+        logger.info(f"Evicted {evicted} entries from cache {self._dir}")
@@ -23,6 +23,12 @@ class DocumentModel(Base):
     extracted_text = Column(Text, nullable=True)
     parsed_data = Column(JSON, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    processed_at = Column(DateTime, nullable=True)
+    page_hashes = Column(JSON, nullable=True)
+    revision_of = Column(String(36), nullable=True)
+    changed_pages = Column(JSON, nullable=True)
+    # Lease on extraction and classification, so they run once per document
+    preprocessing_until = Column(DateTime, nullable=True)
 
 class PropertyModel(Base):
     __tablename__ = "properties"
@@ -56,6 +62,48 @@ class AnalysisResultModel(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
     error_message = Column(Text, nullable=True)
+    # Documents the stored result covers; later uploads are analyzed incrementally
+    analyzed_documents = Column(JSON, nullable=True)
+
+class AnalysisJobModel(Base):
+    __tablename__ = "analysis_jobs"
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    analysis_id = Column(String(36), nullable=False, index=True)
+    session_id = Column(String(36), nullable=False)
+    # The session while the job is queued or running, else NULL: the unique
+    # index admits one active analysis per session, whichever process asks
+    active_session_id = Column(String(36), nullable=True, unique=True, index=True)
+    status = Column(String(20), default="queued", index=True)
+    payload = Column(JSON, nullable=True)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    lease_owner = Column(String(100), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    available_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+
+class StageCheckpointModel(Base):
+    __tablename__ = "stage_checkpoints"
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    session_id = Column(String(36), nullable=False, index=True)
+    stage = Column(String(50), nullable=False)
+    fingerprint = Column(String(64), nullable=False)
+    output = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class AnalysisEventModel(Base):
+    __tablename__ = "analysis_events"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(String(36), nullable=False, index=True)
+    # Process that published the event; it delivered it locally already
+    origin = Column(String(100), nullable=False)
+    type = Column(String(20), nullable=False)
+    data = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
 class AuditLogModel(Base):
     __tablename__ = "audit_logs"
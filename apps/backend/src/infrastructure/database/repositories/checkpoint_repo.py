@@ -0,0 +1,45 @@
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.domain.interfaces.checkpoint_store import CheckpointStore
+from src.infrastructure.database.models import StageCheckpointModel
+
+
+class SQLCheckpointStore(CheckpointStore):
+    """One checkpoint per session and stage, replaced when the inputs change.
+
+    Pipeline stages run concurrently, so every call uses a session of its
+    own rather than one shared with the caller.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]):
+        self._session_factory = session_factory
+
+    async def load(self, session_id: UUID, stage: str, fingerprint: str) -> Any | None:
+        async with self._session_factory() as db:
+            result = await db.execute(
+                select(StageCheckpointModel.output).where(
+                    StageCheckpointModel.session_id == str(session_id),
+                    StageCheckpointModel.stage == stage,
+                    StageCheckpointModel.fingerprint == fingerprint,
+                )
+            )
+            return result.scalars().first()
+
+    async def save(self, session_id: UUID, stage: str, fingerprint: str, output: Any) -> None:
+        async with self._session_factory() as db:
+            await db.execute(
+                delete(StageCheckpointModel).where(
+                    StageCheckpointModel.session_id == str(session_id),
+                    StageCheckpointModel.stage == stage,
+                )
+            )
+            db.add(
+                StageCheckpointModel(
+                    session_id=str(session_id), stage=stage, fingerprint=fingerprint, output=output
+                )
+            )
+            await db.commit()
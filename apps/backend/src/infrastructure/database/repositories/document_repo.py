@@ -1,5 +1,6 @@
+from datetime import datetime, timedelta
 from uuid import UUID
-from sqlalchemy import select, delete
+from sqlalchemy import delete, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.domain.models.document import Document
 from src.domain.enums import DocumentType
@@ -19,7 +20,32 @@ class SQLDocumentRepository(DocumentRepository):
         if not model:
             model = DocumentModel(id=str(document.id))
             self._session.add(model)
+        self._apply(model, document)
 
+        await self._session.commit()
+        return document
+
+    async def save_many(self, documents: list[Document]) -> list[Document]:
+        if not documents:
+            return documents
+        result = await self._session.execute(
+            select(DocumentModel).where(
+                DocumentModel.id.in_([str(d.id) for d in documents])
+            )
+        )
+        models = {m.id: m for m in result.scalars().all()}
+        for document in documents:
+            model = models.get(str(document.id))
+            if not model:
+                model = DocumentModel(id=str(document.id))
+                self._session.add(model)
+            self._apply(model, document)
+
+        await self._session.commit()
+        return documents
+
+    @staticmethod
+    def _apply(model: DocumentModel, document: Document) -> None:
         model.session_id = str(document.session_id)
         model.filename = document.filename
         model.document_type = document.document_type.value
@@ -28,9 +54,10 @@ class SQLDocumentRepository(DocumentRepository):
         model.extracted_text = document.extracted_text
         model.parsed_data = document.parsed_data
         model.created_at = document.created_at
-
-        await self._session.commit()
-        return document
+        model.processed_at = document.processed_at
+        model.page_hashes = document.page_hashes
+        model.revision_of = str(document.revision_of) if document.revision_of else None
+        model.changed_pages = document.changed_pages
 
     async def get_by_id(self, doc_id: UUID) -> Document | None:
         result = await self._session.execute(
@@ -47,6 +74,33 @@ class SQLDocumentRepository(DocumentRepository):
         )
         return [self._to_domain(m) for m in result.scalars().all()]
 
+    async def claim_preprocessing(self, doc_id: UUID, seconds: float) -> bool:
+        now = datetime.utcnow()
+        result = await self._session.execute(
+            update(DocumentModel)
+            .where(
+                DocumentModel.id == str(doc_id),
+                DocumentModel.processed_at.is_(None),
+                or_(
+                    DocumentModel.preprocessing_until.is_(None),
+                    DocumentModel.preprocessing_until < now,
+                ),
+            )
+            .values(preprocessing_until=now + timedelta(seconds=seconds))
+        )
+        await self._session.commit()
+        return result.rowcount == 1
+
+    async def release_preprocessing(self, doc_ids: list[UUID]) -> None:
+        if not doc_ids:
+            return
+        await self._session.execute(
+            update(DocumentModel)
+            .where(DocumentModel.id.in_([str(d) for d in doc_ids]))
+            .values(preprocessing_until=None)
+        )
+        await self._session.commit()
+
     async def delete(self, doc_id: UUID) -> bool:
         result = await self._session.execute(
             delete(DocumentModel).where(DocumentModel.id == str(doc_id))
@@ -73,4 +127,8 @@ class SQLDocumentRepository(DocumentRepository):
             extracted_text=model.extracted_text,
             parsed_data=model.parsed_data,
             created_at=model.created_at,
+            processed_at=model.processed_at,
+            page_hashes=model.page_hashes,
+            revision_of=UUID(model.revision_of) if model.revision_of else None,
+            changed_pages=model.changed_pages,
         )
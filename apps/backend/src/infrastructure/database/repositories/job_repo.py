@@ -0,0 +1,339 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.domain.enums import JobStatus
+from src.domain.interfaces.job_queue import JobQueue
+from src.domain.models.job import AnalysisJob
+from src.infrastructure.database.models import AnalysisJobModel
+
+# Backoff before a failed job is retried: base * 2^(attempt - 1), capped
+RETRY_BASE_SECONDS = 10.0
+RETRY_MAX_SECONDS = 300.0
+
+
+class SQLJobQueue(JobQueue):
+    """Analysis jobs in a plain table, so any SQL database is the broker.
+
+    A worker leases a job for a visibility timeout and extends the lease with
+    heartbeats. If the worker dies the lease runs out and another worker
+    claims the job again, until it has been tried ``max_attempts`` times.
+    Claims are conditional updates on the job's status and attempt count,
+    which act as a version: of two workers racing for a job, the second
+    update matches no row. This needs no ``SELECT ... FOR UPDATE SKIP
+    LOCKED``, so SQLite and Postgres behave the same.
+
+    A session has at most one queued or running job: ``active_session_id``
+    holds the session id until the job ends and carries a unique index, so
+    of two processes enqueueing for the same session only one insert lands.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    async def enqueue(self, job: AnalysisJob) -> AnalysisJob:
+        """Queue ``job`` and commit, together with any pending changes.
+
+        If the session already has an active job, nothing is committed and
+        that job is returned instead; callers compare ids to tell.
+        """
+        self._session.add(
+            AnalysisJobModel(
+                id=job.id,
+                analysis_id=job.analysis_id,
+                session_id=job.session_id,
+                active_session_id=job.session_id,
+                status=job.status.value,
+                payload={"bypass_cache": job.bypass_cache, "incremental": job.incremental},
+                attempts=job.attempts,
+                max_attempts=job.max_attempts,
+                available_at=job.created_at,
+                created_at=job.created_at,
+            )
+        )
+        try:
+            await self._session.commit()
+        except IntegrityError:
+            await self._session.rollback()
+            result = await self._session.execute(
+                select(AnalysisJobModel).where(AnalysisJobModel.active_session_id == job.session_id)
+            )
+            model = result.scalar_one_or_none()
+            if model is None:
+                # The other job ended in the meantime; not a duplicate after all
+                raise
+            return self._to_domain(model)
+        return job
+
+    async def get_active(self, analysis_id: str) -> AnalysisJob | None:
+        result = await self._session.execute(
+            select(AnalysisJobModel)
+            .where(
+                AnalysisJobModel.analysis_id == analysis_id,
+                AnalysisJobModel.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]),
+            )
+            .order_by(AnalysisJobModel.created_at.desc())
+        )
+        model = result.scalars().first()
+        return self._to_domain(model) if model else None
+
+    async def lease(self, worker_id: str, limit: int, visibility_seconds: float) -> list[AnalysisJob]:
+        """Claim up to ``limit`` jobs that are due or whose lease ran out."""
+        if limit <= 0:
+            return []
+        now = datetime.utcnow()
+        result = await self._session.execute(
+            select(AnalysisJobModel)
+            .where(
+                or_(
+                    and_(
+                        AnalysisJobModel.status == JobStatus.QUEUED,
+                        AnalysisJobModel.available_at <= now,
+                    ),
+                    and_(
+                        AnalysisJobModel.status == JobStatus.RUNNING,
+                        AnalysisJobModel.lease_expires_at < now,
+                        AnalysisJobModel.attempts < AnalysisJobModel.max_attempts,
+                    ),
+                )
+            )
+            .order_by(AnalysisJobModel.created_at)
+            # Some candidates may be claimed by other workers in the meantime
+            .limit(limit * 2)
+        )
+        candidates = [(m.id, m.status, m.attempts) for m in result.scalars().all()]
+
+        leased = []
+        expires = now + timedelta(seconds=visibility_seconds)
+        for job_id, status, attempts in candidates:
+            if len(leased) == limit:
+                break
+            claimed = await self._session.execute(
+                update(AnalysisJobModel)
+                .where(
+                    AnalysisJobModel.id == job_id,
+                    AnalysisJobModel.status == status,
+                    AnalysisJobModel.attempts == attempts,
+                )
+                .values(
+                    status=JobStatus.RUNNING,
+                    attempts=attempts + 1,
+                    lease_owner=worker_id,
+                    lease_expires_at=expires,
+                    heartbeat_at=now,
+                    started_at=now,
+                )
+            )
+            await self._session.commit()
+            if claimed.rowcount == 1:
+                leased.append(job_id)
+
+        if not leased:
+            return []
+        result = await self._session.execute(
+            select(AnalysisJobModel)
+            .where(AnalysisJobModel.id.in_(leased))
+            .order_by(AnalysisJobModel.created_at)
+            .execution_options(populate_existing=True)
+        )
+        return [self._to_domain(m) for m in result.scalars().all()]
+
+    async def heartbeat(self, job_id: str, worker_id: str, visibility_seconds: float) -> bool:
+        """Extend the lease; False once the job is no longer ours."""
+        now = datetime.utcnow()
+        return await self._update_leased(
+            job_id,
+            worker_id,
+            lease_expires_at=now + timedelta(seconds=visibility_seconds),
+            heartbeat_at=now,
+        )
+
+    async def complete(self, job_id: str, worker_id: str) -> bool:
+        return await self._update_leased(
+            job_id,
+            worker_id,
+            status=JobStatus.DONE,
+            active_session_id=None,
+            lease_owner=None,
+            lease_expires_at=None,
+            finished_at=datetime.utcnow(),
+        )
+
+    async def fail(self, job_id: str, worker_id: str, error: str, retry_in: float | None = None) -> bool:
+        """Requeue the job after a backoff, or fail it once out of attempts."""
+        result = await self._session.execute(
+            select(AnalysisJobModel).where(AnalysisJobModel.id == job_id)
+        )
+        model = result.scalar_one_or_none()
+        if not model:
+            return False
+        now = datetime.utcnow()
+        if model.attempts >= model.max_attempts:
+            return await self._update_leased(
+                job_id,
+                worker_id,
+                status=JobStatus.FAILED,
+                active_session_id=None,
+                lease_owner=None,
+                lease_expires_at=None,
+                finished_at=now,
+                error=error,
+            )
+        if retry_in is None:
+            retry_in = min(RETRY_BASE_SECONDS * 2 ** (model.attempts - 1), RETRY_MAX_SECONDS)
+        return await self._update_leased(
+            job_id,
+            worker_id,
+            status=JobStatus.QUEUED,
+            lease_owner=None,
+            lease_expires_at=None,
+            available_at=now + timedelta(seconds=retry_in),
+            error=error,
+        )
+
+    async def release(self, job_id: str, worker_id: str) -> bool:
+        """Hand a job back untried, e.g. when its worker shuts down."""
+        return await self._update_leased(
+            job_id,
+            worker_id,
+            status=JobStatus.QUEUED,
+            attempts=AnalysisJobModel.attempts - 1,
+            lease_owner=None,
+            lease_expires_at=None,
+            available_at=datetime.utcnow(),
+        )
+
+    async def cancel(self, analysis_id: str) -> AnalysisJob | None:
+        """End the analysis's queued or running job; None if there is none.
+
+        The worker running it finds out at its next poll (see ``cancelled``).
+        """
+        while (job := await self.get_active(analysis_id)) is not None:
+            # Conditional like a claim, so a job leased meanwhile is seen again
+            result = await self._session.execute(
+                update(AnalysisJobModel)
+                .where(
+                    AnalysisJobModel.id == job.id,
+                    AnalysisJobModel.status == job.status,
+                    AnalysisJobModel.attempts == job.attempts,
+                )
+                .values(
+                    status=JobStatus.CANCELLED,
+                    active_session_id=None,
+                    lease_owner=None,
+                    lease_expires_at=None,
+                    finished_at=datetime.utcnow(),
+                )
+            )
+            await self._session.commit()
+            if result.rowcount == 1:
+                return job
+        return None
+
+    async def cancelled(self, job_ids: list[str]) -> set[str]:
+        """Those of ``job_ids`` that were cancelled or deleted."""
+        if not job_ids:
+            return set()
+        result = await self._session.execute(
+            select(AnalysisJobModel.id).where(
+                AnalysisJobModel.id.in_(job_ids),
+                AnalysisJobModel.status != JobStatus.CANCELLED,
+            )
+        )
+        return set(job_ids) - set(result.scalars().all())
+
+    async def reap(self) -> list[AnalysisJob]:
+        """Fail jobs whose last allowed lease ran out, and return them."""
+        now = datetime.utcnow()
+        result = await self._session.execute(
+            select(AnalysisJobModel).where(
+                AnalysisJobModel.status == JobStatus.RUNNING,
+                AnalysisJobModel.lease_expires_at < now,
+                AnalysisJobModel.attempts >= AnalysisJobModel.max_attempts,
+            )
+        )
+        reaped = []
+        for model in result.scalars().all():
+            failed = await self._session.execute(
+                update(AnalysisJobModel)
+                .where(
+                    AnalysisJobModel.id == model.id,
+                    AnalysisJobModel.status == JobStatus.RUNNING,
+                    AnalysisJobModel.attempts == model.attempts,
+                )
+                .values(
+                    status=JobStatus.FAILED,
+                    active_session_id=None,
+                    lease_owner=None,
+                    finished_at=now,
+                    error=f"Worker stopped responding after {model.attempts} attempts",
+                )
+            )
+            await self._session.commit()
+            if failed.rowcount == 1:
+                reaped.append(self._to_domain(model))
+        return reaped
+
+    async def position(self, job: AnalysisJob) -> int:
+        """1-based place among queued jobs; 0 once the job is running."""
+        if job.status != JobStatus.QUEUED:
+            return 0
+        result = await self._session.execute(
+            select(func.count(AnalysisJobModel.id)).where(
+                AnalysisJobModel.status == JobStatus.QUEUED,
+                AnalysisJobModel.created_at < job.created_at,
+            )
+        )
+        return result.scalar_one() + 1
+
+    async def stats(self) -> dict:
+        result = await self._session.execute(
+            select(
+                AnalysisJobModel.status,
+                func.count(AnalysisJobModel.id),
+                func.min(AnalysisJobModel.created_at),
+            )
+            .where(AnalysisJobModel.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]))
+            .group_by(AnalysisJobModel.status)
+        )
+        counts = {status: (count, oldest) for status, count, oldest in result.all()}
+        queued, oldest = counts.get(JobStatus.QUEUED, (0, None))
+        return {
+            "queued": queued,
+            "running": counts.get(JobStatus.RUNNING, (0, None))[0],
+            "oldest_queued_seconds": (
+                round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else 0.0
+            ),
+        }
+
+    async def _update_leased(self, job_id: str, worker_id: str, **values) -> bool:
+        result = await self._session.execute(
+            update(AnalysisJobModel)
+            .where(
+                AnalysisJobModel.id == job_id,
+                AnalysisJobModel.status == JobStatus.RUNNING,
+                AnalysisJobModel.lease_owner == worker_id,
+            )
+            .values(**values)
+        )
+        await self._session.commit()
+        return result.rowcount == 1
+
+    @staticmethod
+    def _to_domain(model: AnalysisJobModel) -> AnalysisJob:
+        return AnalysisJob(
+            id=model.id,
+            analysis_id=model.analysis_id,
+            session_id=model.session_id,
+            status=JobStatus(model.status),
+            bypass_cache=bool((model.payload or {}).get("bypass_cache")),
+            incremental=bool((model.payload or {}).get("incremental")),
+            attempts=model.attempts,
+            max_attempts=model.max_attempts,
+            lease_owner=model.lease_owner,
+            lease_expires_at=model.lease_expires_at,
+            created_at=model.created_at,
+            error=model.error,
+        )
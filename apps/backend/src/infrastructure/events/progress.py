@@ -0,0 +1,280 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config import settings
+from src.infrastructure.database.models import AnalysisEventModel, AnalysisResultModel
+
+logger = logging.getLogger(__name__)
+
+# Statuses after which a progress stream ends
+TERMINAL_STATUSES = ("complete", "failed", "cancelled")
+
+
+@dataclass
+class ProgressEvent:
+    session_id: str
+    # "status", "document" or "partial"
+    type: str
+    data: dict
+    # Status events with an analysis also move its status column
+    analysis_id: str | None = None
+
+
+class Subscription:
+    """Events for one open stream, in a bounded buffer that drops the oldest."""
+
+    def __init__(self, session_id: str, maxsize: int):
+        self.session_id = session_id
+        self._queue: asyncio.Queue[ProgressEvent] = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def put(self, event: ProgressEvent) -> None:
+        if self._queue.full():
+            # Status and partial events are snapshots; a newer one supersedes
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(event)
+
+    async def get(self, timeout: float) -> ProgressEvent | None:
+        """The next event, or None if there was none for ``timeout`` seconds."""
+        if not self._queue.empty():
+            return self._queue.get_nowait()
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except TimeoutError:
+            return None
+
+
+class ProgressHub:
+    """In-process pub/sub for analysis progress, fanned out through the database.
+
+    Published events reach subscribers in the same process at once. A single
+    writer task per process stores them for the others: events published
+    while a write is running go out together in the next one, so a process
+    running many analyses makes one commit at a time, not one per event.
+    One poller per process picks up events that other processes stored, for
+    the sessions someone here is watching. The poller runs only while
+    streams are open and makes one query per tick however many there are, so
+    a process with no open streams costs the database nothing. Ids are not
+    assigned in commit order, so each poll looks back ``overlap_seconds``
+    past the previous one and skips the ids it has already delivered.
+    Every status and partial event carries the full state, so a stream that
+    misses one (a full buffer, a reconnect) catches up with the next.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        poll_seconds: float | None = None,
+        queue_size: int | None = None,
+        origin: str | None = None,
+        overlap_seconds: float | None = None,
+    ):
+        self._session_factory = session_factory
+        self._poll = poll_seconds or settings.progress_poll_seconds
+        self._overlap = timedelta(
+            seconds=overlap_seconds or settings.progress_poll_overlap_seconds
+        )
+        self._queue_size = queue_size or settings.progress_queue_size
+        self.origin = origin or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self._poller: asyncio.Task | None = None
+        self._pending: list[ProgressEvent] = []
+        self._writer: asyncio.Task | None = None
+        self.polls = 0
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, session_id: str) -> Subscription:
+        subscription = Subscription(session_id, self._queue_size)
+        self._subscribers.setdefault(session_id, set()).add(subscription)
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll_loop())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.session_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.session_id]
+
+    def dispatch(self, events: list[ProgressEvent]) -> None:
+        """Deliver to the subscribers in this process."""
+        for event in events:
+            for subscription in self._subscribers.get(event.session_id, ()):
+                subscription.put(event)
+                self.delivered += 1
+
+    def publish(self, event: ProgressEvent) -> None:
+        """Deliver locally now and store in the background; never waits."""
+        self.dispatch([event])
+        self._pending.append(event)
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write())
+
+    async def flush(self) -> None:
+        """Wait until every published event is stored."""
+        if self._writer is not None:
+            await asyncio.shield(self._writer)
+
+    async def store(self, events: list[ProgressEvent]) -> None:
+        """Store events for other processes in one transaction.
+
+        The latest non-terminal status per analysis is written to the
+        analysis as well, so status changes cost no extra commit. It never
+        overwrites a final status that was saved in the meantime.
+        """
+        statuses = {
+            e.analysis_id: e.data["status"] for e in events if e.type == "status" and e.analysis_id
+        }
+        async with self._session_factory() as db:
+            # Executemany; the ORM would insert row by row to learn the ids
+            now = datetime.utcnow()
+            await db.execute(
+                insert(AnalysisEventModel),
+                [
+                    {
+                        "session_id": event.session_id,
+                        "origin": self.origin,
+                        "type": event.type,
+                        "data": event.data,
+                        "created_at": now,
+                    }
+                    for event in events
+                ],
+            )
+            # One statement per status, however many analyses move to it
+            by_status: dict[str, list[str]] = {}
+            for analysis_id, status in statuses.items():
+                if status not in TERMINAL_STATUSES:
+                    by_status.setdefault(status, []).append(analysis_id)
+            for status, analysis_ids in by_status.items():
+                await db.execute(
+                    update(AnalysisResultModel)
+                    .where(
+                        AnalysisResultModel.id.in_(analysis_ids),
+                        AnalysisResultModel.status.notin_(TERMINAL_STATUSES),
+                    )
+                    .values(status=status)
+                )
+            await db.commit()
+        self.published += len(events)
+
+    async def prune(self) -> int:
+        """Delete events older than the retention period."""
+        cutoff = datetime.utcnow() - timedelta(minutes=settings.progress_event_retention_minutes)
+        async with self._session_factory() as db:
+            result = await db.execute(
+                delete(AnalysisEventModel).where(AnalysisEventModel.created_at < cutoff)
+            )
+            await db.commit()
+            return result.rowcount
+
+    def stats(self) -> dict:
+        return {
+            "streams": sum(len(s) for s in self._subscribers.values()),
+            "sessions": len(self._subscribers),
+            "polls": self.polls,
+            "published": self.published,
+            "delivered": self.delivered,
+        }
+
+    async def close(self) -> None:
+        await self.flush()
+        if self._poller is not None:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+
+    async def _write(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending, []
+            try:
+                await self.store(batch)
+            except Exception as e:
+                # Best effort, like partial results: streams elsewhere miss it
+                logger.warning(f"Storing {len(batch)} progress events failed: {e}")
+
+    async def _poll_loop(self) -> None:
+        # Events stored since shortly before the first stream opened; streams
+        # start from a snapshot, so nothing older is needed
+        opened = since = datetime.utcnow() - timedelta(seconds=self._poll)
+        # Ids delivered within the look-back window, with their timestamps
+        seen: dict[int, datetime] = {}
+        while self._subscribers:
+            await asyncio.sleep(self._poll)
+            if not self._subscribers:
+                break
+            try:
+                since = max(await self._poll_once(since, seen), opened)
+            except Exception as e:
+                logger.warning(f"Polling progress events failed: {e}")
+
+    async def _poll_once(self, since: datetime, seen: dict[int, datetime]) -> datetime:
+        """Deliver unseen events stored from ``since``; returns the next ``since``."""
+        started = datetime.utcnow()
+        async with self._session_factory() as db:
+            result = await db.execute(
+                select(AnalysisEventModel)
+                .where(
+                    AnalysisEventModel.created_at >= since,
+                    AnalysisEventModel.session_id.in_(list(self._subscribers)),
+                    AnalysisEventModel.origin != self.origin,
+                )
+                .order_by(AnalysisEventModel.created_at, AnalysisEventModel.id)
+            )
+            rows = [r for r in result.scalars().all() if r.id not in seen]
+        self.polls += 1
+        for row in rows:
+            seen[row.id] = row.created_at
+        since = started - self._overlap
+        for event_id in [i for i, created_at in seen.items() if created_at < since]:
+            del seen[event_id]
+        self.dispatch([ProgressEvent(r.session_id, r.type, r.data or {}) for r in rows])
+        return since
+
+
+class ProgressPublisher:
+    """Progress of one analysis run, published through the process's hub."""
+
+    def __init__(self, hub: ProgressHub, session_id: str, analysis_id: str):
+        self._hub = hub
+        self._session_id = session_id
+        self._analysis_id = analysis_id
+        self.emitted = 0
+
+    def emit(self, type: str, data: dict) -> None:
+        self._hub.publish(ProgressEvent(self._session_id, type, data, self._analysis_id))
+        self.emitted += 1
+
+    async def aclose(self) -> None:
+        """Wait until every emitted event is stored."""
+        await self._hub.flush()
+
+
+@lru_cache
+def get_progress_hub() -> ProgressHub:
+    """Process-wide progress hub, created on first use."""
+    from src.infrastructure.database.engine import async_session_factory
+
+    return ProgressHub(async_session_factory)
+
+
+async def close_progress_hub() -> None:
+    if get_progress_hub.cache_info().currsize:
+        await get_progress_hub().close()
+
+
+def progress_hub_stats() -> dict | None:
+    if not get_progress_hub.cache_info().currsize:
+        return None
+    return get_progress_hub().stats()
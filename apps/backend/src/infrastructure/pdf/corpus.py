@@ -0,0 +1,255 @@
+import hashlib
+import logging
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from src.config import settings
+from src.infrastructure.cache.disk_cache import DiskCache
+from src.infrastructure.pdf.preprocessor import PIIPreprocessor
+
+logger = logging.getLogger(__name__)
+
+# Bump when the PII patterns change so cached redactions are not reused
+REDACTION_VERSION = "1"
+
+PAGE_SEPARATOR = "\n\n"
+
+# Rough size of a token in Dutch prose, for budgeting prompt chunks
+CHARS_PER_TOKEN = 4
+
+# Coarsest first: sections, then lines, then words
+_SPLIT_SEPARATORS = ("\n\n", "\n", " ")
+
+
+class RedactedText(str):
+    """Text that has already been through PII redaction.
+
+    Gateways pass instances through unchanged instead of redacting again.
+    Slicing returns a plain ``str``, so use ``RedactedCorpus.span`` to keep
+    the marker on a view.
+    """
+
+
+@dataclass
+class RedactedDocument:
+    """One document's redacted text and where each of its pages starts.
+
+    ``page_starts`` has an entry per extracted page, empty pages included, so
+    page numbers line up with ``Document.page_hashes``.
+    """
+
+    text: str
+    page_starts: list[int] = field(default_factory=lambda: [0])
+
+    @classmethod
+    def from_pages(cls, pages: list[str]) -> "RedactedDocument":
+        parts, starts, offset = [], [], 0
+        for page in pages:
+            if parts and page:
+                offset += len(PAGE_SEPARATOR)
+            starts.append(offset)
+            if page:
+                parts.append(page)
+                offset += len(page)
+        return cls(PAGE_SEPARATOR.join(parts), starts or [0])
+
+    def to_dict(self) -> dict:
+        return {"text": self.text, "page_starts": self.page_starts}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RedactedDocument":
+        return cls(data["text"], list(data["page_starts"]))
+
+
+class DocumentRedactor:
+    """Redacts document text once and remembers the result by content hash.
+
+    Redacting page by page gives the same text as redacting the joined
+    document: no PII pattern can match across the blank-line page separator.
+    """
+
+    def __init__(self, preprocessor: PIIPreprocessor | None = None, cache: DiskCache | None = None):
+        self._preprocessor = preprocessor or PIIPreprocessor()
+        self._cache = cache
+
+    @staticmethod
+    def cache_key(text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+        return hashlib.sha256(f"{REDACTION_VERSION}:{digest}".encode()).hexdigest()
+
+    def redact_pages(self, pages: list[str]) -> RedactedDocument:
+        """Redact freshly extracted pages, keeping the page offsets."""
+        key = self.cache_key(PAGE_SEPARATOR.join(p for p in pages if p))
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+        redacted = RedactedDocument.from_pages([self._preprocessor.redact(p) for p in pages])
+        self._put(key, redacted)
+        return redacted
+
+    def redact(self, text: str) -> RedactedDocument:
+        """Redacted form of a stored document's extracted text.
+
+        Documents extracted through ``redact_pages`` are a cache hit; anything
+        else is redacted now and treated as a single page.
+        """
+        key = self.cache_key(text)
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+        redacted = RedactedDocument(self._preprocessor.redact(text))
+        self._put(key, redacted)
+        return redacted
+
+    def _get(self, key: str) -> RedactedDocument | None:
+        if self._cache is None:
+            return None
+        cached = self._cache.get(key)
+        return RedactedDocument.from_dict(cached) if cached is not None else None
+
+    def _put(self, key: str, redacted: RedactedDocument) -> None:
+        if self._cache is not None:
+            self._cache.put(key, redacted.to_dict())
+
+
+@lru_cache
+def get_redaction_cache() -> DiskCache | None:
+    """Process-wide cache of redacted document text."""
+    if settings.redaction_cache_max_mb <= 0:
+        return None
+    return DiskCache(
+        settings.cache_path / "redaction",
+        settings.redaction_cache_max_mb * 1024 * 1024,
+        ttl_seconds=settings.redaction_cache_ttl_hours * 3600,
+    )
+
+
+@dataclass
+class CorpusEntry:
+    label: str
+    # Offsets into the corpus text; ``start`` is just after the header
+    start: int
+    end: int
+    page_starts: list[int]
+
+
+class RedactedCorpus:
+    """All documents of an analysis as one redacted text, built once.
+
+    Each document is preceded by a ``--- filename (type) ---`` header. Offset
+    indexes map corpus positions back to documents and pages, so callers can
+    cut out just the spans they send instead of re-joining or re-redacting.
+    """
+
+    def __init__(self):
+        self._parts: list[str] = []
+        self._length = 0
+        self._text: RedactedText | None = None
+        self.entries: list[CorpusEntry] = []
+
+    def add(self, label: str, document: RedactedDocument) -> None:
+        if self._text is not None:
+            raise RuntimeError("Corpus is frozen once its text has been read")
+        header = f"\n\n--- {label} ---\n"
+        start = self._length + len(header)
+        self._parts += [header, document.text]
+        self._length = start + len(document.text)
+        self.entries.append(
+            CorpusEntry(label, start, self._length, [start + s for s in document.page_starts])
+        )
+
+    @property
+    def text(self) -> RedactedText:
+        if self._text is None:
+            self._text = RedactedText("".join(self._parts))
+            self._parts = []
+        return self._text
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __bool__(self) -> bool:
+        return bool(self.entries)
+
+    def span(self, start: int, end: int) -> RedactedText:
+        return RedactedText(self.text[start:end])
+
+    def document(self, index: int) -> RedactedText:
+        entry = self.entries[index]
+        return self.span(entry.start, entry.end)
+
+    def page(self, index: int, page_number: int) -> RedactedText:
+        """Text of one page (1-based) of the document at ``index``."""
+        entry = self.entries[index]
+        starts = entry.page_starts
+        end = starts[page_number] if page_number < len(starts) else entry.end
+        # Drop the separator before the next page
+        return RedactedText(self.text[starts[page_number - 1]:end].rstrip("\n"))
+
+    def chunks(self, max_tokens: int) -> list[RedactedText]:
+        """Split the corpus into chunks of at most ``max_tokens``.
+
+        Chunks never span documents and are cut at page boundaries where
+        possible, then at sections and lines, so a document's chunks do not
+        change when other documents are added. Each chunk repeats its
+        document's header so the model knows what it is reading.
+        """
+        budget = max_tokens * CHARS_PER_TOKEN
+        chunks = []
+        for index, entry in enumerate(self.entries):
+            header = f"--- {entry.label} ---\n"
+            room = max(budget - len(header), 1)
+            current: list[str] = []
+            size = 0
+            for piece in self.pieces(index, room):
+                if current and size + len(PAGE_SEPARATOR) + len(piece) > room:
+                    chunks.append(RedactedText(header + PAGE_SEPARATOR.join(current)))
+                    current, size = [], 0
+                size += len(piece) + (len(PAGE_SEPARATOR) if current else 0)
+                current.append(piece)
+            if current:
+                chunks.append(RedactedText(header + PAGE_SEPARATOR.join(current)))
+        return chunks
+
+    def pieces(self, index: int, limit: int) -> list[str]:
+        """The pages of the document at ``index``, long ones cut into parts of
+        at most ``limit`` characters at sections, then lines, then words."""
+        return [
+            piece
+            for number in range(1, len(self.entries[index].page_starts) + 1)
+            for piece in _split(self.page(index, number), limit)
+        ]
+
+    def locate(self, offset: int) -> tuple[int, int]:
+        """(document index, 1-based page number) containing a corpus offset."""
+        index = max(bisect_right([e.start for e in self.entries], offset) - 1, 0)
+        page = max(bisect_right(self.entries[index].page_starts, offset), 1)
+        return index, page
+
+
+def _split(text: str, limit: int, separators: tuple[str, ...] = _SPLIT_SEPARATORS) -> list[str]:
+    """Pieces of at most ``limit`` characters, cut at the coarsest separator."""
+    if not text.strip():
+        return []
+    if len(text) <= limit:
+        return [text]
+    if not separators:
+        return [text[i:i + limit] for i in range(0, len(text), limit)]
+    separator, finer = separators[0], separators[1:]
+    pieces, current = [], ""
+    for part in text.split(separator):
+        candidate = f"{current}{separator}{part}" if current else part
+        if len(candidate) <= limit:
+            current = candidate
+            continue
+        if current:
+            pieces.append(current)
+        if len(part) <= limit:
+            current = part
+        else:
+            pieces.extend(_split(part, limit, finer))
+            current = ""
+    if current:
+        pieces.append(current)
+    return pieces
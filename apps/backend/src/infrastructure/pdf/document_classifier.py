@@ -0,0 +1,129 @@
+from dataclasses import dataclass
+
+from src.domain.enums import DocumentType
+
+# Only the start of a document is scored; titles and headings live there
+CLASSIFY_CHARS = 4000
+# Repeats of one keyword stop adding evidence after this many hits
+MAX_HITS_PER_KEYWORD = 3
+# Evidence a runner-up and a weak document need to overcome; keeps a single
+# stray keyword from producing a confident answer
+CONFIDENCE_PRIOR = 2.0
+
+# Keyword weights per document type. Strong, type-specific terms weigh 3-4;
+# words that also occur in other documents weigh 1-2. Keywords are matched as
+# lowercase substrings, so "energielabel" also counts "energielabelklasse".
+KEYWORDS: dict[DocumentType, dict[str, float]] = {
+    DocumentType.PURCHASE_AGREEMENT: {
+        "koopovereenkomst": 4,
+        "koopakte": 4,
+        "koopsom": 3,
+        "waarborgsom": 3,
+        "ontbindende voorwaarde": 3,
+        "bedenktijd": 2,
+        "bankgarantie": 2,
+        "de koper": 1,
+        "de verkoper": 1,
+        "notaris": 1,
+    },
+    DocumentType.ENERGY_LABEL: {
+        "energielabel": 3,
+        "energieprestatie": 3,
+        "energie-index": 3,
+        "energieindex": 3,
+        "ep-online": 3,
+        "nta 8800": 3,
+        "primair fossiel energiegebruik": 3,
+        "labelklasse": 2,
+        "energiebehoefte": 2,
+        "kwh": 1,
+    },
+    DocumentType.INSPECTION_REPORT: {
+        "bouwkundig rapport": 4,
+        "bouwkundige keuring": 4,
+        "bouwtechnische keuring": 4,
+        "conditiescore": 3,
+        "nen 2767": 3,
+        "herstelkosten": 3,
+        "achterstallig onderhoud": 2,
+        "gebreken": 2,
+        "inspecteur": 2,
+        "vochtmeting": 2,
+        "bouwkundig": 1,
+    },
+    DocumentType.HOA_DOCUMENTS: {
+        "splitsingsakte": 4,
+        "splitsingsreglement": 4,
+        "mjop": 4,
+        "meerjarenonderhoudsplan": 4,
+        "vereniging van eigenaren": 3,
+        "huishoudelijk reglement": 3,
+        "appartementsrecht": 3,
+        "reservefonds": 3,
+        "breukdeel": 3,
+        "ledenvergadering": 2,
+        "jaarrekening": 2,
+        "notulen": 2,
+        "vve": 2,
+    },
+    DocumentType.PROPERTY_LISTING: {
+        "vraagprijs": 3,
+        "bezichtiging": 3,
+        "brochure": 3,
+        "k.k.": 2,
+        "woonoppervlakte": 2,
+        "slaapkamers": 2,
+        "aanvaarding": 1,
+        "kenmerken": 1,
+        "makelaar": 1,
+        "perceel": 1,
+    },
+    # Other paperwork buyers commonly upload; evidence against the types above
+    DocumentType.OTHER: {
+        "hypotheekofferte": 4,
+        "taxatierapport": 4,
+        "werkgeversverklaring": 4,
+        "loonstrook": 4,
+        "rekeningoverzicht": 3,
+        "offerte": 2,
+        "hypotheek": 1,
+    },
+}
+
+_WEIGHTS = [
+    (keyword, doc_type, weight)
+    for doc_type, keywords in KEYWORDS.items()
+    for keyword, weight in keywords.items()
+]
+
+
+@dataclass
+class Classification:
+    document_type: DocumentType
+    # 0 when nothing matched; approaches 1 as one type dominates
+    confidence: float
+
+
+class KeywordDocumentClassifier:
+    """Classify Dutch real estate documents by weighted vocabulary.
+
+    Each type's score is the sum of the weights of its keywords found in the
+    first ``CLASSIFY_CHARS`` characters. Confidence is the winner's share of
+    the evidence, damped by a fixed prior so that thin evidence stays below
+    any sensible threshold. ``str.count`` per keyword is several times faster
+    than one alternation regex over the same text.
+    """
+
+    def classify(self, text: str) -> Classification:
+        head = text[:CLASSIFY_CHARS].lower()
+        scores = dict.fromkeys(KEYWORDS, 0.0)
+        for keyword, doc_type, weight in _WEIGHTS:
+            count = head.count(keyword)
+            if count:
+                scores[doc_type] += weight * min(count, MAX_HITS_PER_KEYWORD)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        (best, top), (_, second) = ranked[0], ranked[1]
+        if top == 0:
+            return Classification(DocumentType.OTHER, 0.0)
+        return Classification(best, top / (top + second + CONFIDENCE_PRIOR))
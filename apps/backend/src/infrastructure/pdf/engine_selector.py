@@ -0,0 +1,73 @@
+import unicodedata
+from dataclasses import dataclass
+
+import fitz  # PyMuPDF
+
+# A page with at least this many ruling segments almost certainly has a table grid
+MIN_RULING_LINES = 4
+
+# Share of glyphs that decode to replacement, private-use or control characters
+MAX_GARBLED_RATIO = 0.05
+
+# Key/value layouts (energy labels, listing spec sheets) come out of PyMuPDF as
+# many very short lines; pdfplumber keeps label and value on one line
+FORM_MIN_LINES = 8
+FORM_MAX_AVG_LINE_CHARS = 25
+
+
+@dataclass
+class PageProfile:
+    """Cheap per-page features computed from PyMuPDF's output."""
+
+    chars: int
+    lines: int
+    ruling_lines: int
+    garbled_ratio: float
+
+    @property
+    def avg_line_chars(self) -> float:
+        return self.chars / self.lines if self.lines else 0.0
+
+    @property
+    def needs_layout(self) -> bool:
+        """Whether the page should be re-extracted with pdfplumber."""
+        if self.chars == 0:
+            # Scanned page: neither engine can recover text without OCR
+            return False
+        if self.garbled_ratio > MAX_GARBLED_RATIO:
+            return True
+        if self.ruling_lines >= MIN_RULING_LINES:
+            return True
+        return self.lines >= FORM_MIN_LINES and self.avg_line_chars < FORM_MAX_AVG_LINE_CHARS
+
+
+def _is_garbled(ch: str) -> bool:
+    if ch == "�":
+        return True
+    category = unicodedata.category(ch)
+    return category == "Co" or (category == "Cc" and ch not in "\n\r\t")
+
+
+def _count_ruling_lines(page: fitz.Page) -> int:
+    count = 0
+    for drawing in page.get_drawings():
+        for item in drawing["items"]:
+            if item[0] == "l":
+                count += 1
+            elif item[0] == "re":
+                rect = item[1]
+                # Hairline rectangles are how many generators draw rules
+                count += 1 if min(rect.width, rect.height) <= 2 else 4
+    return count
+
+
+def profile_page(page: fitz.Page, text: str) -> PageProfile:
+    stripped = [line for line in text.splitlines() if line.strip()]
+    chars = sum(len(line) for line in stripped)
+    garbled = sum(1 for ch in text if _is_garbled(ch))
+    return PageProfile(
+        chars=chars,
+        lines=len(stripped),
+        ruling_lines=_count_ruling_lines(page) if chars else 0,
+        garbled_ratio=garbled / chars if chars else 0.0,
+    )
@@ -1,51 +1,432 @@
+import asyncio
+import hashlib
 import io
+import logging
+import math
+import multiprocessing
+import time
+from collections.abc import AsyncIterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict
+from functools import lru_cache
+from pathlib import Path
+
 import pdfplumber
 import fitz  # PyMuPDF
 import anyio
 
-class PDFExtractor:
-    """Extract text and tables from PDF files using pdfplumber (primary) and PyMuPDF (fallback)."""
-
-    async def extract_text(self, content: bytes) -> str:
-        text = await anyio.to_thread.run_sync(self._extract_with_pdfplumber, content)
-        if not text or len(text.strip()) < 50:
-            text = await anyio.to_thread.run_sync(self._extract_with_pymupdf, content)
-        return text
-
-    async def extract_tables(self, content: bytes) -> list[list[list[str]]]:
-        return await anyio.to_thread.run_sync(self._extract_tables_pdfplumber, content)
-
-    def _extract_with_pdfplumber(self, content: bytes) -> str:
-        try:
-            with pdfplumber.open(io.BytesIO(content)) as pdf:
-                pages = []
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        pages.append(text)
-                return "\n\n".join(pages)
-        except Exception:
-            return ""
+from src.config import settings
+from src.infrastructure.cache.disk_cache import DiskCache
+from src.infrastructure.pdf.engine_selector import profile_page
+from src.infrastructure.pdf.sandbox import BudgetExceededError, SandboxPool
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever extraction output changes so stale cache entries are ignored
+EXTRACTOR_VERSION = "3"
+
+# A PDF given either as an in-memory buffer or as a path on local disk.
+# Paths are preferred: pages are read on demand instead of holding the file.
+PDFSource = bytes | Path
+
+
+@dataclass
+class ExtractedPage:
+    page_number: int
+    text: str
+    tables: list[list[list[str]]] = field(default_factory=list)
+    engine: str = "pymupdf"
+    content_hash: str | None = None
+
+
+@dataclass
+class EngineStats:
+    """Per-engine page counts and wall-clock seconds."""
+
+    pages: dict[str, int] = field(default_factory=dict)
+    seconds: dict[str, float] = field(default_factory=dict)
+    errors: int = 0
+    truncated: int = 0
+
+    def record(self, engine: str, pages: int, seconds: float) -> None:
+        self.pages[engine] = self.pages.get(engine, 0) + pages
+        self.seconds[engine] = self.seconds.get(engine, 0.0) + seconds
+
+    def merge(self, other: "EngineStats") -> None:
+        for engine, pages in other.pages.items():
+            self.record(engine, pages, other.seconds.get(engine, 0.0))
+        self.errors += other.errors
+        self.truncated += other.truncated
+
+
+# Cumulative for this process; used to tune the engine selection heuristics
+_engine_stats = EngineStats()
+
+
+def engine_stats() -> dict:
+    return asdict(_engine_stats)
+
+
+@lru_cache
+def get_extraction_cache() -> DiskCache | None:
+    """Process-wide extraction cache, shared by all sessions."""
+    if settings.extraction_cache_max_mb <= 0:
+        return None
+    return DiskCache(
+        settings.cache_path / "extraction",
+        settings.extraction_cache_max_mb * 1024 * 1024,
+        ttl_seconds=settings.extraction_cache_ttl_hours * 3600,
+    )
+
+
+@lru_cache
+def get_process_pool() -> ProcessPoolExecutor:
+    """Process-wide pool for page-parallel extraction, created on first use."""
+    return ProcessPoolExecutor(
+        max_workers=settings.pdf_process_pool_size,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def shutdown_process_pool() -> None:
+    if get_process_pool.cache_info().currsize:
+        get_process_pool().shutdown(cancel_futures=True)
+        get_process_pool.cache_clear()
+
+
+def _hash_source(source: PDFSource) -> str:
+    if isinstance(source, bytes):
+        return hashlib.sha256(source).hexdigest()
+    digest = hashlib.sha256()
+    with open(source, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _open_fitz(source: PDFSource) -> fitz.Document:
+    if isinstance(source, bytes):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(str(source))
+
+
+def page_content_hash(page: fitz.Page) -> str:
+    """Hash of what determines a page's text: content stream, fonts and geometry."""
+    digest = hashlib.sha256(page.read_contents())
+    digest.update(repr((tuple(page.rect), page.rotation, page.get_fonts())).encode())
+    return digest.hexdigest()
+
+
+def page_cache_key(content_hash: str) -> str:
+    return f"page-{content_hash}-v{EXTRACTOR_VERSION}"
+
+
+def _count_pages(source: PDFSource) -> int:
+    doc = _open_fitz(source)
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
+
+
+class _PageReader:
+    """Reads one page at a time, releasing parser state after each page.
+
+    Every page goes through PyMuPDF first; only pages whose profile asks for
+    layout-aware parsing (tables, forms, garbled glyphs) are re-extracted with
+    pdfplumber, which is opened lazily on the first such page. With a page
+    cache, pages whose content hash was seen before (e.g. the unchanged pages
+    of a revised contract) are not extracted again.
+    """
+
+    def __init__(self, source: PDFSource, page_cache: DiskCache | None = None):
+        self._source = source
+        self._doc = _open_fitz(source)
+        self._plumber = None
+        self._page_cache = page_cache
+        self.stats = EngineStats()
+
+    @property
+    def page_count(self) -> int:
+        return self._doc.page_count
 
-    def _extract_with_pymupdf(self, content: bytes) -> str:
+    def read(self, index: int) -> ExtractedPage:
+        started = time.perf_counter()
         try:
-            doc = fitz.open(stream=content, filetype="pdf")
-            pages = []
-            for page in doc:
-                pages.append(page.get_text())
-            doc.close()
-            return "\n\n".join(pages)
+            page = self._doc[index]
+            content_hash = page_content_hash(page)
         except Exception:
-            return ""
+            self.stats.errors += 1
+            return ExtractedPage(page_number=index + 1, text="")
 
-    def _extract_tables_pdfplumber(self, content: bytes) -> list[list[list[str]]]:
-        tables = []
+        if self._page_cache is not None:
+            cached = self._page_cache.get(page_cache_key(content_hash))
+            if cached is not None:
+                self.stats.record("cache", 1, time.perf_counter() - started)
+                return ExtractedPage(**{**cached, "page_number": index + 1})
+
+        errors = self.stats.errors
         try:
-            with pdfplumber.open(io.BytesIO(content)) as pdf:
-                for page in pdf.pages:
-                    page_tables = page.extract_tables()
-                    if page_tables:
-                        tables.extend(page_tables)
+            text = page.get_text()
+            needs_layout = profile_page(page, text).needs_layout
         except Exception:
-            pass
-        return tables
+            self.stats.errors += 1
+            return ExtractedPage(page_number=index + 1, text="", content_hash=content_hash)
+        result = ExtractedPage(page_number=index + 1, text=text, content_hash=content_hash)
+        self.stats.record("pymupdf", 1, time.perf_counter() - started)
+
+        if needs_layout:
+            started = time.perf_counter()
+            try:
+                self._read_layout(index, result)
+            except Exception:
+                self.stats.errors += 1
+            self.stats.record("pdfplumber", 1, time.perf_counter() - started)
+
+        if self._page_cache is not None and self.stats.errors == errors:
+            self._page_cache.put(page_cache_key(content_hash), asdict(result))
+        return result
+
+    def _read_layout(self, index: int, result: ExtractedPage) -> None:
+        if self._plumber is None:
+            source = self._source
+            self._plumber = pdfplumber.open(
+                io.BytesIO(source) if isinstance(source, bytes) else source
+            )
+        page = self._plumber.pages[index]
+        try:
+            text = page.extract_text() or ""
+            if text.strip():
+                result.text = text
+                result.engine = "pdfplumber"
+            result.tables = page.extract_tables() or []
+        finally:
+            page.close()
+
+    def close(self) -> None:
+        self._doc.close()
+        if self._plumber is not None:
+            self._plumber.close()
+
+
+def _extract_page_range(
+    source: PDFSource,
+    start: int = 0,
+    stop: int | None = None,
+    page_cache: DiskCache | None = None,
+) -> tuple[list[ExtractedPage], EngineStats]:
+    """Extract pages ``start``..``stop`` (0-based, exclusive).
+
+    Module-level so it can be pickled into process pool workers.
+    """
+    reader = _PageReader(source, page_cache)
+    try:
+        stop = reader.page_count if stop is None else min(stop, reader.page_count)
+        return [reader.read(index) for index in range(start, stop)], reader.stats
+    finally:
+        reader.close()
+
+
+class PDFExtractor:
+    """Extract text and tables from PDF files, choosing PyMuPDF or pdfplumber per page.
+
+    ``iter_pages`` streams page records in order so callers never need the
+    whole document in memory; pass a ``Path`` to avoid loading the file at all.
+    Results are cached by the SHA-256 of the PDF bytes, so re-uploads of the
+    same file skip extraction entirely, and per page by content hash, so a
+    revised document only extracts the pages that changed. Documents of at least
+    ``parallel_threshold`` pages are split into page ranges and extracted on
+    the process pool, since pdfplumber holds the GIL for its whole run.
+    With a ``sandbox`` pool, parsing runs in supervised subprocesses under a
+    time, page and memory budget instead, and overruns yield partial results.
+    """
+
+    def __init__(
+        self,
+        cache: DiskCache | None = None,
+        parallel: bool = False,
+        parallel_threshold: int | None = None,
+        sandbox: SandboxPool | None = None,
+    ):
+        self._cache = cache
+        self._sandbox = sandbox
+        self._parallel = parallel and settings.pdf_process_pool_size > 1
+        self._parallel_threshold = (
+            parallel_threshold
+            if parallel_threshold is not None
+            else settings.pdf_parallel_page_threshold
+        )
+
+    async def extract_text(self, source: PDFSource) -> str:
+        return "\n\n".join([page.text async for page in self.iter_pages(source) if page.text])
+
+    async def extract_pages(self, source: PDFSource) -> list[ExtractedPage]:
+        return [page async for page in self.iter_pages(source)]
+
+    async def extract_tables(self, source: PDFSource) -> list[list[list[str]]]:
+        return [table async for page in self.iter_pages(source) for table in page.tables]
+
+    async def iter_pages(self, source: PDFSource) -> AsyncIterator[ExtractedPage]:
+        if self._cache is None:
+            async for page in self._iter_extracted(source, EngineStats()):
+                yield page
+            return
+
+        key = await anyio.to_thread.run_sync(self.cache_key, source)
+        cached = await anyio.to_thread.run_sync(self._cache.get, key)
+        if cached is not None:
+            for page in cached["pages"]:
+                yield ExtractedPage(**page)
+            return
+
+        # Page text is small next to the parser state, so keep it for the cache
+        stats, collected = EngineStats(), []
+        async for page in self._iter_extracted(source, stats):
+            collected.append(asdict(page))
+            yield page
+        if stats.errors == 0 and stats.truncated == 0:
+            await anyio.to_thread.run_sync(self._cache.put, key, {"pages": collected})
+
+    @staticmethod
+    def cache_key(source: PDFSource) -> str:
+        return f"{_hash_source(source)}-v{EXTRACTOR_VERSION}"
+
+    async def _iter_extracted(
+        self, source: PDFSource, stats: EngineStats
+    ) -> AsyncIterator[ExtractedPage]:
+        if self._sandbox is not None:
+            try:
+                async for page in self._iter_sandboxed(source, stats):
+                    yield page
+            finally:
+                self._record(stats)
+            return
+
+        try:
+            reader = await anyio.to_thread.run_sync(_PageReader, source, self._cache)
+        except Exception as e:
+            logger.warning(f"Could not open PDF: {e}")
+            stats.errors += 1
+            return
+
+        try:
+            if self._parallel and reader.page_count >= self._parallel_threshold:
+                await anyio.to_thread.run_sync(reader.close)
+                reader = None
+                async for page in self._iter_parallel(source, stats):
+                    yield page
+            else:
+                for index in range(reader.page_count):
+                    yield await anyio.to_thread.run_sync(reader.read, index)
+                stats.merge(reader.stats)
+        finally:
+            if reader is not None:
+                await anyio.to_thread.run_sync(reader.close)
+            self._record(stats)
+
+    async def _iter_parallel(
+        self, source: PDFSource, stats: EngineStats
+    ) -> AsyncIterator[ExtractedPage]:
+        page_count = await anyio.to_thread.run_sync(_count_pages, source)
+        # Twice as many ranges as workers evens out pages of uneven cost
+        range_size = math.ceil(page_count / (settings.pdf_process_pool_size * 2))
+        loop = asyncio.get_running_loop()
+        futures = [
+            loop.run_in_executor(
+                get_process_pool(),
+                _extract_page_range,
+                source,
+                start,
+                min(start + range_size, page_count),
+                self._cache,
+            )
+            for start in range(0, page_count, range_size)
+        ]
+        try:
+            for future in futures:
+                try:
+                    pages, range_stats = await future
+                except Exception as e:
+                    logger.warning(f"Page range extraction failed: {e}")
+                    stats.errors += 1
+                    continue
+                stats.merge(range_stats)
+                for page in pages:
+                    yield page
+        finally:
+            for future in futures:
+                future.cancel()
+
+    async def _iter_sandboxed(
+        self, source: PDFSource, stats: EngineStats
+    ) -> AsyncIterator[ExtractedPage]:
+        budget = self._sandbox.budget
+        deadline = time.monotonic() + budget.timeout_s
+
+        page_count = 0
+        if self._parallel:
+            try:
+                page_count = await self._sandbox.count_pages(source, deadline)
+            except Exception:
+                page_count = 0
+        if page_count < self._parallel_threshold:
+            async for page in self._iter_sandbox_range(source, 0, None, deadline, stats):
+                yield page
+            return
+
+        if page_count > budget.max_pages:
+            logger.warning(f"PDF has {page_count} pages; extracting the first {budget.max_pages}")
+            stats.truncated += 1
+            page_count = budget.max_pages
+        range_size = math.ceil(page_count / (settings.pdf_process_pool_size * 2))
+
+        async def collect(start: int, stop: int) -> list[ExtractedPage]:
+            return [
+                page
+                async for page in self._iter_sandbox_range(source, start, stop, deadline, stats)
+            ]
+
+        tasks = [
+            asyncio.create_task(collect(start, min(start + range_size, page_count)))
+            for start in range(0, page_count, range_size)
+        ]
+        try:
+            for task in tasks:
+                for page in await task:
+                    yield page
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _iter_sandbox_range(
+        self,
+        source: PDFSource,
+        start: int,
+        stop: int | None,
+        deadline: float,
+        stats: EngineStats,
+    ) -> AsyncIterator[ExtractedPage]:
+        try:
+            async for kind, payload in self._sandbox.iter_pages(
+                source, start, stop, deadline, page_cache=self._cache
+            ):
+                if kind == "page":
+                    yield ExtractedPage(**payload)
+                else:
+                    stats.merge(EngineStats(**payload))
+        except BudgetExceededError as e:
+            logger.warning(f"Extraction stopped early ({e.reason}); keeping partial pages")
+            stats.truncated += 1
+        except Exception as e:
+            logger.warning(f"Sandboxed extraction failed: {e}")
+            stats.errors += 1
+
+    @staticmethod
+    def _record(stats: EngineStats) -> None:
+        _engine_stats.merge(stats)
+        logger.info(
+            f"Extracted {stats.pages.get('pymupdf', 0)} pages "
+            f"(pymupdf {stats.seconds.get('pymupdf', 0.0):.2f}s, "
+            f"pdfplumber {stats.pages.get('pdfplumber', 0)} pages "
+            f"{stats.seconds.get('pdfplumber', 0.0):.2f}s)"
+        )
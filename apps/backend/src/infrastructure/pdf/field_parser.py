@@ -0,0 +1,183 @@
+import re
+from dataclasses import dataclass, field
+
+# Fields that, when all found with high confidence, make the AI extraction call unnecessary
+REQUIRED_FIELDS = (
+    "address",
+    "postal_code",
+    "square_meters",
+    "year_built",
+    "energy_label",
+    "asking_price",
+)
+
+# Values read from a labelled table row or "Label: value" line
+LABELLED_CONFIDENCE = 0.95
+# Values found in running text without an explicit label
+UNLABELLED_CONFIDENCE = 0.7
+# Downgrade when the document states more than one distinct value
+CONFLICT_CONFIDENCE = 0.4
+
+_SEP = r"\s*[:\-]?\s*"
+_AMOUNT = r"€?\s*(\d{1,3}(?:\.\d{3})+|\d+)(?:,(\d{2}|-))?"
+
+_LABELLED_PATTERNS: dict[str, re.Pattern] = {
+    "energy_label": re.compile(
+        rf"\b(?:energielabel|energieklasse|labelklasse){_SEP}(A\+{{0,4}}|[A-G])(?![\w+])",
+        re.IGNORECASE,
+    ),
+    "square_meters": re.compile(
+        rf"\b(?:woonoppervlakte|gebruiksoppervlakte wonen|woonoppervlak){_SEP}"
+        r"(?:ca\.?\s*)?(\d{2,4}(?:,\d+)?)\s*(?:m²|m2|vierkante meter)",
+        re.IGNORECASE,
+    ),
+    "year_built": re.compile(
+        rf"\bbouwjaar{_SEP}(?:ca\.?\s*|omstreeks\s*)?(1[4-9]\d{{2}}|20\d{{2}})\b",
+        re.IGNORECASE,
+    ),
+    "asking_price": re.compile(
+        rf"\bvraagprijs{_SEP}{_AMOUNT}", re.IGNORECASE
+    ),
+    "hoa_monthly_cost": re.compile(
+        rf"\b(?:vve[- ]?bijdrage|bijdrage vve|servicekosten){_SEP}{_AMOUNT}"
+        r"\s*(?:per maand|p/m|p\.m\.|/\s*maand|per mnd|/\s*mnd)",
+        re.IGNORECASE,
+    ),
+    "num_rooms": re.compile(rf"\baantal kamers{_SEP}(\d{{1,2}})\b", re.IGNORECASE),
+    # Label in any case, letters upper case only: "1015 cj" is rarely a postcode
+    "postal_code": re.compile(rf"\b(?i:postcode){_SEP}(\d{{4}})\s?([A-Z]{{2}})\b"),
+}
+
+_STREET = (
+    r"(?:straat|gracht|laan|weg|plein|kade|singel|dijk|hof|steeg|pad|dreef|park|"
+    r"markt|plantsoen|wal|erf|baan|dam)"
+)
+# "Keizersgracht 123-2, 1015 CJ Amsterdam"
+_ADDRESS_LINE = re.compile(
+    rf"\b((?:[A-Z][a-zà-ÿ'\-]* )*[A-Z][a-zà-ÿ'\-]*{_STREET})"
+    r" +(\d{1,5}(?:[- ]\d{1,4}\b)?(?: ?(?:hg|huis|[A-Za-z])\b)?)[ \t]*,?\s*"
+    r"(\d{4}) ?([A-Z]{2})\b(?:[ \t]+([A-Z][a-zà-ÿ'\-]+(?: [A-Z][a-zà-ÿ'\-]+)?))?"
+)
+# Labels that name the property itself. Other addresses (notary, agent,
+# parties) are common in contracts, so only an address on a line with one of
+# these, or right below it, counts as labelled.
+_OBJECT_LABEL = re.compile(
+    r"\b(?:adres|objectadres|object|het verkochte|te koop|plaatselijk bekend)\b", re.IGNORECASE
+)
+_ROOMS_INLINE = re.compile(r"\b(\d{1,2})\s*kamers\b", re.IGNORECASE)
+
+
+@dataclass
+class ParsedFields:
+    values: dict = field(default_factory=dict)
+    confidence: dict[str, float] = field(default_factory=dict)
+
+    def confident(self, threshold: float) -> dict:
+        return {k: v for k, v in self.values.items() if self.confidence.get(k, 0.0) >= threshold}
+
+    def missing(self, threshold: float, required=REQUIRED_FIELDS) -> list[str]:
+        confident = self.confident(threshold)
+        return [name for name in required if name not in confident]
+
+    def merge(self, other: "ParsedFields") -> None:
+        """Keep the higher-confidence value per field."""
+        for name, value in other.values.items():
+            if other.confidence.get(name, 0.0) > self.confidence.get(name, 0.0):
+                self.values[name] = value
+                self.confidence[name] = other.confidence[name]
+
+    def to_dict(self) -> dict:
+        return {"values": self.values, "confidence": self.confidence}
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> "ParsedFields":
+        if not data:
+            return cls()
+        return cls(dict(data.get("values", {})), dict(data.get("confidence", {})))
+
+
+def _to_amount(whole: str, cents: str | None) -> float:
+    value = float(whole.replace(".", ""))
+    if cents and cents != "-":
+        value += int(cents) / 100
+    return value
+
+
+def _convert(name: str, match: re.Match):
+    if name == "energy_label":
+        return match.group(1).upper()
+    if name == "square_meters":
+        return float(match.group(1).replace(",", "."))
+    if name in ("year_built", "num_rooms"):
+        return int(match.group(1))
+    if name in ("asking_price", "hoa_monthly_cost"):
+        return _to_amount(match.group(1), match.group(2))
+    if name == "postal_code":
+        return f"{match.group(1)} {match.group(2)}"
+    return match.group(0)
+
+
+def _has_object_label(corpus: str, position: int) -> bool:
+    """Whether the text before ``position`` on its line, or the line above
+    when it starts the line, names the property."""
+    line_start = corpus.rfind("\n", 0, position) + 1
+    before = corpus[line_start:position]
+    if not before.strip() and line_start > 0:
+        before = corpus[corpus.rfind("\n", 0, line_start - 1) + 1 : line_start]
+    return bool(_OBJECT_LABEL.search(before))
+
+
+class StructuredFieldParser:
+    """Read property fields from the key/value layout of Dutch listing documents.
+
+    EP-Online energy labels and funda/makelaar brochures put most of the
+    fields we need in "Label: value" lines or two-column tables, so a handful
+    of anchored patterns recover them without a model call. Table rows are
+    flattened into "label: value" lines and parsed with the same patterns.
+    """
+
+    def parse(self, text: str, tables: list[list[list[str]]] | None = None) -> ParsedFields:
+        lines = [
+            ": ".join(cell.strip() for cell in row if cell)
+            for table in tables or []
+            for row in table
+            if row
+        ]
+        corpus = "\n".join(lines) + "\n" + text
+
+        result = ParsedFields()
+        for name, pattern in _LABELLED_PATTERNS.items():
+            values = []
+            for match in pattern.finditer(corpus):
+                try:
+                    values.append(_convert(name, match))
+                except ValueError:
+                    continue
+            if values:
+                result.values[name] = values[0]
+                distinct = len(set(values)) > 1
+                result.confidence[name] = CONFLICT_CONFIDENCE if distinct else LABELLED_CONFIDENCE
+
+        addresses = list(_ADDRESS_LINE.finditer(corpus))
+        labelled = [a for a in addresses if _has_object_label(corpus, a.start())]
+        address = (labelled or addresses or [None])[0]
+        if address:
+            # An unlabelled address may be anyone's; the AI's reading wins
+            confidence = LABELLED_CONFIDENCE if labelled else UNLABELLED_CONFIDENCE
+            result.values["address"] = f"{address.group(1)} {address.group(2).strip()}"
+            result.confidence["address"] = confidence
+            postal_code = f"{address.group(3)} {address.group(4)}"
+            if "postal_code" not in result.values:
+                result.values["postal_code"] = postal_code
+                result.confidence["postal_code"] = confidence
+            if address.group(5):
+                result.values["city"] = address.group(5)
+                result.confidence["city"] = UNLABELLED_CONFIDENCE
+
+        if "num_rooms" not in result.values:
+            rooms = _ROOMS_INLINE.search(corpus)
+            if rooms:
+                result.values["num_rooms"] = int(rooms.group(1))
+                result.confidence["num_rooms"] = UNLABELLED_CONFIDENCE
+
+        return result
@@ -1,23 +1,126 @@
 import re
+from dataclasses import dataclass, field
+from typing import ClassVar
+
+
+@dataclass
+class PIISpan:
+    kind: str
+    start: int
+    end: int
+
+
+@dataclass
+class RedactionResult:
+    text: str
+    # Offsets refer to the original, unredacted text
+    spans: list[PIISpan] = field(default_factory=list)
+
+
+# Pattern bodies; every PII class starts at a word boundary
+_BSN = r'\d{3}[.\-]?\d{3}[.\-]?\d{3}\b'
+_PHONE = r'(?:0|\+31[\s-]?)(?:[1-9]\d{1,2}[\s-]?\d{6,7}|\d{2}[\s-]?\d{7})\b'
+# Possessive: '@' is not in the local-part class, so backtracking never helps
+_EMAIL = r'[A-Za-z0-9._%+-]++@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+_IBAN = r'[A-Z]{2}\d{2}[\s]?[A-Z]{4}[\s]?\d{4}[\s]?\d{4}[\s]?\d{2,4}\b'
+
 
 class PIIPreprocessor:
     """Redact PII from text before sending to external AI services."""
 
     # Dutch BSN pattern (9 digits, often with dots or dashes)
-    BSN_PATTERN = re.compile(r'\b\d{3}[.\-]?\d{3}[.\-]?\d{3}\b')
+    BSN_PATTERN = re.compile(r'\b' + _BSN)
 
     # Dutch phone numbers
-    PHONE_PATTERN = re.compile(r'\b(?:0|\+31[\s-]?)(?:[1-9]\d{1,2}[\s-]?\d{6,7}|\d{2}[\s-]?\d{7})\b')
+    PHONE_PATTERN = re.compile(r'\b' + _PHONE)
 
     # Email addresses
-    EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+    EMAIL_PATTERN = re.compile(r'\b' + _EMAIL)
 
     # IBAN numbers
-    IBAN_PATTERN = re.compile(r'\b[A-Z]{2}\d{2}[\s]?[A-Z]{4}[\s]?\d{4}[\s]?\d{4}[\s]?\d{2,4}\b')
+    IBAN_PATTERN = re.compile(r'\b' + _IBAN)
+
+    REPLACEMENTS: ClassVar[dict[str, str]] = {
+        "BSN": "[BSN_REDACTED]",
+        "PHONE": "[PHONE_REDACTED]",
+        "EMAIL": "[EMAIL_REDACTED]",
+        "IBAN": "[IBAN_REDACTED]",
+    }
+
+    # All classes in one alternation so the text is scanned once. The shared
+    # word boundary is factored out, so positions inside words are rejected
+    # with a single check instead of four. Alternatives keep the old pass
+    # order, which decides ties at a position.
+    PII_PATTERN = re.compile(
+        rf'\b(?:(?P<BSN>{_BSN})|(?P<PHONE>{_PHONE})|(?P<EMAIL>{_EMAIL})|(?P<IBAN>{_IBAN}))'
+    )
+
+    # Classes whose pass ran before each class's pass. Where one of them
+    # starts inside a match, the alternation takes the leftmost match while
+    # the passes took the earlier class: "jan.123456789@x.nl" redacts to
+    # "jan.[BSN_REDACTED]@x.nl". Such text is redacted in passes instead.
+    EARLIER_PATTERNS: ClassVar[dict[str, re.Pattern]] = {
+        "PHONE": re.compile(rf'\b{_BSN}'),
+        "EMAIL": re.compile(rf'\b(?:{_BSN}|{_PHONE})'),
+        "IBAN": re.compile(rf'\b(?:{_BSN}|{_PHONE}|{_EMAIL})'),
+    }
 
     def redact(self, text: str) -> str:
-        text = self.BSN_PATTERN.sub('[BSN_REDACTED]', text)
-        text = self.PHONE_PATTERN.sub('[PHONE_REDACTED]', text)
-        text = self.EMAIL_PATTERN.sub('[EMAIL_REDACTED]', text)
-        text = self.IBAN_PATTERN.sub('[IBAN_REDACTED]', text)
-        return text
+        last_end, overlapping = -1, False
+
+        def replacement(match: re.Match) -> str:
+            nonlocal last_end, overlapping
+            overlapping = overlapping or self._overlaps(text, match, last_end)
+            last_end = match.end()
+            return self.REPLACEMENTS[match.lastgroup]
+
+        redacted = self.PII_PATTERN.sub(replacement, text)
+        return self._redact_in_passes(text).text if overlapping else redacted
+
+    def redact_with_spans(self, text: str) -> RedactionResult:
+        spans = []
+        for match in self.PII_PATTERN.finditer(text):
+            if self._overlaps(text, match, spans[-1].end if spans else -1):
+                return self._redact_in_passes(text)
+            spans.append(PIISpan(match.lastgroup, *match.span()))
+        return RedactionResult(self._render(text, spans), spans)
+
+    def _overlaps(self, text: str, match: re.Match, last_end: int) -> bool:
+        """Whether the passes could have redacted the match differently."""
+        start, end = match.span()
+        # Right after a replacement the passes saw its bracket, not a word
+        # character, so the word boundary the match starts at was not there
+        if start == last_end:
+            return True
+        earlier = self.EARLIER_PATTERNS.get(match.lastgroup)
+        return earlier is not None and any(
+            earlier.match(text, position) for position in range(start + 1, end)
+        )
+
+    def _redact_in_passes(self, text: str) -> RedactionResult:
+        """One pass per class in precedence order, each over the previous output."""
+        spans: list[PIISpan] = []
+        for kind in self.REPLACEMENTS:
+            pattern = getattr(self, f"{kind}_PATTERN")
+            found = []
+            for match in pattern.finditer(self._render(text, spans)):
+                start, end = match.span()
+                # Map back past the replacements left of the match; none of
+                # the patterns matches their brackets, so none overlaps it
+                shift = 0
+                for span in spans:
+                    if span.start + shift >= start:
+                        break
+                    shift += len(self.REPLACEMENTS[span.kind]) - (span.end - span.start)
+                found.append(PIISpan(kind, start - shift, end - shift))
+            spans = sorted(spans + found, key=lambda span: span.start)
+        return RedactionResult(self._render(text, spans), spans)
+
+    def _render(self, text: str, spans: list[PIISpan]) -> str:
+        parts, last = [], 0
+        for span in spans:
+            parts.append(text[last:span.start])
+            parts.append(self.REPLACEMENTS[span.kind])
+            last = span.end
+        parts.append(text[last:])
+        return "".join(parts)
@@ -0,0 +1,191 @@
+from dataclasses import dataclass
+
+from src.infrastructure.pdf.corpus import PAGE_SEPARATOR, RedactedCorpus, RedactedText
+
+# Pages longer than this are ranked in parts, cut at sections and lines
+PASSAGE_CHARS = 1200
+# Marks where unselected passages were left out
+GAP_MARKER = "[...]"
+
+# Term weights per AI task. Terms that point at the facts a task is after weigh
+# 3-4; supporting vocabulary 1-2. Terms are matched as lowercase substrings, so
+# "fundering" also counts "funderingsonderzoek" and "paalfundering". Each term
+# counts once per passage: one naming several relevant things beats one that
+# keeps repeating a word.
+LEXICONS: dict[str, dict[str, float]] = {
+    "risks": {
+        "fundering": 4,
+        "paalrot": 4,
+        "verzakking": 4,
+        "asbest": 4,
+        "betonrot": 4,
+        "bodemverontreiniging": 4,
+        "erfpacht": 4,
+        "bijzondere bijdrage": 4,
+        "gebrek": 3,
+        "achterstallig onderhoud": 3,
+        "herstelkosten": 3,
+        "lekkage": 3,
+        "scheur": 3,
+        "erfdienstbaarheid": 3,
+        "canon": 3,
+        "reservefonds": 3,
+        "mjop": 3,
+        "meerjarenonderhoud": 3,
+        "ouderdomsclausule": 3,
+        "vocht": 2,
+        "conditiescore": 2,
+        "bestemmingsplan": 2,
+        "monument": 2,
+        "tekort": 2,
+        "boete": 2,
+        "risico": 2,
+        "vervangen": 1,
+        "onderhoud": 1,
+        "kosten": 1,
+    },
+    "property": {
+        "vraagprijs": 4,
+        "koopsom": 4,
+        "woonoppervlakte": 4,
+        "bouwjaar": 4,
+        "energielabel": 3,
+        "labelklasse": 3,
+        "servicekosten": 3,
+        "bijdrage vve": 3,
+        "gebruiksoppervlakte": 3,
+        "postcode": 2,
+        "kamers": 2,
+        "tuin": 2,
+        "parkeer": 2,
+        "garage": 2,
+        "soort woning": 2,
+        "appartement": 1,
+        "woonhuis": 1,
+        "perceel": 1,
+        "m²": 1,
+    },
+    "strengths": {
+        "ligging": 3,
+        "gerenoveerd": 3,
+        "vernieuwd": 3,
+        "zonnepanelen": 3,
+        "dakterras": 3,
+        "achterstallig onderhoud": 3,
+        "gebrek": 3,
+        "tuin": 2,
+        "balkon": 2,
+        "isolatie": 2,
+        "energielabel": 2,
+        "parkeer": 2,
+        "berging": 2,
+        "openbaar vervoer": 2,
+        "geluid": 2,
+        "fundering": 2,
+        "onderhoud": 1,
+        "licht": 1,
+        "ruim": 1,
+        "woonoppervlakte": 1,
+    },
+}
+
+# Boilerplate that rarely holds findings: tables of contents, party details,
+# signature blocks and disclaimers
+BOILERPLATE: dict[str, float] = {
+    "inhoudsopgave": 3,
+    "ondergetekenden": 3,
+    "handtekening": 2,
+    "paraaf": 2,
+    "getekend te": 2,
+    "aansprakelijkheid": 1,
+    "disclaimer": 2,
+}
+
+
+@dataclass
+class Passage:
+    document: int
+    # Position within the document, to restore reading order
+    index: int
+    text: str
+    score: float = 0.0
+
+
+class RelevanceRanker:
+    """Picks the passages of a corpus that matter most for an AI task.
+
+    Passages (pages, or parts of long pages) are scored by the weights of the
+    lexicon terms they contain minus those of boilerplate terms, then taken best first while they fit the
+    character budget. Passages without any relevant term are left out even
+    if there is room, so prompts shrink; only when nothing scores does the
+    selection fall back to the start of the corpus, like plain truncation.
+    The selection is returned in reading order, under each document's
+    header, with a gap marker where passages were left out.
+    """
+
+    def __init__(
+        self,
+        lexicons: dict[str, dict[str, float]] | None = None,
+        passage_chars: int = PASSAGE_CHARS,
+    ):
+        self._lexicons = lexicons or LEXICONS
+        self._passage_chars = passage_chars
+
+    def score(self, text: str, task: str) -> float:
+        lowered = text.lower()
+        score = sum(weight for term, weight in self._lexicons[task].items() if term in lowered)
+        return score - sum(weight for term, weight in BOILERPLATE.items() if term in lowered)
+
+    def passages(self, corpus: RedactedCorpus, max_chars: int | None = None) -> list[Passage]:
+        passages = []
+        for document in range(len(corpus.entries)):
+            pieces = corpus.pieces(document, max_chars or self._passage_chars)
+            passages.extend(Passage(document, index, piece) for index, piece in enumerate(pieces))
+        return passages
+
+    def select(self, corpus: RedactedCorpus, task: str, budget: int) -> RedactedText:
+        """The most relevant passages for ``task`` in at most ``budget`` characters."""
+        if len(corpus) <= budget:
+            return corpus.text
+        # Small budgets get small passages, so the best one always fits
+        longest_header = max(len(self._header(corpus, i)) for i in range(len(corpus.entries)))
+        overhead = longest_header + len(GAP_MARKER) + 2 * len(PAGE_SEPARATOR)
+        passages = self.passages(corpus, max(min(self._passage_chars, budget - overhead), 1))
+        for passage in passages:
+            passage.score = self.score(passage.text, task)
+
+        relevant = [p for p in passages if p.score > 0]
+        # Best first; among equals the earlier passage, where titles and summaries live
+        ranked = sorted(relevant, key=lambda p: -p.score) if relevant else passages
+        chosen: list[Passage] = []
+        headers: set[int] = set()
+        used = 0
+        for passage in ranked:
+            # Room for a gap marker before the passage as well
+            cost = len(passage.text) + len(GAP_MARKER) + 2 * len(PAGE_SEPARATOR)
+            if passage.document not in headers:
+                cost += len(self._header(corpus, passage.document))
+            if used + cost > budget:
+                continue
+            chosen.append(passage)
+            headers.add(passage.document)
+            used += cost
+        return RedactedText(self._assemble(corpus, chosen).strip("\n"))
+
+    def _assemble(self, corpus: RedactedCorpus, chosen: list[Passage]) -> str:
+        parts: list[str] = []
+        previous: Passage | None = None
+        for passage in sorted(chosen, key=lambda p: (p.document, p.index)):
+            if previous is None or passage.document != previous.document:
+                parts.append(self._header(corpus, passage.document))
+                if passage.index > 0:
+                    parts.append(GAP_MARKER + PAGE_SEPARATOR)
+            elif passage.index > previous.index + 1:
+                parts.append(GAP_MARKER + PAGE_SEPARATOR)
+            parts.append(passage.text + PAGE_SEPARATOR)
+            previous = passage
+        return "".join(parts)
+
+    @staticmethod
+    def _header(corpus: RedactedCorpus, document: int) -> str:
+        return f"--- {corpus.entries[document].label} ---\n"
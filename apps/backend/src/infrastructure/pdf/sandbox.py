@@ -0,0 +1,280 @@
+import asyncio
+import contextlib
+import logging
+import multiprocessing
+import os
+import time
+from collections.abc import AsyncIterator
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import anyio
+
+from src.config import settings
+from src.infrastructure.cache.disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+# How often the supervisor checks the clock and the worker's memory
+POLL_INTERVAL_S = 0.1
+
+
+@dataclass
+class ExtractionBudget:
+    timeout_s: float
+    max_pages: int
+    max_rss_mb: int
+
+    @classmethod
+    def from_settings(cls) -> "ExtractionBudget":
+        return cls(
+            timeout_s=settings.pdf_worker_timeout_seconds,
+            max_pages=settings.pdf_worker_max_pages,
+            max_rss_mb=settings.pdf_worker_max_rss_mb,
+        )
+
+
+@dataclass
+class WorkerMetrics:
+    spawned: int = 0
+    jobs_completed: int = 0
+    jobs_failed: int = 0
+    killed_timeout: int = 0
+    killed_memory: int = 0
+    crashed: int = 0
+    page_limit_hits: int = 0
+
+
+_metrics = WorkerMetrics()
+
+
+def worker_metrics() -> dict:
+    pool = get_sandbox_pool() if get_sandbox_pool.cache_info().currsize else None
+    return {
+        **asdict(_metrics),
+        "alive": pool.alive if pool else 0,
+        "busy": pool.busy if pool else 0,
+    }
+
+
+def _worker_main(conn) -> None:
+    """Worker loop: extract page ranges and stream each page back as it completes.
+
+    A ``count`` job only reports the page count, so the API process never
+    parses a PDF itself.
+    """
+    from src.infrastructure.pdf.extractor import _count_pages, _PageReader
+
+    while True:
+        job = conn.recv()
+        if job is None:
+            return
+        op, source, *args = job
+        if op == "count":
+            try:
+                conn.send(("count", _count_pages(source)))
+            except Exception as e:
+                conn.send(("error", str(e)))
+            continue
+        start, stop, max_pages, page_cache = args
+        reader = None
+        try:
+            reader = _PageReader(source, page_cache)
+            stop = reader.page_count if stop is None else min(stop, reader.page_count)
+            limited = stop - start > max_pages
+            for index in range(start, min(stop, start + max_pages)):
+                conn.send(("page", asdict(reader.read(index))))
+            conn.send(("done", asdict(reader.stats), limited))
+        except Exception as e:
+            conn.send(("error", str(e)))
+        finally:
+            if reader is not None:
+                reader.close()
+
+
+class _Worker:
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        _metrics.spawned += 1
+
+    def rss_mb(self) -> float | None:
+        # Resident set size from procfs; unavailable outside Linux
+        try:
+            with open(f"/proc/{self.process.pid}/statm") as f:
+                resident_pages = int(f.read().split()[1])
+        except (OSError, ValueError, IndexError):
+            return None
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+    def stop(self) -> None:
+        with contextlib.suppress(OSError):
+            self.conn.send(None)
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class BudgetExceededError(Exception):
+    """Raised after the pages that completed within budget have been yielded."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class SandboxPool:
+    """Long-lived extraction subprocesses supervised against a budget.
+
+    Extraction never runs in the API process. Each job streams pages back as
+    they finish; if a worker overruns its wall-clock deadline or RSS ceiling
+    it is killed and replaced, and the caller keeps the pages already
+    received. Jobs also stop cleanly after the page limit.
+    """
+
+    def __init__(self, size: int, budget: ExtractionBudget):
+        self._ctx = multiprocessing.get_context("spawn")
+        self._slots = asyncio.Semaphore(size)
+        self._idle: list[_Worker] = []
+        self._busy = 0
+        self.budget = budget
+
+    @property
+    def alive(self) -> int:
+        return sum(1 for w in self._idle if w.process.is_alive()) + self._busy
+
+    @property
+    def busy(self) -> int:
+        return self._busy
+
+    async def iter_pages(
+        self,
+        source: bytes | Path,
+        start: int = 0,
+        stop: int | None = None,
+        deadline: float | None = None,
+        max_pages: int | None = None,
+        page_cache: DiskCache | None = None,
+    ) -> AsyncIterator[tuple[str, dict]]:
+        """Yield ``("page", page)`` messages, then ``("done", stats)``.
+
+        Raises BudgetExceededError once a limit is hit; pages received before that
+        have already been yielded.
+        """
+        if deadline is None:
+            deadline = time.monotonic() + self.budget.timeout_s
+        if max_pages is None:
+            max_pages = self.budget.max_pages
+
+        async with self._slots:
+            worker = await self._acquire()
+            finished = False
+            try:
+                worker.conn.send(("pages", source, start, stop, max_pages, page_cache))
+                while True:
+                    message = await self._receive(worker, deadline)
+                    if message[0] == "page":
+                        yield message
+                        # A steady stream of pages must not outrun the budget
+                        self._check_budget(worker, deadline)
+                        continue
+                    if message[0] == "error":
+                        _metrics.jobs_failed += 1
+                        finished = True
+                        raise RuntimeError(message[1])
+                    finished = True
+                    _metrics.jobs_completed += 1
+                    yield ("done", message[1])
+                    if message[2]:
+                        _metrics.page_limit_hits += 1
+                        raise BudgetExceededError("page limit")
+                    return
+            finally:
+                await self._release(worker, reusable=finished)
+
+    async def count_pages(self, source: bytes | Path, deadline: float | None = None) -> int:
+        """Page count of ``source``, read in a worker under the time budget."""
+        if deadline is None:
+            deadline = time.monotonic() + self.budget.timeout_s
+
+        async with self._slots:
+            worker = await self._acquire()
+            finished = False
+            try:
+                worker.conn.send(("count", source))
+                message = await self._receive(worker, deadline)
+                finished = True
+                if message[0] == "error":
+                    raise RuntimeError(message[1])
+                return message[1]
+            finally:
+                await self._release(worker, reusable=finished)
+
+    async def _receive(self, worker: _Worker, deadline: float) -> tuple:
+        """Wait for the worker's next message, killing it on a budget overrun."""
+        while True:
+            if await anyio.to_thread.run_sync(worker.conn.poll, POLL_INTERVAL_S):
+                try:
+                    return worker.conn.recv()
+                except (EOFError, OSError) as e:
+                    _metrics.crashed += 1
+                    raise BudgetExceededError("worker crashed") from e
+            if not worker.process.is_alive():
+                _metrics.crashed += 1
+                raise BudgetExceededError("worker crashed")
+            self._check_budget(worker, deadline)
+
+    def _check_budget(self, worker: _Worker, deadline: float) -> None:
+        if time.monotonic() > deadline:
+            _metrics.killed_timeout += 1
+            raise BudgetExceededError("timeout")
+        rss = worker.rss_mb()
+        if rss is not None and rss > self.budget.max_rss_mb:
+            _metrics.killed_memory += 1
+            raise BudgetExceededError(f"memory ceiling ({rss:.0f} MB)")
+
+    async def _acquire(self) -> _Worker:
+        while self._idle:
+            worker = self._idle.pop()
+            if worker.process.is_alive():
+                self._busy += 1
+                return worker
+            await anyio.to_thread.run_sync(worker.kill)
+        worker = await anyio.to_thread.run_sync(_Worker, self._ctx)
+        self._busy += 1
+        return worker
+
+    async def _release(self, worker: _Worker, reusable: bool) -> None:
+        self._busy -= 1
+        if reusable and worker.process.is_alive():
+            self._idle.append(worker)
+        else:
+            # Killed, crashed, or abandoned mid-job with pages still in flight;
+            # reaping the process blocks, so it happens off the event loop
+            await anyio.to_thread.run_sync(worker.kill)
+
+    def shutdown(self) -> None:
+        for worker in self._idle:
+            worker.stop()
+        self._idle.clear()
+
+
+@lru_cache
+def get_sandbox_pool() -> SandboxPool:
+    """Process-wide sandbox pool, created on first use."""
+    return SandboxPool(settings.pdf_process_pool_size, ExtractionBudget.from_settings())
+
+
+def shutdown_sandbox_pool() -> None:
+    if get_sandbox_pool.cache_info().currsize:
+        get_sandbox_pool().shutdown()
+        get_sandbox_pool.cache_clear()
@@ -1,4 +1,5 @@
 """Azure Blob Storage implementation - placeholder for production migration."""
+from pathlib import Path
 from uuid import UUID
 from src.domain.interfaces.document_storage import DocumentStorage
 
@@ -11,6 +12,10 @@ class BlobDocumentStorage(DocumentStorage):
     async def retrieve(self, file_path: str) -> bytes:
         raise NotImplementedError("Azure Blob Storage not yet implemented")
 
+    async def local_path(self, file_path: str) -> Path | None:
+        # Blobs are never on local disk; callers fall back to retrieve()
+        return None
+
     async def delete(self, file_path: str) -> bool:
         raise NotImplementedError("Azure Blob Storage not yet implemented")
 
@@ -29,6 +29,12 @@ class LocalDocumentStorage(DocumentStorage):
             raise FileNotFoundError(f"File not found: {file_path}")
         return full_path.read_bytes()
 
+    async def local_path(self, file_path: str) -> Path | None:
+        full_path = self._base_path / file_path
+        if not full_path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+        return full_path
+
     async def delete(self, file_path: str) -> bool:
         full_path = self._base_path / file_path
         if full_path.exists():
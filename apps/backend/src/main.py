@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
@@ -5,10 +6,18 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from src.config import settings
-from src.infrastructure.database.engine import init_db
+from src.infrastructure.database.engine import async_session_factory, init_db
+from src.infrastructure.database.repositories.job_repo import SQLJobQueue
+from src.infrastructure.ai.caching_gateway import response_cache_stats
+from src.infrastructure.ai.gemini_gateway import close_gemini_gateway, gemini_gateway_metrics
+from src.infrastructure.events.progress import close_progress_hub, progress_hub_stats
+from src.infrastructure.pdf.extractor import engine_stats, shutdown_process_pool
+from src.infrastructure.pdf.sandbox import shutdown_sandbox_pool, worker_metrics
 from src.api.middleware.errors import ErrorHandlerMiddleware
 from src.api.middleware.audit import AuditMiddleware
+from src.api.dependencies import DbSession
 from src.api.v1 import documents, analysis, market, gdpr
+from src.worker import AnalysisWorker
 
 logging.basicConfig(
     level=logging.INFO,
@@ -19,7 +28,20 @@ logging.basicConfig(
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    # Development default; production runs `python -m src.worker` instead
+    worker, stop, worker_task = None, asyncio.Event(), None
+    if settings.analysis_inline_worker:
+        worker = AnalysisWorker(async_session_factory, analysis.run_analysis_task)
+        worker_task = asyncio.create_task(worker.run_forever(stop))
+    app.state.analysis_worker = worker
     yield
+    if worker_task:
+        stop.set()
+        await worker_task
+    await close_progress_hub()
+    await close_gemini_gateway()
+    shutdown_process_pool()
+    shutdown_sandbox_pool()
 
 
 app = FastAPI(
@@ -53,3 +75,17 @@ app.include_router(gdpr.router, prefix="/api/v1")
 @app.get("/health")
 async def health():
     return {"status": "healthy", "environment": settings.environment}
+
+
+@app.get("/metrics")
+async def metrics(db: DbSession):
+    worker = getattr(app.state, "analysis_worker", None)
+    return {
+        "pdf_engines": engine_stats(),
+        "pdf_workers": worker_metrics(),
+        "ai_response_cache": response_cache_stats(),
+        "ai_client": gemini_gateway_metrics(),
+        "analysis_queue": await SQLJobQueue(db).stats(),
+        "analysis_worker": worker.metrics() if worker else None,
+        "progress_streams": progress_hub_stats(),
+    }
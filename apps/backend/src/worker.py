@@ -0,0 +1,247 @@
+"""Analysis worker: runs queued analyses, as many processes and hosts as needed.
+
+    python -m src.worker --concurrency 4
+
+Every worker leases jobs from the ``analysis_jobs`` table of the configured
+database, so workers only need DATABASE_URL and the shared upload directory.
+SIGTERM or SIGINT stops leasing and lets running analyses finish for up to
+``--grace`` seconds; analyses still running then are handed back to the queue.
+"""
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import signal
+import socket
+import uuid
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config import settings
+from src.domain.enums import AnalysisStatus
+from src.domain.models.job import AnalysisJob
+from src.infrastructure.database.models import AnalysisResultModel
+from src.infrastructure.database.repositories.job_repo import SQLJobQueue
+
+logger = logging.getLogger(__name__)
+
+# (session_id, analysis_id, bypass_cache, incremental)
+RunAnalysis = Callable[[str, str, bool, bool], Awaitable[None]]
+
+
+class AnalysisWorker:
+    """Leases analysis jobs and runs up to ``concurrency`` of them at once.
+
+    Each running job's lease is extended every third of the visibility
+    timeout. If a heartbeat finds the lease taken over (the worker stalled
+    past the timeout and another worker claimed the job), the local run is
+    cancelled so the analysis is not written twice; a heartbeat that finds
+    the job cancelled stops the run the same way. Every poll also looks up
+    which running jobs were cancelled, in one query for all of them, and
+    cancels their runs; the cancellation reaches the AI and HTTP calls in
+    flight, which give up their connections and rate-limit slots.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        run: RunAnalysis,
+        concurrency: int | None = None,
+        visibility_seconds: float | None = None,
+        poll_seconds: float | None = None,
+        worker_id: str | None = None,
+    ):
+        self._session_factory = session_factory
+        self._run = run
+        self.concurrency = concurrency or settings.analysis_worker_concurrency
+        self._visibility = visibility_seconds or settings.analysis_job_visibility_seconds
+        self._poll = poll_seconds or settings.analysis_job_poll_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._running: dict[str, asyncio.Task] = {}
+        self._work: dict[str, asyncio.Task] = {}
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.leases_lost = 0
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    def metrics(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "concurrency": self.concurrency,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "leases_lost": self.leases_lost,
+        }
+
+    def cancel(self, job_id: str) -> bool:
+        """Stop a job's run if it is running here."""
+        work = self._work.get(job_id)
+        if work is None or work.done():
+            return False
+        work.cancel()
+        return True
+
+    async def poll_once(self) -> int:
+        """Fail abandoned jobs, stop cancelled ones, then lease and start jobs for free slots."""
+        async with self._session_factory() as db:
+            queue = SQLJobQueue(db)
+            reaped = await queue.reap()
+            cancelled = await queue.cancelled(list(self._work))
+        for job in reaped:
+            logger.error(f"Analysis job {job.id} abandoned after {job.attempts} attempts")
+            await self._mark_failed(job.analysis_id, "Analysis was interrupted too often; please retry.")
+        for job_id in cancelled:
+            self.cancel(job_id)
+
+        free = self.concurrency - self.running
+        if free <= 0:
+            return 0
+        async with self._session_factory() as db:
+            jobs = await SQLJobQueue(db).lease(self.worker_id, free, self._visibility)
+        for job in jobs:
+            logger.info(f"Worker {self.worker_id} leased job {job.id} (attempt {job.attempts})")
+            self._running[job.id] = asyncio.create_task(self._execute(job))
+        return len(jobs)
+
+    async def run_forever(self, stop: asyncio.Event, grace_seconds: float = 30.0) -> None:
+        logger.info(f"Analysis worker {self.worker_id} started, concurrency {self.concurrency}")
+        while not stop.is_set():
+            try:
+                leased = await self.poll_once()
+            except Exception as e:
+                logger.warning(f"Polling the analysis queue failed: {e}")
+                leased = 0
+            # Look again right away while jobs keep coming and slots are free
+            if leased and self.running < self.concurrency:
+                continue
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(stop.wait(), timeout=self._poll)
+        await self.drain(grace_seconds)
+        logger.info(f"Analysis worker {self.worker_id} stopped")
+
+    async def drain(self, grace_seconds: float) -> None:
+        """Wait for running jobs, then hand the rest back to the queue."""
+        tasks = list(self._running.values())
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=grace_seconds)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _execute(self, job: AnalysisJob) -> None:
+        work = self._work[job.id] = asyncio.create_task(
+            self._run(job.session_id, job.analysis_id, job.bypass_cache, job.incremental)
+        )
+        heartbeat = asyncio.create_task(self._keep_leased(job))
+        try:
+            await asyncio.wait({work, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+            if work.cancelled():
+                # The job was cancelled; whoever did so updated the analysis
+                self.cancelled += 1
+                logger.info(f"Analysis job {job.id} cancelled")
+                return
+            if not work.done():
+                work.cancel()
+                await asyncio.gather(work, return_exceptions=True)
+                if heartbeat.result():
+                    # Cancelled before a poll noticed; the canceller updated the analysis
+                    self.cancelled += 1
+                    logger.info(f"Analysis job {job.id} cancelled")
+                else:
+                    # Lease lost: another worker owns the job now
+                    self.leases_lost += 1
+                    logger.warning(f"Lost the lease on job {job.id}; stopped its analysis here")
+                return
+            error = work.exception()
+            async with self._session_factory() as db:
+                queue = SQLJobQueue(db)
+                if error is None:
+                    await queue.complete(job.id, self.worker_id)
+                    self.completed += 1
+                else:
+                    logger.error(f"Analysis job {job.id} failed: {error}")
+                    self.failed += 1
+                    await queue.fail(job.id, self.worker_id, str(error))
+        except asyncio.CancelledError:
+            # Shutting down: give the job back untried
+            work.cancel()
+            await asyncio.gather(work, return_exceptions=True)
+            async with self._session_factory() as db:
+                await SQLJobQueue(db).release(job.id, self.worker_id)
+            logger.info(f"Released job {job.id} on shutdown")
+            raise
+        finally:
+            heartbeat.cancel()
+            self._running.pop(job.id, None)
+            self._work.pop(job.id, None)
+
+    async def _keep_leased(self, job: AnalysisJob) -> bool:
+        """Returns only when the lease is gone: True if the job was cancelled, False if lost."""
+        while True:
+            await asyncio.sleep(self._visibility / 3)
+            try:
+                async with self._session_factory() as db:
+                    queue = SQLJobQueue(db)
+                    if not await queue.heartbeat(job.id, self.worker_id, self._visibility):
+                        return job.id in await queue.cancelled([job.id])
+            except Exception as e:
+                # The lease stays valid until it times out; try again next beat
+                logger.warning(f"Heartbeat for job {job.id} failed: {e}")
+
+    async def _mark_failed(self, analysis_id: str, message: str) -> None:
+        async with self._session_factory() as db:
+            await db.execute(
+                update(AnalysisResultModel)
+                .where(AnalysisResultModel.id == analysis_id)
+                .values(status=AnalysisStatus.FAILED, error_message=message)
+            )
+            await db.commit()
+
+
+async def run_worker(concurrency: int, grace_seconds: float) -> None:
+    from src.api.v1.analysis import run_analysis_task
+    from src.infrastructure.ai.gemini_gateway import close_gemini_gateway
+    from src.infrastructure.database.engine import async_session_factory, init_db
+    from src.infrastructure.pdf.extractor import shutdown_process_pool
+    from src.infrastructure.pdf.sandbox import shutdown_sandbox_pool
+
+    await init_db()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    worker = AnalysisWorker(async_session_factory, run_analysis_task, concurrency)
+    try:
+        await worker.run_forever(stop, grace_seconds)
+    finally:
+        await close_gemini_gateway()
+        shutdown_process_pool()
+        shutdown_sandbox_pool()
+        logger.info(f"Worker totals: {worker.metrics()}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=settings.analysis_worker_concurrency)
+    parser.add_argument("--grace", type=float, default=30.0, help="seconds to let running analyses finish")
+    args = parser.parse_args()
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    asyncio.run(run_worker(args.concurrency, args.grace))
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,23 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Point the process-wide caches at a fresh directory for every test."""
+    from src.config import settings
+    from src.infrastructure.ai.caching_gateway import get_response_cache
+    from src.infrastructure.pdf.corpus import get_redaction_cache
+    from src.infrastructure.pdf.extractor import get_extraction_cache
+
+    getters = (get_extraction_cache, get_redaction_cache, get_response_cache)
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path / "cache"))
+    for getter in getters:
+        getter.cache_clear()
+    yield settings.cache_path
+    for getter in getters:
+        getter.cache_clear()
+
+
 @pytest.fixture
 async def db_engine():
     engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
@@ -42,3 +42,381 @@ async def test_session_not_found(client):
 async def test_delete_nonexistent_session(client):
     response = await client.delete("/api/v1/sessions/nonexistent")
     assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_analysis_is_queued_once(client):
+    session_id = (await client.post("/api/v1/sessions")).json()["session_id"]
+
+    first = await client.post(f"/api/v1/sessions/{session_id}/analyze")
+    again = await client.post(f"/api/v1/sessions/{session_id}/analyze")
+    assert first.status_code == 202
+    assert first.json()["queue_position"] == 1
+    assert again.json()["analysis_id"] == first.json()["analysis_id"]
+
+    status = await client.get(f"/api/v1/sessions/{session_id}/analysis/status")
+    assert "number 1 in the queue" in status.json()["progress_message"]
+
+
+@pytest.mark.asyncio
+async def test_full_analysis_queue_is_refused(client, monkeypatch):
+    from src.config import settings
+
+    monkeypatch.setattr(settings, "analysis_queue_max_depth", 1)
+    first = (await client.post("/api/v1/sessions")).json()["session_id"]
+    second = (await client.post("/api/v1/sessions")).json()["session_id"]
+
+    assert (await client.post(f"/api/v1/sessions/{first}/analyze")).status_code == 202
+    response = await client.post(f"/api/v1/sessions/{second}/analyze")
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) > 0
+
+
+@pytest.mark.asyncio
+async def test_completed_analysis_is_extended_with_new_documents(client, db_session):
+    import uuid
+
+    from src.infrastructure.database.models import AnalysisResultModel, DocumentModel
+
+    session_id = (await client.post("/api/v1/sessions")).json()["session_id"]
+    first, second = str(uuid.uuid4()), str(uuid.uuid4())
+    db_session.add(DocumentModel(id=first, session_id=session_id, filename="a.pdf", file_path="a.pdf"))
+    db_session.add(
+        AnalysisResultModel(
+            session_id=session_id,
+            status="complete",
+            strengths=["Centrale ligging"],
+            analyzed_documents=[first],
+        )
+    )
+    await db_session.commit()
+
+    response = await client.post(f"/api/v1/sessions/{session_id}/analyze")
+    assert response.status_code == 409
+
+    db_session.add(DocumentModel(id=second, session_id=session_id, filename="b.pdf", file_path="b.pdf"))
+    await db_session.commit()
+    response = await client.post(f"/api/v1/sessions/{session_id}/analyze")
+    assert response.status_code == 202
+    assert response.json()["mode"] == "incremental"
+
+    # The stored result stays readable while the new document is analyzed
+    analysis = (await client.get(f"/api/v1/sessions/{session_id}/analysis")).json()
+    assert analysis["status"] == "pending" and analysis["strengths"] == ["Centrale ligging"]
+
+
+@pytest.mark.asyncio
+async def test_progress_stream_ends_with_the_final_status(client, tmp_path):
+    import asyncio
+
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    from src.infrastructure.database.models import Base
+    from src.infrastructure.events.progress import ProgressEvent, ProgressHub, get_progress_hub
+    from src.main import app
+
+    # Events go through a file database: the in-memory one shares a connection
+    # between sessions, so a poll's rollback could discard the worker's insert
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'events.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    hub = ProgressHub(session_factory, poll_seconds=0.05, origin="api")
+    app.dependency_overrides[get_progress_hub] = lambda: hub
+    session_id = (await client.post("/api/v1/sessions")).json()["session_id"]
+    await client.post(f"/api/v1/sessions/{session_id}/analyze")
+
+    async def finish_elsewhere():
+        # A worker process reports through the database
+        while not hub.stats()["streams"]:
+            await asyncio.sleep(0.01)
+        worker = ProgressHub(session_factory, origin="worker")
+        await worker.store([ProgressEvent(session_id, "status", {"status": "complete"})])
+
+    finishing = asyncio.create_task(finish_elsewhere())
+    response = await asyncio.wait_for(
+        client.get(f"/api/v1/sessions/{session_id}/analysis/events"), 5
+    )
+    await finishing
+    await hub.close()
+    await engine.dispose()
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n") for block in response.text.strip().split("\n\n")]
+    assert [lines[0] for lines in events] == ["event: status", "event: status"]
+    assert '"status": "pending"' in events[0][1]
+    assert '"status": "complete"' in events[1][1]
+    assert hub.stats()["streams"] == 0
+
+
+@pytest.mark.asyncio
+async def test_analysis_is_cancelled_and_can_be_started_again(client):
+    session_id = (await client.post("/api/v1/sessions")).json()["session_id"]
+    first = await client.post(f"/api/v1/sessions/{session_id}/analyze")
+    assert first.status_code == 202
+
+    cancelled = await client.post(f"/api/v1/sessions/{session_id}/analysis/cancel")
+    assert cancelled.status_code == 200 and cancelled.json()["status"] == "cancelled"
+    again = await client.post(f"/api/v1/sessions/{session_id}/analysis/cancel")
+    assert again.status_code == 409
+    status = await client.get(f"/api/v1/sessions/{session_id}/analysis/status")
+    assert status.json()["status"] == "cancelled"
+
+    restarted = await client.post(f"/api/v1/sessions/{session_id}/analyze")
+    assert restarted.status_code == 202 and restarted.json()["queue_position"] == 1
+
+
+@pytest.mark.asyncio
+async def test_deleting_a_session_erases_its_cached_text(client, db_session, cache_dir):
+    import uuid
+
+    from src.infrastructure.ai.caching_gateway import get_response_cache
+    from src.infrastructure.cache.disk_cache import cache_scope
+    from src.infrastructure.database.models import DocumentModel
+    from src.infrastructure.pdf.corpus import get_redaction_cache
+    from src.infrastructure.pdf.extractor import get_extraction_cache, page_cache_key
+
+    session_id = (await client.post("/api/v1/sessions")).json()["session_id"]
+    db_session.add(
+        DocumentModel(
+            id=str(uuid.uuid4()),
+            session_id=session_id,
+            filename="a.pdf",
+            file_path="a.pdf",
+            page_hashes=["hash-1"],
+        )
+    )
+    await db_session.commit()
+
+    # Pages are cached by extraction workers, outside the session's scope
+    get_extraction_cache().put(page_cache_key("hash-1"), {"text": "Keizersgracht 1"})
+    with cache_scope(session_id):
+        get_extraction_cache().put("document-v1", {"pages": []})
+        get_redaction_cache().put("redacted", {"text": "[ADRES]"})
+        get_response_cache().put("response", {"value": []})
+
+    response = await client.delete(f"/api/v1/sessions/{session_id}")
+    assert response.status_code == 200
+    assert response.json()["details"]["cache_entries"] == 4
+    assert list(cache_dir.rglob("*.json")) == []
+
+
+@pytest.fixture
+def task_db(db_engine, monkeypatch):
+    """Session factory that run_analysis_task uses, with no AI gateway."""
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    from src.api import dependencies
+    from src.infrastructure.database import engine
+    from src.infrastructure.events import progress
+
+    session_factory = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(engine, "async_session_factory", session_factory)
+    monkeypatch.setattr(progress, "get_progress_hub", lambda: progress.ProgressHub(session_factory))
+    monkeypatch.setattr(dependencies, "get_ai_gateway", lambda: None)
+    return session_factory
+
+
+async def seed_analysis(session_factory, session_id: str, leased: bool, incremental: bool = False):
+    """Analysis ``a1`` with a stored result, and a leased job for it if ``leased``."""
+    from src.domain.enums import AnalysisStatus
+    from src.domain.models.job import AnalysisJob
+    from src.infrastructure.database.models import AnalysisResultModel
+    from src.infrastructure.database.repositories.job_repo import SQLJobQueue
+
+    async with session_factory() as db:
+        db.add(
+            AnalysisResultModel(
+                id="a1",
+                session_id=session_id,
+                status=AnalysisStatus.PENDING,
+                strengths=["Centrale ligging"],
+                analyzed_documents=[],
+            )
+        )
+        await db.commit()
+        if leased:
+            queue = SQLJobQueue(db)
+            await queue.enqueue(
+                AnalysisJob(analysis_id="a1", session_id=session_id, incremental=incremental)
+            )
+            await queue.lease("worker", 1, 60)
+
+
+@pytest.mark.asyncio
+async def test_a_cancelled_incremental_run_leaves_the_result_alone(task_db, monkeypatch):
+    import uuid
+
+    from sqlalchemy import select, update
+
+    from src.api.v1.analysis import run_analysis_task
+    from src.application.services.document_analysis import DocumentAnalysisService
+    from src.domain.enums import AnalysisStatus
+    from src.domain.models.analysis import AnalysisResult
+    from src.infrastructure.database.models import AnalysisResultModel
+    from src.infrastructure.database.repositories.job_repo import SQLJobQueue
+
+    session_id = str(uuid.uuid4())
+    await seed_analysis(task_db, session_id, leased=True, incremental=True)
+
+    async def run_analysis(self, session_id, partial, previous, on_progress):
+        # Cancelled while the AI stages run: the stored result is put back
+        async with task_db() as db:
+            await SQLJobQueue(db).cancel("a1")
+            await db.execute(update(AnalysisResultModel).values(status=AnalysisStatus.COMPLETE))
+            await db.commit()
+        return AnalysisResult(
+            session_id=session_id, status=AnalysisStatus.COMPLETE, strengths=["Overschreven"]
+        )
+
+    monkeypatch.setattr(DocumentAnalysisService, "run_analysis", run_analysis)
+    await run_analysis_task(session_id, "a1", incremental=True)
+
+    async with task_db() as db:
+        analysis = (await db.execute(select(AnalysisResultModel))).scalar_one()
+    assert analysis.status == AnalysisStatus.COMPLETE
+    assert analysis.strengths == ["Centrale ligging"]
+
+
+@pytest.mark.asyncio
+async def test_a_run_without_a_job_saves_its_outcome(task_db, monkeypatch):
+    import uuid
+
+    from sqlalchemy import select
+
+    from src.api.v1.analysis import run_analysis_task
+    from src.application.services.document_analysis import DocumentAnalysisService
+    from src.domain.enums import AnalysisStatus
+    from src.domain.models.analysis import AnalysisResult
+    from src.infrastructure.database.models import AnalysisResultModel
+
+    session_id = str(uuid.uuid4())
+    await seed_analysis(task_db, session_id, leased=False)
+
+    async def run_analysis(self, session_id, partial, previous, on_progress):
+        return AnalysisResult(
+            session_id=session_id, status=AnalysisStatus.COMPLETE, strengths=["Ruime tuin"]
+        )
+
+    monkeypatch.setattr(DocumentAnalysisService, "run_analysis", run_analysis)
+    await run_analysis_task(session_id, "a1")
+
+    async with task_db() as db:
+        analysis = (await db.execute(select(AnalysisResultModel))).scalar_one()
+    assert analysis.status == AnalysisStatus.COMPLETE
+    assert analysis.strengths == ["Ruime tuin"]
+
+
+@pytest.mark.asyncio
+async def test_a_failing_run_waits_for_its_retries_before_it_fails(task_db, monkeypatch):
+    import uuid
+
+    from sqlalchemy import select, update
+
+    from src.api.v1.analysis import run_analysis_task
+    from src.application.services.document_analysis import DocumentAnalysisService
+    from src.domain.enums import AnalysisStatus
+    from src.infrastructure.database.models import AnalysisJobModel, AnalysisResultModel
+
+    session_id = str(uuid.uuid4())
+    await seed_analysis(task_db, session_id, leased=True)
+
+    async def run_analysis(self, session_id, partial, previous, on_progress):
+        raise RuntimeError("Gemini unavailable")
+
+    monkeypatch.setattr(DocumentAnalysisService, "run_analysis", run_analysis)
+    with pytest.raises(RuntimeError):
+        await run_analysis_task(session_id, "a1")
+    async with task_db() as db:
+        analysis = (await db.execute(select(AnalysisResultModel))).scalar_one()
+    assert analysis.status == AnalysisStatus.PENDING
+    assert analysis.error_message == "Gemini unavailable"
+
+    # The last attempt fails the analysis
+    async with task_db() as db:
+        await db.execute(update(AnalysisJobModel).values(attempts=AnalysisJobModel.max_attempts))
+        await db.commit()
+    with pytest.raises(RuntimeError):
+        await run_analysis_task(session_id, "a1")
+    async with task_db() as db:
+        analysis = (await db.execute(select(AnalysisResultModel))).scalar_one()
+    assert analysis.status == AnalysisStatus.FAILED
+
+
+@pytest.mark.asyncio
+async def test_a_failed_incremental_run_keeps_the_result_complete(task_db, monkeypatch):
+    import uuid
+
+    from sqlalchemy import select, update
+
+    from src.api.v1.analysis import run_analysis_task
+    from src.application.services.document_analysis import DocumentAnalysisService
+    from src.domain.enums import AnalysisStatus
+    from src.domain.models.analysis import AnalysisResult
+    from src.infrastructure.database.models import AnalysisJobModel, AnalysisResultModel
+
+    session_id = str(uuid.uuid4())
+    await seed_analysis(task_db, session_id, leased=True, incremental=True)
+
+    async def run_analysis(self, session_id, partial, previous, on_progress):
+        return AnalysisResult(
+            session_id=session_id,
+            status=AnalysisStatus.FAILED,
+            error_message="Could not extract text from the new documents",
+            document_ids=["d2"],
+        )
+
+    monkeypatch.setattr(DocumentAnalysisService, "run_analysis", run_analysis)
+    await run_analysis_task(session_id, "a1", incremental=True)
+    async with task_db() as db:
+        analysis = (await db.execute(select(AnalysisResultModel))).scalar_one()
+    assert analysis.status == AnalysisStatus.COMPLETE
+    assert analysis.error_message == "Could not extract text from the new documents"
+    assert analysis.strengths == ["Centrale ligging"]
+    assert analysis.analyzed_documents == []
+
+    # Also when the last attempt raises
+    async def failing_run(self, session_id, partial, previous, on_progress):
+        raise RuntimeError("Gemini unavailable")
+
+    monkeypatch.setattr(DocumentAnalysisService, "run_analysis", failing_run)
+    async with task_db() as db:
+        await db.execute(
+            update(AnalysisResultModel).values(status=AnalysisStatus.PENDING, error_message=None)
+        )
+        await db.execute(update(AnalysisJobModel).values(attempts=AnalysisJobModel.max_attempts))
+        await db.commit()
+    with pytest.raises(RuntimeError):
+        await run_analysis_task(session_id, "a1", incremental=True)
+    async with task_db() as db:
+        analysis = (await db.execute(select(AnalysisResultModel))).scalar_one()
+    assert analysis.status == AnalysisStatus.COMPLETE
+    assert analysis.error_message == "Gemini unavailable"
+    assert analysis.analyzed_documents == []
+
+
+@pytest.mark.asyncio
+async def test_upload_preprocessing_leaves_documents_an_analysis_claimed(task_db):
+    import uuid
+
+    from src.api.v1.documents import _preprocess_document_task
+    from src.domain.models.document import Document
+    from src.infrastructure.database.repositories.document_repo import SQLDocumentRepository
+
+    doc = Document(session_id=uuid.uuid4(), filename="brochure.pdf", file_path="brochure.pdf")
+    async with task_db() as db:
+        repo = SQLDocumentRepository(db)
+        await repo.save(doc)
+        assert await repo.claim_preprocessing(doc.id, 60)
+
+    await _preprocess_document_task(doc.id)
+
+    async with task_db() as db:
+        repo = SQLDocumentRepository(db)
+        assert (await repo.get_by_id(doc.id)).processed_at is None
+        # The run's claim is untouched until it releases it
+        assert not await repo.claim_preprocessing(doc.id, 60)
+        await repo.release_preprocessing([doc.id])
+        assert await repo.claim_preprocessing(doc.id, 0)
+        # A lapsed claim can be taken over
+        assert await repo.claim_preprocessing(doc.id, 60)
@@ -0,0 +1,256 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from google.genai import errors
+
+from src.config import settings
+from src.domain.enums import DocumentType
+from src.infrastructure.ai.caching_gateway import CachingAIGateway
+from src.infrastructure.ai.gemini_gateway import GeminiGateway
+from src.infrastructure.ai.json_stream import IncompleteJSONError
+from src.infrastructure.ai.replay_gateway import Cassette, ReplayAIGateway
+from src.infrastructure.cache.disk_cache import DiskCache
+
+STREAMED_ANSWER = json.dumps(
+    {
+        "strengths": ["Centrale ligging aan de gracht", "Recent vernieuwd dak"],
+        "weaknesses": ["Geen buitenruimte", "Energielabel D"],
+    }
+)
+
+
+class FakeGemini(ThreadingHTTPServer):
+    """Answers generateContent, failing the first ``failures`` requests with ``status``.
+
+    Requests for a model whose name contains ``slow`` wait ``delay`` seconds.
+    With ``cut_off`` a streamed answer stops halfway through.
+    """
+
+    def __init__(
+        self,
+        failures: int = 0,
+        status: int = 429,
+        delay: float = 0.0,
+        slow: str = "",
+        cut_off: bool = False,
+    ):
+        super().__init__(("127.0.0.1", 0), FakeGeminiHandler)
+        self.failures = failures
+        self.cut_off = cut_off
+        self.status = status
+        self.delay = delay
+        self.slow = slow
+        self.requests = 0
+        self.calls: list[tuple[str, dict]] = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    server: FakeGemini
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        model = self.path.split("/models/")[1].split(":")[0]
+        with self.server.lock:
+            self.server.calls.append((model, body))
+        if "streamGenerateContent" in self.path:
+            return self.stream()
+        with self.server.lock:
+            self.server.requests += 1
+            fail = self.server.requests <= self.server.failures
+            self.server.active += 1
+            self.server.peak = max(self.server.peak, self.server.active)
+        if self.server.slow in model:
+            threading.Event().wait(self.server.delay)
+        if fail:
+            status = self.server.status
+            body = {"error": {"code": status, "message": "slow down", "status": "RESOURCE_EXHAUSTED"}}
+        else:
+            status = 200
+            body = {
+                "candidates": [{"content": {"role": "model", "parts": [{"text": "energy_label"}]}}],
+                "usageMetadata": {"promptTokenCount": 120, "candidatesTokenCount": 2},
+            }
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        with self.server.lock:
+            self.server.active -= 1
+
+    def stream(self):
+        """Send STREAMED_ANSWER as server-sent events, a few characters at a time."""
+        with self.server.lock:
+            self.server.requests += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        answer = STREAMED_ANSWER[: len(STREAMED_ANSWER) // 2] if self.server.cut_off else STREAMED_ANSWER
+        for i in range(0, len(answer), 40):
+            text = answer[i : i + 40]
+            chunk = {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\r\n\r\n".encode())
+            self.wfile.flush()
+            threading.Event().wait(self.server.delay)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_gemini(request):
+    server = FakeGemini(**getattr(request, "param", {}))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(settings, "google_api_key", "test-key")
+    monkeypatch.setattr(settings, "gemini_retry_base_seconds", 0.01)
+
+
+@pytest.mark.parametrize("fake_gemini", [{"failures": 2}], indirect=True)
+async def test_throttled_calls_are_retried_and_back_off(fake_gemini):
+    gateway = GeminiGateway(base_url=fake_gemini.url)
+
+    result = await gateway.classify_document("Energielabel B")
+    await gateway.aclose()
+
+    metrics = gateway.metrics()
+    assert result == DocumentType.ENERGY_LABEL
+    assert fake_gemini.requests == 3
+    assert metrics["retries"] == 2 and metrics["throttled"] == 2
+    assert metrics["concurrency_limit"] < settings.gemini_max_concurrency
+
+
+@pytest.mark.parametrize("fake_gemini", [{"failures": 1, "status": 400}], indirect=True)
+async def test_client_errors_are_not_retried(fake_gemini):
+    gateway = GeminiGateway(base_url=fake_gemini.url)
+
+    with pytest.raises(errors.ClientError) as failure:
+        await gateway.classify_document("Energielabel B")
+    await gateway.aclose()
+
+    assert failure.value.code == 400
+    assert fake_gemini.requests == 1
+
+
+@pytest.mark.parametrize("fake_gemini", [{"delay": 0.05}], indirect=True)
+async def test_concurrency_is_capped(fake_gemini, monkeypatch):
+    monkeypatch.setattr(settings, "gemini_max_concurrency", 2)
+    gateway = GeminiGateway(base_url=fake_gemini.url)
+
+    await asyncio.gather(*(gateway.classify_document(f"Energielabel {i}") for i in range(6)))
+    await gateway.aclose()
+
+    assert fake_gemini.requests == 6
+    assert fake_gemini.peak == 2
+
+
+async def test_record_mode_writes_a_replayable_cassette(fake_gemini, monkeypatch, tmp_path):
+    path = tmp_path / "cassette.jsonl"
+    monkeypatch.setattr(settings, "ai_record_cassette", str(path))
+    gateway = GeminiGateway(base_url=fake_gemini.url)
+
+    recorded = await gateway.classify_document("Energielabel B")
+    await gateway.aclose()
+
+    replay = ReplayAIGateway(Cassette(path), exact=True)
+    assert await replay.classify_document("Energielabel B") == recorded
+
+
+@pytest.mark.parametrize("fake_gemini", [{"delay": 0.05}], indirect=True)
+async def test_streamed_items_arrive_before_the_response_ends(fake_gemini):
+    gateway = GeminiGateway(base_url=fake_gemini.url)
+    loop = asyncio.get_running_loop()
+    arrivals = []
+
+    result = await gateway.identify_strengths_weaknesses(
+        "Keizersgracht 1", {}, on_item=lambda field, item: arrivals.append((loop.time(), field, item))
+    )
+    finished = loop.time()
+    await gateway.aclose()
+
+    assert result == json.loads(STREAMED_ANSWER)
+    assert [(field, item) for _, field, item in arrivals] == [
+        (field, item) for field, items in result.items() for item in items
+    ]
+    assert finished - arrivals[0][0] > 0.1
+
+
+@pytest.mark.parametrize("fake_gemini", [{"cut_off": True}], indirect=True)
+async def test_a_cut_off_stream_is_an_error_and_not_cached(fake_gemini, tmp_path):
+    inner = GeminiGateway(base_url=fake_gemini.url)
+    gateway = CachingAIGateway(inner, DiskCache(tmp_path, 1024 * 1024))
+    arrivals = []
+
+    with pytest.raises(IncompleteJSONError):
+        await gateway.identify_strengths_weaknesses(
+            "Keizersgracht 1", {}, on_item=lambda field, item: arrivals.append(item)
+        )
+    await inner.aclose()
+
+    # Items that completed were passed on; the answer itself was not kept
+    assert arrivals == ["Centrale ligging aan de gracht"]
+    assert list(tmp_path.rglob("*.json")) == []
+
+
+async def test_routes_pick_model_and_output_budget_per_task(fake_gemini, monkeypatch):
+    monkeypatch.setattr(
+        settings, "gemini_routes", {"classify": {"model": "gemini-lite", "max_output_tokens": 8}}
+    )
+    gateway = GeminiGateway(base_url=fake_gemini.url)
+
+    await gateway.classify_document("Energielabel B")
+    await gateway.extract_property_data("Vraagprijs € 450.000", DocumentType.PROPERTY_LISTING)
+    await gateway.aclose()
+
+    (classify_model, classify_body), (extract_model, extract_body) = fake_gemini.calls
+    assert classify_model == "gemini-lite"
+    assert classify_body["generationConfig"]["maxOutputTokens"] == 8
+    assert extract_model == settings.gemini_model
+    assert extract_body["generationConfig"]["maxOutputTokens"] == 2000
+    routes = gateway.metrics()["routes"]
+    assert routes["classify"]["calls"] == 1 and routes["classify"]["model"] == "gemini-lite"
+    assert routes["classify"]["prompt_tokens"] == 120 and routes["classify"]["output_tokens"] == 2
+
+
+@pytest.mark.parametrize("fake_gemini", [{"delay": 0.5, "slow": "gemini-slow"}], indirect=True)
+async def test_timed_out_calls_fall_back_to_the_route_fallback_model(fake_gemini, monkeypatch):
+    monkeypatch.setattr(
+        settings,
+        "gemini_routes",
+        {
+            "classify": {
+                "model": "gemini-slow",
+                "fallback_model": "gemini-fast",
+                "timeout_seconds": 0.1,
+                "latency_slo_seconds": 0.05,
+            }
+        },
+    )
+    gateway = GeminiGateway(base_url=fake_gemini.url)
+
+    result = await gateway.classify_document("Energielabel B")
+    await gateway.aclose()
+
+    assert result == DocumentType.ENERGY_LABEL
+    assert [model for model, _ in fake_gemini.calls] == ["gemini-slow", "gemini-fast"]
+    route = gateway.metrics()["routes"]["classify"]
+    assert route["timeouts"] == 1 and route["fallbacks"] == 1 and route["failures"] == 0
+    assert route["slo_breaches"] == 1
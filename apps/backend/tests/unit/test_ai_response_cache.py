@@ -0,0 +1,156 @@
+import asyncio
+
+import pytest
+
+from src.domain.enums import DocumentType
+from src.domain.interfaces.ai_gateway import AIGateway
+from src.infrastructure.ai.caching_gateway import CachingAIGateway, bypass_ai_cache
+from src.infrastructure.cache.disk_cache import DiskCache
+from src.infrastructure.pdf.corpus import RedactedText
+
+
+class CountingAI(AIGateway):
+    model = "test-model"
+
+    def __init__(self, fail: bool = False):
+        self.calls = 0
+        self.texts: list[str] = []
+        self.fail = fail
+
+    async def classify_document(self, text: str) -> DocumentType:
+        self.calls += 1
+        self.texts.append(text)
+        return DocumentType.HOA_DOCUMENTS
+
+    async def extract_property_data(
+        self, text: str, doc_type: DocumentType, fields: list[str] | None = None
+    ) -> dict:
+        self.calls += 1
+        return {"asking_price": 500000}
+
+    async def detect_risks(self, text: str, doc_type: DocumentType, on_item=None) -> list[dict]:
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        if self.fail:
+            raise RuntimeError("upstream error")
+        return [{"title": "Houten paalfundering"}]
+
+    async def identify_strengths_weaknesses(
+        self, text: str, property_data: dict, on_item=None
+    ) -> dict:
+        self.calls += 1
+        return {"strengths": [], "weaknesses": []}
+
+
+def make_gateway(tmp_path, inner: AIGateway, **kwargs) -> CachingAIGateway:
+    return CachingAIGateway(inner, DiskCache(tmp_path, 1024 * 1024), **kwargs)
+
+
+async def test_repeated_request_is_served_from_cache(tmp_path):
+    inner = CountingAI()
+    gateway = make_gateway(tmp_path, inner)
+
+    first = await gateway.classify_document("VvE notulen 2023")
+    again = await make_gateway(tmp_path, inner).classify_document("VvE notulen 2023")
+
+    assert first == again == DocumentType.HOA_DOCUMENTS
+    assert inner.calls == 1
+
+
+async def test_key_covers_arguments(tmp_path):
+    inner = CountingAI()
+    gateway = make_gateway(tmp_path, inner)
+
+    await gateway.extract_property_data("tekst", DocumentType.OTHER, fields=["asking_price"])
+    await gateway.extract_property_data("tekst", DocumentType.OTHER, fields=["year_built"])
+
+    assert inner.calls == 2
+
+
+async def test_key_covers_only_the_text_that_is_sent(tmp_path):
+    class TruncatingAI(CountingAI):
+        def input_limit(self, method: str) -> int:
+            return 20
+
+    inner = TruncatingAI()
+    gateway = make_gateway(tmp_path, inner)
+
+    await gateway.classify_document("VvE notulen 2023. Vergadering van april")
+    await gateway.classify_document("VvE notulen 2023. Vergadering van mei")
+    await gateway.classify_document("VvE notulen 2024. Vergadering van mei")
+
+    assert inner.calls == 2
+    assert inner.texts == ["VvE notulen 2023. Ve", "VvE notulen 2024. Ve"]
+
+
+async def test_identical_inflight_requests_share_one_call(tmp_path):
+    inner = CountingAI()
+    gateway = make_gateway(tmp_path, inner)
+
+    results = await asyncio.gather(
+        *(gateway.detect_risks("Fundering uit 1920", DocumentType.OTHER) for _ in range(3))
+    )
+
+    assert inner.calls == 1
+    assert results[0] == results[1] == results[2]
+
+
+async def test_reused_responses_are_handed_out_item_by_item(tmp_path):
+    inner = CountingAI()
+    gateway = make_gateway(tmp_path, inner)
+    items = []
+
+    await gateway.detect_risks("Fundering uit 1920", DocumentType.OTHER)
+    await gateway.detect_risks(
+        "Fundering uit 1920", DocumentType.OTHER, on_item=lambda *item: items.append(item)
+    )
+
+    assert inner.calls == 1
+    assert items == [("risks", {"title": "Houten paalfundering"})]
+
+
+async def test_rerouting_a_method_to_another_model_misses_the_cache(tmp_path):
+    inner = CountingAI()
+    inner.model_for = lambda method: inner.routed
+    inner.routed = "gemini-lite"
+    gateway = make_gateway(tmp_path, inner)
+
+    await gateway.classify_document("VvE notulen 2023")
+    inner.routed = "gemini-pro"
+    await gateway.classify_document("VvE notulen 2023")
+    await gateway.classify_document("VvE notulen 2023")
+
+    assert inner.calls == 2
+
+
+async def test_failures_are_not_cached(tmp_path):
+    inner = CountingAI(fail=True)
+    gateway = make_gateway(tmp_path, inner)
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            await gateway.detect_risks("Fundering uit 1920", DocumentType.OTHER)
+
+    assert inner.calls == 2
+
+
+async def test_expired_entries_and_bypass_reach_the_model(tmp_path):
+    inner = CountingAI()
+    expired = make_gateway(tmp_path, inner, ttl_seconds=0)
+
+    await expired.classify_document("Energielabel A")
+    await expired.classify_document("Energielabel A")
+    with bypass_ai_cache():
+        await make_gateway(tmp_path, inner).classify_document("Energielabel A")
+
+    assert inner.calls == 3
+
+
+async def test_prompt_is_redacted_before_it_is_keyed(tmp_path):
+    inner = CountingAI()
+    gateway = make_gateway(tmp_path, inner)
+
+    await gateway.classify_document("Contact: test@example.com")
+
+    assert isinstance(inner.texts[0], RedactedText)
+    assert "test@example.com" not in inner.texts[0]
@@ -0,0 +1,34 @@
+from src.application.services.chunked_analysis import merge_property_data, merge_risks
+
+
+def test_merge_risks_deduplicates_by_category_and_title():
+    merged = merge_risks(
+        [
+            [{"category": "structural", "severity": "medium", "title": "Houten paalfundering"}],
+            [
+                {"category": "structural", "severity": "high", "title": "Houten  paalfundering!"},
+                {"category": "legal", "severity": "low", "title": "Erfpacht"},
+            ],
+        ]
+    )
+
+    assert [(r["title"], r["severity"]) for r in merged] == [
+        ("Houten  paalfundering!", "high"),
+        ("Erfpacht", "low"),
+    ]
+
+
+def test_merge_property_data_prefers_confirmed_values():
+    merged = merge_property_data(
+        [
+            {"year_built": 1935, "conditions": ["Erfpacht"], "confidence_notes": {"year_built": "inferred"}},
+            {"year_built": 1930, "city": "Amsterdam", "conditions": ["Erfpacht", "Asbest"],
+             "confidence_notes": {"year_built": "confirmed"}},
+            {"year_built": 1931, "confidence_notes": {"year_built": "confirmed"}},
+        ]
+    )
+
+    assert merged["year_built"] == 1930
+    assert merged["city"] == "Amsterdam"
+    assert merged["conditions"] == ["Erfpacht", "Asbest"]
+    assert merged["confidence_notes"] == {"year_built": "confirmed"}
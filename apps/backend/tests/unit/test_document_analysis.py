@@ -0,0 +1,544 @@
+import asyncio
+from datetime import datetime
+from pathlib import Path
+from uuid import UUID, uuid4
+
+import pytest
+
+from src.application.services.document_analysis import DocumentAnalysisService
+from src.application.services.partial_results import PartialResults
+from src.config import settings
+from src.domain.enums import AnalysisStatus, DocumentType
+from src.domain.interfaces.ai_gateway import AIGateway
+from src.domain.interfaces.document_repository import DocumentRepository
+from src.domain.interfaces.document_storage import DocumentStorage
+from src.domain.models.document import Document
+from src.infrastructure.ai.caching_gateway import CachingAIGateway, bypass_ai_cache
+from src.infrastructure.cache.disk_cache import DiskCache
+from src.infrastructure.database.repositories.checkpoint_repo import SQLCheckpointStore
+from src.infrastructure.pdf.corpus import RedactedText
+
+
+class FakeAI(AIGateway):
+    def __init__(self):
+        self.calls: list[str] = []
+
+    async def classify_document(self, text: str) -> DocumentType:
+        self.calls.append("classify")
+        return DocumentType.PROPERTY_LISTING
+
+    async def extract_property_data(
+        self, text: str, doc_type: DocumentType, fields: list[str] | None = None
+    ) -> dict:
+        self.calls.append("extract")
+        self.requested_fields = fields
+        return {"address": "Keizersgracht 1", "asking_price": 500000}
+
+    async def detect_risks(self, text: str, doc_type: DocumentType, on_item=None) -> list[dict]:
+        self.calls.append("risks")
+        self.risk_text = text
+        risks = [
+            {
+                "category": "structural",
+                "severity": "medium",
+                "title": "Houten paalfundering",
+                "description": "Fundering uit 1920",
+            }
+        ]
+        for risk in risks:
+            if on_item is not None:
+                on_item("risks", risk)
+        return risks
+
+    async def identify_strengths_weaknesses(
+        self, text: str, property_data: dict, on_item=None
+    ) -> dict:
+        self.calls.append("strengths")
+        self.strengths_text = text
+        result = {"strengths": ["Centrale ligging"], "weaknesses": ["Geen tuin"]}
+        for field, items in result.items():
+            for item in items:
+                if on_item is not None:
+                    on_item(field, item)
+        return result
+
+
+class FakeRepo(DocumentRepository):
+    def __init__(self, docs: list[Document]):
+        self.docs = {d.id: d for d in docs}
+        self.batches: list[int] = []
+        self.claims: set[UUID] = set()
+
+    async def save(self, document: Document) -> Document:
+        self.docs[document.id] = document
+        return document
+
+    async def save_many(self, documents: list[Document]) -> list[Document]:
+        self.batches.append(len(documents))
+        for document in documents:
+            self.docs[document.id] = document
+        return documents
+
+    async def get_by_id(self, doc_id: UUID) -> Document | None:
+        return self.docs.get(doc_id)
+
+    async def get_by_session(self, session_id: UUID) -> list[Document]:
+        return [d for d in self.docs.values() if d.session_id == session_id]
+
+    async def claim_preprocessing(self, doc_id: UUID, seconds: float) -> bool:
+        if self.docs[doc_id].processed_at or doc_id in self.claims:
+            return False
+        self.claims.add(doc_id)
+        return True
+
+    async def release_preprocessing(self, doc_ids: list[UUID]) -> None:
+        self.claims.difference_update(doc_ids)
+
+    async def delete(self, doc_id: UUID) -> bool:
+        return self.docs.pop(doc_id, None) is not None
+
+    async def delete_by_session(self, session_id: UUID) -> int:
+        ids = [d.id for d in self.docs.values() if d.session_id == session_id]
+        for doc_id in ids:
+            del self.docs[doc_id]
+        return len(ids)
+
+
+class FakeStorage(DocumentStorage):
+    async def store(self, session_id: UUID, filename: str, content: bytes) -> str:
+        raise NotImplementedError
+
+    async def retrieve(self, file_path: str) -> bytes:
+        raise AssertionError("preprocessed documents must not be re-read")
+
+    async def local_path(self, file_path: str) -> Path | None:
+        raise AssertionError("preprocessed documents must not be re-read")
+
+    async def delete(self, file_path: str) -> bool:
+        return True
+
+    async def delete_session(self, session_id: UUID) -> int:
+        return 0
+
+    async def get_session_size(self, session_id: UUID) -> int:
+        return 0
+
+
+def make_doc(session_id: UUID, **kwargs) -> Document:
+    return Document(
+        session_id=session_id,
+        filename="brochure.pdf",
+        extracted_text="Vraagprijs € 500.000 k.k. Keizersgracht 1, Amsterdam.",
+        **kwargs,
+    )
+
+
+async def test_run_analysis_skips_preprocessed_documents():
+    session_id = uuid4()
+    doc = make_doc(
+        session_id,
+        document_type=DocumentType.ENERGY_LABEL,
+        processed_at=datetime.utcnow(),
+    )
+    ai = FakeAI()
+    service = DocumentAnalysisService(ai, FakeRepo([doc]), FakeStorage())
+
+    result = await service.run_analysis(session_id)
+
+    assert result.status == AnalysisStatus.COMPLETE
+    assert "classify" not in ai.calls
+    assert doc.document_type == DocumentType.ENERGY_LABEL
+
+
+async def test_run_analysis_waits_for_documents_preprocessed_on_upload(monkeypatch):
+    from src.application.services import document_analysis
+
+    monkeypatch.setattr(document_analysis, "PREPROCESS_POLL_SECONDS", 0.01)
+    session_id = uuid4()
+    doc = make_doc(session_id)
+    repo = FakeRepo([doc])
+    repo.claims.add(doc.id)
+    ai = FakeAI()
+
+    async def preprocess_on_upload():
+        await asyncio.sleep(0.05)
+        doc.document_type = DocumentType.ENERGY_LABEL
+        doc.processed_at = datetime.utcnow()
+        await repo.release_preprocessing([doc.id])
+
+    upload = asyncio.create_task(preprocess_on_upload())
+    result = await DocumentAnalysisService(ai, repo, FakeStorage()).run_analysis(session_id)
+    await upload
+
+    assert result.status == AnalysisStatus.COMPLETE
+    assert "classify" not in ai.calls
+    assert doc.document_type == DocumentType.ENERGY_LABEL
+
+
+async def test_documents_are_redacted_off_the_event_loop(monkeypatch):
+    import threading
+
+    from src.infrastructure.pdf.corpus import DocumentRedactor
+
+    threads = []
+    redact = DocumentRedactor.redact
+
+    def recording_redact(self, text):
+        threads.append(threading.get_ident())
+        return redact(self, text)
+
+    monkeypatch.setattr(DocumentRedactor, "redact", recording_redact)
+    session_id = uuid4()
+    doc = make_doc(session_id, processed_at=datetime.utcnow())
+    await DocumentAnalysisService(FakeAI(), FakeRepo([doc]), FakeStorage()).run_analysis(session_id)
+
+    assert threads
+    assert threading.get_ident() not in threads
+
+
+async def test_prepare_document_classifies_once():
+    doc = make_doc(uuid4())
+    ai = FakeAI()
+    service = DocumentAnalysisService(ai, FakeRepo([doc]), FakeStorage())
+
+    await service.prepare_document(doc)
+    await service.prepare_document(doc)
+
+    assert ai.calls == ["classify"]
+    assert doc.document_type == DocumentType.PROPERTY_LISTING
+    assert doc.processed_at is not None
+
+
+async def test_locally_parsed_fields_skip_ai_extraction():
+    session_id = uuid4()
+    doc = make_doc(session_id, processed_at=datetime.utcnow())
+    doc.extracted_text = (
+        "Adres: Keizersgracht 1, 1015 CJ Amsterdam\nVraagprijs € 500.000 k.k.\n"
+        "Woonoppervlakte: 85 m²\nBouwjaar: 1930\nEnergielabel: C"
+    )
+    ai = FakeAI()
+    service = DocumentAnalysisService(ai, FakeRepo([doc]), FakeStorage())
+
+    result = await service.run_analysis(session_id)
+
+    assert "extract" not in ai.calls
+    assert result.property_data["asking_price"] == 500000.0
+    assert result.property_data["confidence_notes"]["energy_label"] == "confirmed"
+
+
+async def test_ai_is_asked_only_for_missing_fields():
+    session_id = uuid4()
+    doc = make_doc(session_id, processed_at=datetime.utcnow())
+    doc.extracted_text = "Bouwjaar: 1930\nEnergielabel: C"
+    ai = FakeAI()
+    service = DocumentAnalysisService(ai, FakeRepo([doc]), FakeStorage())
+
+    result = await service.run_analysis(session_id)
+
+    assert "year_built" not in ai.requested_fields
+    assert "asking_price" in ai.requested_fields
+    assert result.property_data["year_built"] == 1930
+    assert result.property_data["address"] == "Keizersgracht 1"
+
+
+async def test_revision_records_changed_pages():
+    session_id = uuid4()
+    previous = make_doc(session_id, page_hashes=["a", "b", "c"], created_at=datetime(2026, 1, 1))
+    revised = make_doc(session_id, page_hashes=["a", "b2", "c"], created_at=datetime(2026, 1, 2))
+    service = DocumentAnalysisService(FakeAI(), FakeRepo([previous, revised]), FakeStorage())
+
+    await service._diff_against_previous(revised)
+
+    assert revised.revision_of == previous.id
+    assert revised.changed_pages == [2]
+
+
+async def test_revisions_extracted_together_link_newer_to_older():
+    session_id = uuid4()
+    v1 = make_doc(session_id, created_at=datetime(2026, 1, 1))
+    v2 = make_doc(session_id, created_at=datetime(2026, 1, 2))
+    v1.extracted_text = v2.extracted_text = None
+    hashes = {v1.id: ["a", "b", "c"], v2.id: ["a", "b2", "c"]}
+    service = DocumentAnalysisService(FakeAI(), FakeRepo([v1, v2]), FakeStorage())
+
+    async def extract(doc):
+        doc.extracted_text = "Vraagprijs € 500.000 k.k."
+        doc.page_hashes = hashes[doc.id]
+
+    service._extract_text = extract
+    # Newest first, as a listing might return them
+    await service._prepare_documents([v2, v1], [v2, v1])
+
+    assert v2.revision_of == v1.id and v2.changed_pages == [2]
+    assert v1.revision_of is None
+
+
+async def test_ai_calls_share_one_redacted_corpus():
+    session_id = uuid4()
+    doc = make_doc(session_id, processed_at=datetime.utcnow())
+    doc.extracted_text += " Makelaar: info@makelaar.nl"
+    ai = FakeAI()
+    service = DocumentAnalysisService(ai, FakeRepo([doc]), FakeStorage())
+
+    await service.run_analysis(session_id)
+
+    assert isinstance(ai.risk_text, RedactedText)
+    assert "info@makelaar.nl" not in ai.risk_text
+    assert "--- brochure.pdf (other) ---" in ai.risk_text
+
+
+class SlowClassifyAI(FakeAI):
+    def __init__(self):
+        super().__init__()
+        self.active = 0
+        self.peak = 0
+
+    async def classify_document(self, text: str) -> DocumentType:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if "kapot" in text:
+            raise RuntimeError("classification failed")
+        return await super().classify_document(text)
+
+
+async def test_documents_are_classified_concurrently_and_saved_once(monkeypatch):
+    monkeypatch.setattr(settings, "analysis_document_concurrency", 3)
+    session_id = uuid4()
+    docs = [make_doc(session_id) for _ in range(8)]
+    docs[2].extracted_text = "kapot document"
+    ai = SlowClassifyAI()
+    repo = FakeRepo(docs)
+    service = DocumentAnalysisService(ai, repo, FakeStorage())
+
+    result = await service.run_analysis(session_id)
+
+    assert result.status == AnalysisStatus.COMPLETE
+    assert ai.peak == 3
+    assert ai.calls.count("classify") == 7
+    assert repo.batches == [8]
+    assert docs[2].processed_at is None
+    assert all(d.processed_at for i, d in enumerate(docs) if i != 2)
+
+
+class TimelineAI(FakeAI):
+    def __init__(self, events: list[str]):
+        super().__init__()
+        self.events = events
+
+    async def extract_property_data(
+        self, text: str, doc_type: DocumentType, fields: list[str] | None = None
+    ) -> dict:
+        self.events.append("extract:start")
+        await asyncio.sleep(0.02)
+        self.events.append("extract:end")
+        return await super().extract_property_data(text, doc_type, fields)
+
+    async def detect_risks(self, text: str, doc_type: DocumentType, on_item=None) -> list[dict]:
+        self.events.append("risks:start")
+        return await super().detect_risks(text, doc_type, on_item)
+
+
+class FakeMarket:
+    def __init__(self, events: list[str]):
+        self.events = events
+
+    async def enrich(self, property_data: dict) -> dict:
+        self.events.append("market:start")
+        return {"bag_data": {"postal_code": property_data["postal_code"]}}
+
+
+async def test_risks_and_market_overlap_property_extraction():
+    session_id = uuid4()
+    doc = make_doc(session_id, processed_at=datetime.utcnow())
+    # Address is known locally, the asking price still needs the AI
+    doc.extracted_text = "Adres: Keizersgracht 1, 1015 CJ Amsterdam\nBouwjaar: 1930"
+    events: list[str] = []
+    service = DocumentAnalysisService(
+        TimelineAI(events), FakeRepo([doc]), FakeStorage(), FakeMarket(events)
+    )
+
+    result = await service.run_analysis(session_id)
+
+    assert result.status == AnalysisStatus.COMPLETE
+    assert events.index("risks:start") < events.index("extract:end")
+    assert events.index("market:start") < events.index("extract:end")
+    assert result.market_position == {"bag_data": {"postal_code": "1015 CJ"}}
+
+
+class ChunkAwareAI(FakeAI):
+    def __init__(self):
+        super().__init__()
+        self.risk_chunks: list[str] = []
+
+    async def detect_risks(self, text: str, doc_type: DocumentType, on_item=None) -> list[dict]:
+        self.risk_chunks.append(text)
+        if "asbest" in text:
+            return [{"category": "structural", "severity": "high", "title": "Asbest"}]
+        return await super().detect_risks(text, doc_type, on_item)
+
+
+async def test_long_sessions_are_analyzed_chunk_by_chunk(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "analysis_map_reduce", True)
+    monkeypatch.setattr(settings, "analysis_chunk_tokens", 100)
+    session_id = uuid4()
+    brochure = make_doc(session_id, processed_at=datetime.utcnow())
+    brochure.extracted_text = "\n\n".join(f"Kamer {i}: ruim en licht. " * 10 for i in range(4))
+    ai = ChunkAwareAI()
+    service = DocumentAnalysisService(
+        CachingAIGateway(ai, DiskCache(tmp_path, 1024 * 1024)), FakeRepo([brochure]), FakeStorage()
+    )
+
+    await service.run_analysis(session_id)
+    first_run = len(ai.risk_chunks)
+
+    report = make_doc(session_id, processed_at=datetime.utcnow())
+    report.filename = "keuring.pdf"
+    report.extracted_text = "Dakbeschot bevat asbest."
+    service._doc_repo.docs[report.id] = report
+    result = await service.run_analysis(session_id)
+
+    assert first_run > 1
+    # Only the new document's chunk reaches the model on the second run
+    assert len(ai.risk_chunks) == first_run + 1
+    titles = [f.title for f in result.risk_score.findings]
+    assert titles == ["Houten paalfundering", "Asbest"]
+
+
+async def test_confident_local_classification_skips_ai():
+    doc = make_doc(uuid4())
+    doc.extracted_text = "Energielabel woning (NTA 8800), geregistreerd in EP-Online: labelklasse B."
+    ai = FakeAI()
+    service = DocumentAnalysisService(ai, FakeRepo([doc]), FakeStorage())
+
+    await service.classify_document(doc)
+
+    assert ai.calls == []
+    assert doc.document_type == DocumentType.ENERGY_LABEL
+
+
+async def test_findings_are_published_while_the_analysis_runs():
+    session_id = uuid4()
+    doc = make_doc(session_id, processed_at=datetime.utcnow())
+    snapshots = []
+
+    async def publish(snapshot):
+        snapshots.append(snapshot)
+
+    partial = PartialResults(publish)
+    service = DocumentAnalysisService(FakeAI(), FakeRepo([doc]), FakeStorage())
+
+    result = await service.run_analysis(session_id, partial)
+    await partial.aclose()
+
+    assert result.status == AnalysisStatus.COMPLETE
+    assert snapshots
+    last = snapshots[-1]
+    assert last["property_data"]["address"] == "Keizersgracht 1"
+    assert last["strengths"] == result.strengths and last["weaknesses"] == result.weaknesses
+    assert [f.title for f in last["risk_score"].findings] == ["Houten paalfundering"]
+
+
+async def test_strengths_read_the_most_relevant_passages(monkeypatch):
+    monkeypatch.setattr(settings, "analysis_strengths_context_chars", 300)
+    session_id = uuid4()
+    doc = make_doc(session_id, processed_at=datetime.utcnow())
+    garden = "De zonnige tuin op het zuiden is een pluspunt."
+    doc.extracted_text = "\n\n".join(["Inhoudsopgave", "Algemene voorwaarden. " * 30, garden])
+    ai = FakeAI()
+    service = DocumentAnalysisService(ai, FakeRepo([doc]), FakeStorage())
+
+    await service.run_analysis(session_id)
+
+    assert garden in ai.strengths_text
+    assert "Inhoudsopgave" not in ai.strengths_text
+    assert garden in ai.risk_text and "Inhoudsopgave" in ai.risk_text
+
+
+class FailingStrengthsAI(FakeAI):
+    async def identify_strengths_weaknesses(self, text: str, property_data: dict, on_item=None) -> dict:
+        self.calls.append("strengths")
+        raise RuntimeError("Gemini unavailable")
+
+
+async def test_rerun_resumes_from_checkpointed_stages(db_engine):
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    checkpoints = SQLCheckpointStore(
+        async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    )
+    session_id = uuid4()
+    doc = make_doc(session_id, processed_at=datetime.utcnow())
+    repo = FakeRepo([doc])
+
+    def service(ai: AIGateway) -> DocumentAnalysisService:
+        return DocumentAnalysisService(ai, repo, FakeStorage(), checkpoints=checkpoints)
+
+    failing = FailingStrengthsAI()
+    with pytest.raises(RuntimeError, match="Gemini unavailable"):
+        await service(failing).run_analysis(session_id)
+    assert sorted(failing.calls) == ["extract", "risks", "strengths"]
+
+    # Only the stage that failed runs again
+    retry = FakeAI()
+    result = await service(retry).run_analysis(session_id)
+    assert result.status == AnalysisStatus.COMPLETE
+    assert retry.calls == ["strengths"]
+    assert result.property_data["address"] == "Keizersgracht 1"
+    assert [f.title for f in result.risk_score.findings] == ["Houten paalfundering"]
+
+    again = FakeAI()
+    assert (await service(again).run_analysis(session_id)).status == AnalysisStatus.COMPLETE
+    assert again.calls == []
+
+    # Changed text changes every stage's inputs
+    doc.extracted_text += "\nDe fundering is in 2010 hersteld."
+    changed = FakeAI()
+    await service(changed).run_analysis(session_id)
+    assert sorted(changed.calls) == ["extract", "risks", "strengths"]
+
+    # Bypassing the AI cache bypasses checkpoints as well
+    bypassed = FakeAI()
+    with bypass_ai_cache():
+        await service(bypassed).run_analysis(session_id)
+    assert sorted(bypassed.calls) == ["extract", "risks", "strengths"]
+
+
+async def test_added_documents_are_analyzed_incrementally():
+    session_id = uuid4()
+    brochure = make_doc(session_id, processed_at=datetime.utcnow())
+    repo = FakeRepo([brochure])
+    first = await DocumentAnalysisService(FakeAI(), repo, FakeStorage()).run_analysis(session_id)
+    assert first.document_ids == [str(brochure.id)]
+
+    report = Document(
+        session_id=session_id,
+        filename="bouwkundig.pdf",
+        extracted_text="Bouwkundig rapport. In de kruipruimte is asbest aangetroffen.",
+        document_type=DocumentType.INSPECTION_REPORT,
+        processed_at=datetime.utcnow(),
+    )
+    repo.docs[report.id] = report
+    ai = ChunkAwareAI()
+    result = await DocumentAnalysisService(ai, repo, FakeStorage()).run_analysis(
+        session_id, previous=first
+    )
+
+    assert result.status == AnalysisStatus.COMPLETE
+    assert sorted(result.document_ids) == sorted([str(brochure.id), str(report.id)])
+    # Only the new document is read, and only for fields still unknown
+    assert "address" not in ai.requested_fields and "asking_price" not in ai.requested_fields
+    assert ai.risk_chunks and all("Keizersgracht" not in c for c in ai.risk_chunks)
+    assert "Keizersgracht" not in ai.strengths_text
+    assert sorted(f.title for f in result.risk_score.findings) == ["Asbest", "Houten paalfundering"]
+    assert result.property_data["asking_price"] == 500000
+    assert result.strengths == ["Centrale ligging"]
+
+    # With nothing new the stored result stands, without AI calls
+    idle = FakeAI()
+    again = await DocumentAnalysisService(idle, repo, FakeStorage()).run_analysis(
+        session_id, previous=result
+    )
+    assert again.status == AnalysisStatus.COMPLETE and idle.calls == []
+    assert len(again.risk_score.findings) == 2
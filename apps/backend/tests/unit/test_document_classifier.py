@@ -0,0 +1,24 @@
+from src.domain.enums import DocumentType
+from src.infrastructure.pdf.document_classifier import KeywordDocumentClassifier
+
+
+def test_classifies_by_vocabulary():
+    c = KeywordDocumentClassifier()
+
+    agreement = c.classify(
+        "KOOPOVEREENKOMST. De koopsom bedraagt € 475.000. De koper stelt een waarborgsom."
+    )
+    hoa = c.classify("Notulen ALV Vereniging van Eigenaren. Het MJOP en het reservefonds.")
+
+    assert agreement.document_type == DocumentType.PURCHASE_AGREEMENT
+    assert hoa.document_type == DocumentType.HOA_DOCUMENTS
+    assert agreement.confidence > 0.75 and hoa.confidence > 0.75
+
+
+def test_thin_or_mixed_evidence_is_not_confident():
+    c = KeywordDocumentClassifier()
+
+    assert c.classify("Zie bijlage.").confidence == 0.0
+    assert c.classify("Vraagprijs op aanvraag.").confidence < 0.75
+    mixed = c.classify("Bouwkundig rapport bij de koopovereenkomst, inclusief energielabel.")
+    assert mixed.confidence < 0.75
@@ -0,0 +1,65 @@
+from src.infrastructure.pdf.extractor import PDFExtractor
+from src.infrastructure.pdf.sandbox import ExtractionBudget, SandboxPool, worker_metrics
+from tests.unit.test_pdf_extractor import make_pdf
+
+
+async def test_page_limit_returns_partial_pages(tmp_path):
+    path = tmp_path / "vve.pdf"
+    path.write_bytes(make_pdf([f"VvE notulen pagina {i}" for i in range(1, 6)]))
+    pool = SandboxPool(1, ExtractionBudget(timeout_s=30, max_pages=2, max_rss_mb=1024))
+    try:
+        pages = await PDFExtractor(sandbox=pool).extract_pages(path)
+    finally:
+        pool.shutdown()
+    assert [p.page_number for p in pages] == [1, 2]
+    assert "pagina 2" in pages[1].text
+
+
+async def test_timeout_kills_worker(tmp_path):
+    path = tmp_path / "rapport.pdf"
+    path.write_bytes(make_pdf(["Bouwkundig rapport"]))
+    before = worker_metrics()["killed_timeout"]
+    # Worker start-up alone exceeds a zero-second budget
+    pool = SandboxPool(1, ExtractionBudget(timeout_s=0, max_pages=10, max_rss_mb=1024))
+    try:
+        pages = await PDFExtractor(sandbox=pool).extract_pages(path)
+    finally:
+        pool.shutdown()
+    assert pages == []
+    assert worker_metrics()["killed_timeout"] == before + 1
+    assert pool.alive == 0
+
+
+async def test_budget_is_checked_while_pages_keep_arriving(tmp_path):
+    path = tmp_path / "notulen.pdf"
+    path.write_bytes(make_pdf([f"VvE notulen pagina {i}" for i in range(1, 6)]))
+    pool = SandboxPool(1, ExtractionBudget(timeout_s=30, max_pages=10, max_rss_mb=1024))
+    try:
+        # Warm the worker so no poll times out while it starts
+        assert len(await PDFExtractor(sandbox=pool).extract_pages(path)) == 5
+        before = worker_metrics()["killed_memory"]
+        pool.budget.max_rss_mb = 0
+        pages = await PDFExtractor(sandbox=pool).extract_pages(path)
+    finally:
+        pool.shutdown()
+    assert [p.page_number for p in pages] == [1]
+    assert worker_metrics()["killed_memory"] == before + 1
+
+
+async def test_sandboxed_page_ranges_are_counted_in_a_worker(tmp_path, monkeypatch):
+    from src.infrastructure.pdf import extractor
+
+    # Workers are spawned, so only a count in the API process is recorded
+    counted = []
+    monkeypatch.setattr(extractor, "_count_pages", counted.append)
+    path = tmp_path / "notulen.pdf"
+    path.write_bytes(make_pdf([f"VvE notulen pagina {i}" for i in range(1, 6)]))
+    pool = SandboxPool(2, ExtractionBudget(timeout_s=30, max_pages=10, max_rss_mb=1024))
+    try:
+        pages = await PDFExtractor(parallel=True, parallel_threshold=2, sandbox=pool).extract_pages(
+            path
+        )
+    finally:
+        pool.shutdown()
+    assert [p.page_number for p in pages] == [1, 2, 3, 4, 5]
+    assert counted == []
@@ -0,0 +1,54 @@
+from src.infrastructure.pdf.field_parser import StructuredFieldParser
+
+BROCHURE = """Te koop: Keizersgracht 123-2, 1015 CJ Amsterdam
+Vraagprijs € 625.000 k.k.
+Woonoppervlakte: 85 m²
+Bouwjaar: 1930
+VvE bijdrage € 185,50 per maand
+3 kamers"""
+
+
+def test_parses_brochure_fields():
+    fields = StructuredFieldParser().parse(BROCHURE)
+    assert fields.values["address"] == "Keizersgracht 123-2"
+    assert fields.values["postal_code"] == "1015 CJ"
+    assert fields.values["city"] == "Amsterdam"
+    assert fields.values["asking_price"] == 625000.0
+    assert fields.values["square_meters"] == 85.0
+    assert fields.values["year_built"] == 1930
+    assert fields.values["hoa_monthly_cost"] == 185.5
+    assert fields.values["num_rooms"] == 3
+
+
+def test_reads_label_from_table_rows():
+    tables = [[["Energielabel", "A++"], ["Registratiedatum", "01-03-2024"]]]
+    fields = StructuredFieldParser().parse("", tables)
+    assert fields.values["energy_label"] == "A++"
+    assert fields.confidence["energy_label"] >= 0.9
+
+
+def test_conflicting_values_lower_confidence():
+    fields = StructuredFieldParser().parse("Bouwjaar: 1930\nBouwjaar: 1965")
+    assert fields.confidence["year_built"] < 0.9
+    assert "year_built" in fields.missing(0.9)
+
+
+def test_only_a_labelled_address_is_trusted():
+    contract = (
+        "Notariskantoor Jansen, Herengracht 500, 1017 CB Amsterdam\n"
+        "Het verkochte: appartementsrecht plaatselijk bekend Keizersgracht 123-2, 1015 CJ Amsterdam"
+    )
+    fields = StructuredFieldParser().parse(contract)
+    assert fields.values["address"] == "Keizersgracht 123-2"
+    assert fields.values["postal_code"] == "1015 CJ"
+    assert fields.confidence["address"] >= 0.9
+
+    fields = StructuredFieldParser().parse("Notariskantoor Jansen, Herengracht 500, 1017 CB Amsterdam")
+    assert fields.confidence["address"] < 0.9
+    assert "address" in fields.missing(0.9)
+
+
+def test_reads_capitalised_postcode_label():
+    fields = StructuredFieldParser().parse("Postcode: 1015 CJ\nPOSTCODE 1015CJ\npostcode 1015 cj")
+    assert fields.values["postal_code"] == "1015 CJ"
+    assert fields.confidence["postal_code"] >= 0.9
@@ -0,0 +1,237 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.domain.enums import AnalysisStatus, JobStatus
+from src.domain.models.job import AnalysisJob
+from src.infrastructure.database.models import AnalysisJobModel, AnalysisResultModel
+from src.infrastructure.database.repositories.job_repo import SQLJobQueue
+from src.worker import AnalysisWorker
+
+
+@pytest.fixture
+def session_factory(db_engine):
+    return async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def enqueue(session_factory, analysis_id="a1", max_attempts=3) -> AnalysisJob:
+    # One session per analysis: a session has one active job at most
+    session_id = f"s-{analysis_id}"
+    async with session_factory() as db:
+        db.add(AnalysisResultModel(id=analysis_id, session_id=session_id, status=AnalysisStatus.PENDING))
+        await db.commit()
+        return await SQLJobQueue(db).enqueue(
+            AnalysisJob(analysis_id=analysis_id, session_id=session_id, max_attempts=max_attempts)
+        )
+
+
+async def expire_leases(session_factory) -> None:
+    async with session_factory() as db:
+        await db.execute(
+            update(AnalysisJobModel).values(lease_expires_at=datetime.utcnow() - timedelta(seconds=1))
+        )
+        await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_a_job_is_leased_by_one_worker_only(session_factory):
+    job = await enqueue(session_factory)
+    async with session_factory() as a, session_factory() as b:
+        first = await SQLJobQueue(a).lease("worker-a", 5, 60)
+        second = await SQLJobQueue(b).lease("worker-b", 5, 60)
+
+    assert [j.id for j in first] == [job.id]
+    assert first[0].status == JobStatus.RUNNING and first[0].attempts == 1
+    assert second == []
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_moves_to_another_worker(session_factory):
+    job = await enqueue(session_factory)
+    async with session_factory() as db:
+        queue = SQLJobQueue(db)
+        await queue.lease("worker-a", 1, 60)
+        assert await queue.heartbeat(job.id, "worker-a", 60)
+
+    await expire_leases(session_factory)
+    async with session_factory() as db:
+        queue = SQLJobQueue(db)
+        [again] = await queue.lease("worker-b", 1, 60)
+        assert again.lease_owner == "worker-b" and again.attempts == 2
+        # The stalled worker finds out at its next heartbeat
+        assert not await queue.heartbeat(job.id, "worker-a", 60)
+        assert not await queue.complete(job.id, "worker-a")
+        assert await queue.complete(job.id, "worker-b")
+
+
+@pytest.mark.asyncio
+async def test_failed_jobs_back_off_and_give_up_after_max_attempts(session_factory):
+    job = await enqueue(session_factory, max_attempts=2)
+    async with session_factory() as db:
+        queue = SQLJobQueue(db)
+        await queue.lease("worker", 1, 60)
+        assert await queue.fail(job.id, "worker", "boom")
+        # Backing off: not due yet
+        assert await queue.lease("worker", 1, 60) == []
+
+        assert await queue.fail(job.id, "worker", "boom") is False
+        await db.execute(update(AnalysisJobModel).values(available_at=datetime.utcnow()))
+        await db.commit()
+        await queue.lease("worker", 1, 60)
+        assert await queue.fail(job.id, "worker", "boom again")
+
+        model = (await db.execute(select(AnalysisJobModel))).scalar_one()
+        assert model.status == JobStatus.FAILED and model.error == "boom again"
+
+
+@pytest.mark.asyncio
+async def test_queue_position_and_stats(session_factory):
+    jobs = [await enqueue(session_factory, analysis_id=f"a{i}") for i in range(3)]
+    async with session_factory() as db:
+        queue = SQLJobQueue(db)
+        assert [await queue.position(j) for j in jobs] == [1, 2, 3]
+        await queue.lease("worker", 1, 60)
+        stats = await queue.stats()
+        assert stats["queued"] == 2 and stats["running"] == 1
+        assert await queue.position(await queue.get_active("a2")) == 2
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_at_most_its_concurrency(session_factory):
+    for i in range(3):
+        await enqueue(session_factory, analysis_id=f"a{i}")
+    release = asyncio.Event()
+    started = []
+
+    async def run(session_id, analysis_id, bypass_cache, incremental):
+        started.append(analysis_id)
+        await release.wait()
+
+    worker = AnalysisWorker(session_factory, run, concurrency=2, visibility_seconds=60, worker_id="w")
+    assert await worker.poll_once() == 2
+    assert await worker.poll_once() == 0
+    await asyncio.sleep(0)
+    assert sorted(started) == ["a0", "a1"]
+
+    release.set()
+    await worker.drain(5)
+    assert worker.completed == 2
+    assert await worker.poll_once() == 1
+    await worker.drain(5)
+    async with session_factory() as db:
+        assert (await SQLJobQueue(db).stats())["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_worker_stops_an_analysis_whose_lease_was_lost(session_factory):
+    job = await enqueue(session_factory)
+    cancelled = asyncio.Event()
+
+    async def run(session_id, analysis_id, bypass_cache, incremental):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    worker = AnalysisWorker(session_factory, run, concurrency=1, visibility_seconds=0.3, worker_id="w")
+    await worker.poll_once()
+    # Another worker takes over the job
+    async with session_factory() as db:
+        await db.execute(update(AnalysisJobModel).values(lease_owner="other"))
+        await db.commit()
+
+    await asyncio.wait_for(cancelled.wait(), 2)
+    await worker.drain(1)
+    assert worker.leases_lost == 1
+    async with session_factory() as db:
+        assert (await SQLJobQueue(db).get_active(job.analysis_id)).lease_owner == "other"
+
+
+@pytest.mark.asyncio
+async def test_worker_fails_the_analysis_of_an_abandoned_job(session_factory):
+    await enqueue(session_factory, max_attempts=1)
+    async with session_factory() as db:
+        await SQLJobQueue(db).lease("crashed", 1, 60)
+    await expire_leases(session_factory)
+
+    async def run(session_id, analysis_id, bypass_cache, incremental):
+        raise AssertionError("an exhausted job must not run again")
+
+    worker = AnalysisWorker(session_factory, run, concurrency=1, worker_id="w")
+    assert await worker.poll_once() == 0
+    async with session_factory() as db:
+        analysis = (await db.execute(select(AnalysisResultModel))).scalar_one()
+        job = (await db.execute(select(AnalysisJobModel))).scalar_one()
+    assert analysis.status == AnalysisStatus.FAILED
+    assert job.status == JobStatus.FAILED
+
+
+@pytest.mark.asyncio
+async def test_a_session_has_one_active_job(session_factory):
+    first = await enqueue(session_factory)
+    async with session_factory() as db:
+        queue = SQLJobQueue(db)
+        # Another process racing to start the same session's analysis
+        again = await queue.enqueue(AnalysisJob(analysis_id="a1", session_id="s-a1"))
+        assert again.id == first.id
+        assert (await queue.stats())["queued"] == 1
+
+        await queue.lease("worker", 1, 60)
+        assert await queue.complete(first.id, "worker")
+        later = await queue.enqueue(AnalysisJob(analysis_id="a1", session_id="s-a1"))
+        assert later.id != first.id
+
+
+@pytest.mark.asyncio
+async def test_worker_stops_a_cancelled_analysis(session_factory):
+    job = await enqueue(session_factory)
+    cancelled = asyncio.Event()
+
+    async def run(session_id, analysis_id, bypass_cache, incremental):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    # Long visibility: the heartbeat would not notice for a while
+    worker = AnalysisWorker(session_factory, run, concurrency=1, visibility_seconds=60, worker_id="w")
+    await worker.poll_once()
+    async with session_factory() as db:
+        assert (await SQLJobQueue(db).cancel(job.analysis_id)).id == job.id
+    await worker.poll_once()
+
+    await asyncio.wait_for(cancelled.wait(), 2)
+    await worker.drain(1)
+    assert worker.cancelled == 1 and worker.leases_lost == 0
+    async with session_factory() as db:
+        model = (await db.execute(select(AnalysisJobModel))).scalar_one()
+        assert await SQLJobQueue(db).cancel(job.analysis_id) is None
+    assert model.status == JobStatus.CANCELLED and model.active_session_id is None
+
+
+@pytest.mark.asyncio
+async def test_a_heartbeat_reports_a_cancelled_job_as_cancelled(session_factory):
+    job = await enqueue(session_factory)
+    cancelled = asyncio.Event()
+
+    async def run(session_id, analysis_id, bypass_cache, incremental):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    worker = AnalysisWorker(session_factory, run, concurrency=1, visibility_seconds=0.3, worker_id="w")
+    await worker.poll_once()
+    # No poll follows, so the heartbeat is the first to find out
+    async with session_factory() as db:
+        await SQLJobQueue(db).cancel(job.analysis_id)
+
+    await asyncio.wait_for(cancelled.wait(), 2)
+    await worker.drain(1)
+    assert worker.cancelled == 1 and worker.leases_lost == 0
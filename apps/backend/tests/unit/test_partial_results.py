@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+import pytest
+
+from src.application.services.partial_results import PartialResults
+from src.infrastructure.ai.json_stream import IncompleteJSONError, JSONItemStream
+
+ANSWER = {
+    "risks": [
+        {"category": "legal", "severity": "high", "title": "Erfpacht {afgekocht?}", "description": "Canon \"eeuwig\""},
+        {"category": "structural", "severity": "low", "title": "Dakgoot", "description": "Lekt"},
+    ],
+    "notes": {"risks": ["not a top-level list"]},
+}
+
+
+def test_items_are_emitted_as_soon_as_they_are_complete():
+    text = json.dumps(ANSWER)
+    parser = JSONItemStream()
+    emitted = []
+    for i in range(0, len(text), 7):
+        emitted.append(parser.feed(text[i : i + 7]))
+
+    items = [item for batch in emitted for item in batch]
+    assert items == [("risks", risk) for risk in ANSWER["risks"]]
+    # The first risk is out before the text reaches the second one
+    first = next(i for i, batch in enumerate(emitted) if batch)
+    assert first * 7 < text.index('"Dakgoot"')
+    assert parser.result() == ANSWER
+
+
+def test_a_cut_off_answer_is_not_a_result():
+    text = json.dumps({"strengths": ["Ruime tuin", "Rustige straat"], "weaknesses": ["Geen"]})
+    parser = JSONItemStream()
+    parser.feed(text[: text.index("Geen")])
+
+    with pytest.raises(IncompleteJSONError) as cut_off:
+        parser.result()
+    assert cut_off.value.items == {"strengths": ["Ruime tuin", "Rustige straat"]}
+
+
+async def test_changes_during_a_publish_are_folded_into_the_next():
+    published = []
+
+    async def publish(snapshot):
+        published.append(snapshot)
+        await asyncio.sleep(0.02)
+
+    partial = PartialResults(publish)
+    partial.add("strengths", "Ruime tuin")
+    await asyncio.sleep(0)
+    partial.add("strengths", "Rustige straat")
+    partial.add("weaknesses", "Geen parkeerplaats")
+    partial.add("risks", ANSWER["risks"][0])
+    partial.add("risks", ANSWER["risks"][0])
+    await partial.aclose()
+
+    assert len(published) == 2
+    assert published[-1]["strengths"] == ["Ruime tuin", "Rustige straat"]
+    assert published[-1]["weaknesses"] == ["Geen parkeerplaats"]
+    assert [f.title for f in published[-1]["risk_score"].findings] == ["Erfpacht {afgekocht?}"]
+    assert partial.time_to_first_item is not None
+
+
+async def test_failed_publishes_do_not_raise():
+    async def publish(snapshot):
+        raise RuntimeError("database is locked")
+
+    partial = PartialResults(publish)
+    partial.add("strengths", "Ruime tuin")
+    await partial.aclose()
+
+    assert partial.published == 0
@@ -0,0 +1,168 @@
+import os
+import time
+
+import fitz
+
+from src.infrastructure.cache.disk_cache import DiskCache, cache_scope
+from src.infrastructure.pdf.engine_selector import profile_page
+from src.infrastructure.pdf.extractor import (
+    PDFExtractor,
+    engine_stats,
+    shutdown_process_pool,
+)
+
+
+def make_pdf(pages: list[str]) -> bytes:
+    doc = fitz.open()
+    for text in pages:
+        page = doc.new_page()
+        page.insert_text((72, 72), text)
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+async def test_extracts_pages_in_order():
+    content = make_pdf(["Koopovereenkomst pagina een", "Bouwjaar 1930 pagina twee"])
+    pages = await PDFExtractor().extract_pages(content)
+    assert [p.page_number for p in pages] == [1, 2]
+    assert "pagina een" in pages[0].text
+    assert "Bouwjaar 1930" in pages[1].text
+
+
+async def test_streams_pages_from_path(tmp_path):
+    path = tmp_path / "rapport.pdf"
+    path.write_bytes(make_pdf([f"Bouwkundig rapport pagina {i}" for i in range(1, 4)]))
+    numbers = [page.page_number async for page in PDFExtractor().iter_pages(path)]
+    assert numbers == [1, 2, 3]
+
+
+async def test_cache_hit_skips_extraction(tmp_path, monkeypatch):
+    content = make_pdf(["Energielabel C, woonoppervlakte 85 m2, vraagprijs 425.000"])
+    extractor = PDFExtractor(cache=DiskCache(tmp_path, 1024 * 1024))
+    first = await extractor.extract_text(content)
+
+    def fail(_source, _stats):
+        raise AssertionError("extraction should not run on a cache hit")
+
+    monkeypatch.setattr(extractor, "_iter_extracted", fail)
+    assert await extractor.extract_text(content) == first
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=300)
+    cache.put("aa01", {"v": "x" * 100})
+    cache.put("bb02", {"v": "y" * 100})
+    old = time.time() - 60
+    os.utime(tmp_path / "bb" / "bb02.json", (old, old))
+    cache.put("cc03", {"v": "z" * 100})
+    assert cache.get("bb02") is None
+    assert cache.get("aa01") is not None
+    assert cache.get("cc03") is not None
+
+
+def test_disk_cache_expires_entries_by_write_time(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=1024, ttl_seconds=60)
+    cache.put("aa01", {"v": 1})
+    cache.put("bb02", {"v": 2})
+    # Read just now, but written before the TTL
+    old = time.time() - 120
+    os.utime(tmp_path / "aa" / "aa01.json", (time.time(), old))
+    assert cache.get("aa01") is None
+    assert not (tmp_path / "aa" / "aa01.json").exists()
+    assert cache.get("bb02") == {"v": 2}
+
+
+def test_disk_cache_forgets_the_entries_used_in_a_scope(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=1024)
+    cache.put("aa01", {"v": 1})
+    with cache_scope("session-a"):
+        cache.put("bb02", {"v": 2})
+        assert cache.get("aa01") == {"v": 1}
+    with cache_scope("session-b"):
+        cache.put("cc03", {"v": 3})
+    assert cache.forget_scope("session-a") == 2
+    assert cache.get("aa01") is None and cache.get("bb02") is None
+    assert cache.get("cc03") == {"v": 3}
+
+
+def test_disk_cache_counts_an_overwritten_entry_once(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=1024)
+    cache.put("aa01", {"v": "x" * 100})
+    cache.put("aa01", {"v": "x" * 100})
+    cache.put("aa01", {"v": "short"})
+    assert cache._size == cache._scan_size()
+
+
+def test_disk_cache_records_each_key_once_per_scope(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=1024)
+    with cache_scope("session-a"):
+        cache.put("aa01", {"v": 1})
+        for _ in range(3):
+            assert cache.get("aa01") == {"v": 1}
+        cache.put("aa01", {"v": 2})
+        cache.put("bb02", {"v": 3})
+    assert (tmp_path / "scopes" / "session-a.keys").read_text().split() == ["aa01", "bb02"]
+    assert cache.forget_scope("session-a") == 2
+
+    # Recorded again once the index is gone
+    with cache_scope("session-a"):
+        cache.put("aa01", {"v": 1})
+    assert cache.forget_scope("session-a") == 1
+
+
+async def test_parallel_extraction_matches_serial():
+    content = make_pdf([f"Inspectierapport pagina {i}" for i in range(1, 7)])
+    serial = await PDFExtractor().extract_pages(content)
+    try:
+        parallel = await PDFExtractor(
+            parallel=True, parallel_threshold=2
+        ).extract_pages(content)
+    finally:
+        shutdown_process_pool()
+    assert [p.page_number for p in parallel] == [1, 2, 3, 4, 5, 6]
+    assert [p.text for p in parallel] == [p.text for p in serial]
+
+
+def test_page_profile_routes_tables_to_pdfplumber():
+    doc = fitz.open()
+    plain = doc.new_page()
+    plain.insert_text((72, 72), "Een gewone pagina met doorlopende tekst over de woning.")
+    table = doc.new_page()
+    table.insert_text((72, 72), "Energielabel overzicht")
+    for row in range(4):
+        table.draw_line((50, 100 + row * 20), (500, 100 + row * 20))
+
+    plain, table = doc[0], doc[1]
+    assert not profile_page(plain, plain.get_text()).needs_layout
+    assert profile_page(table, table.get_text()).needs_layout
+    doc.close()
+
+
+async def test_reports_engine_per_page():
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Alleen tekst op deze pagina.")
+    grid = doc.new_page()
+    grid.insert_text((72, 72), "Tabel met kosten")
+    for row in range(5):
+        grid.draw_line((50, 100 + row * 20), (500, 100 + row * 20))
+    content = doc.tobytes()
+    doc.close()
+
+    pages = await PDFExtractor().extract_pages(content)
+    assert [p.engine for p in pages] == ["pymupdf", "pdfplumber"]
+
+
+async def test_revised_document_reuses_unchanged_pages(tmp_path):
+    extractor = PDFExtractor(cache=DiskCache(tmp_path, 1024 * 1024))
+    original = make_pdf(["Artikel 1 koopsom", "Artikel 2 levering", "Artikel 3 garanties"])
+    revised = make_pdf(["Artikel 1 koopsom", "Artikel 2 levering op 1 juni", "Artikel 3 garanties"])
+
+    first = await extractor.extract_pages(original)
+    cached_before = engine_stats()["pages"].get("cache", 0)
+    second = await extractor.extract_pages(revised)
+
+    assert engine_stats()["pages"].get("cache", 0) - cached_before == 2
+    assert first[0].content_hash == second[0].content_hash
+    assert first[1].content_hash != second[1].content_hash
+    assert "1 juni" in second[1].text
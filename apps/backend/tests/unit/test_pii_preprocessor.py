@@ -1,6 +1,15 @@
 from src.infrastructure.pdf.preprocessor import PIIPreprocessor
 
 
+def legacy_redact(p: PIIPreprocessor, text: str) -> str:
+    """The four sequential passes the single-pass pattern replaced."""
+    text = p.BSN_PATTERN.sub("[BSN_REDACTED]", text)
+    text = p.PHONE_PATTERN.sub("[PHONE_REDACTED]", text)
+    text = p.EMAIL_PATTERN.sub("[EMAIL_REDACTED]", text)
+    text = p.IBAN_PATTERN.sub("[IBAN_REDACTED]", text)
+    return text
+
+
 def test_bsn_redaction():
     p = PIIPreprocessor()
     assert "[BSN_REDACTED]" in p.redact("BSN: 123456789")
@@ -21,3 +30,48 @@ def test_preserves_normal_text():
     p = PIIPreprocessor()
     text = "De woning is gelegen aan de Keizersgracht."
     assert p.redact(text) == text
+
+
+def test_single_pass_matches_sequential_passes():
+    p = PIIPreprocessor()
+    contacts = [
+        "BSN 123.456.789",
+        "tel. 020-1234567",
+        "+31 6 12345678",
+        "mail: j.devries@example.nl",
+        "IBAN NL91 ABNA 0417 1643 00",
+        "kenmerk 0201234567890",
+        "j.devries@example.nl of 0612345678",
+        "jan.123456789@x.nl",
+        "verhuur.0612345678.info@example.nl",
+    ]
+    text = "\n\n".join(
+        f"De maandelijkse bijdrage bedraagt € 185,50. Contact: {contact}." for contact in contacts
+    )
+    assert p.redact(text) == legacy_redact(p, text)
+
+
+def test_numbers_inside_an_address_are_redacted_first():
+    p = PIIPreprocessor()
+    text = "Mail jan.123456789@x.nl of verhuur.0612345678.info@example.nl."
+    assert p.redact(text) == legacy_redact(p, text)
+    assert p.redact(text) == (
+        "Mail jan.[BSN_REDACTED]@x.nl of verhuur.[PHONE_REDACTED].[EMAIL_REDACTED]."
+    )
+    result = p.redact_with_spans(text)
+    assert result.text == p.redact(text)
+    assert [text[s.start:s.end] for s in result.spans] == [
+        "123456789",
+        "0612345678",
+        "info@example.nl",
+    ]
+
+
+def test_redact_with_spans_reports_original_offsets():
+    p = PIIPreprocessor()
+    text = "Mail test@example.com of bel 0612345678."
+    result = p.redact_with_spans(text)
+    assert result.text == p.redact(text)
+    assert [s.kind for s in result.spans] == ["EMAIL", "PHONE"]
+    assert text[result.spans[0].start:result.spans[0].end] == "test@example.com"
+    assert text[result.spans[1].start:result.spans[1].end] == "0612345678"
@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.infrastructure.database.models import AnalysisEventModel, Base
+from src.infrastructure.events.progress import (
+    ProgressEvent,
+    ProgressHub,
+    ProgressPublisher,
+    Subscription,
+)
+
+
+@pytest.fixture
+def session_factory(db_engine):
+    return async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_events_reach_local_streams_at_once_and_remote_streams_by_poll(session_factory):
+    api = ProgressHub(session_factory, poll_seconds=0.05, origin="api")
+    worker = ProgressHub(session_factory, poll_seconds=0.05, origin="worker")
+    remote = api.subscribe("s1")
+    local = worker.subscribe("s1")
+    other = api.subscribe("s2")
+
+    publisher = ProgressPublisher(worker, "s1", "a1")
+    publisher.emit("status", {"status": "analyzing"})
+    publisher.emit("document", {"filename": "a.pdf", "stage": "extracted"})
+    await publisher.aclose()
+
+    assert [(await local.get(0)).type for _ in range(2)] == ["status", "document"]
+    assert (await remote.get(1)).data == {"status": "analyzing"}
+    assert (await remote.get(1)).type == "document"
+    # Neither echoed back to the publishing process nor sent to other sessions
+    assert await local.get(0.2) is None
+    assert await other.get(0.2) is None
+    await api.close()
+    await worker.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_hub_does_not_query_the_database(session_factory, db_engine):
+    queries = []
+    event.listen(db_engine.sync_engine, "before_cursor_execute", lambda *args: queries.append(1))
+    hub = ProgressHub(session_factory, poll_seconds=0.02, origin="api")
+
+    subscription = hub.subscribe("s1")
+    await asyncio.sleep(0.1)
+    assert hub.polls > 0
+    hub.unsubscribe(subscription)
+    await asyncio.sleep(0.05)
+    idle = len(queries)
+    await asyncio.sleep(0.2)
+
+    assert len(queries) == idle
+    assert hub.stats()["streams"] == 0
+    await hub.close()
+
+
+@pytest.mark.asyncio
+async def test_an_event_committed_late_is_delivered_once(tmp_path):
+    # A file database: the in-memory one shares a connection between sessions,
+    # so a poll's rollback could discard the insert below
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'events.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    hub = ProgressHub(session_factory, poll_seconds=0.02, origin="api", overlap_seconds=1)
+    subscription = hub.subscribe("s1")
+    await asyncio.sleep(0.1)
+
+    # Stamped before polls that have run since, as by a slow transaction
+    async with session_factory() as db:
+        db.add(
+            AnalysisEventModel(
+                session_id="s1",
+                origin="worker",
+                type="status",
+                data={"status": "analyzing"},
+                created_at=datetime.utcnow() - timedelta(seconds=0.08),
+            )
+        )
+        await db.commit()
+
+    assert (await subscription.get(1)).data == {"status": "analyzing"}
+    assert await subscription.get(0.2) is None
+    await hub.close()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_a_slow_stream_keeps_the_latest_events():
+    subscription = Subscription("s1", maxsize=2)
+    for i in range(5):
+        subscription.put(ProgressEvent("s1", "partial", {"n": i}))
+
+    assert subscription.dropped == 3
+    assert [(await subscription.get(0)).data["n"] for _ in range(2)] == [3, 4]
@@ -0,0 +1,32 @@
+import time
+
+from src.infrastructure.ai.rate_limiter import AdaptiveConcurrencyLimiter, TokenBucket
+
+
+async def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(per_minute=600, capacity=2)  # 10 tokens a second
+
+    started = time.monotonic()
+    for _ in range(3):
+        await bucket.acquire()
+
+    assert time.monotonic() - started >= 0.09
+
+
+async def test_limiter_halves_on_overload_and_grows_on_success():
+    limiter = AdaptiveConcurrencyLimiter(initial=8, maximum=8)
+
+    await limiter.acquire()
+    await limiter.release(overloaded=True)
+    assert limiter.limit == 4
+
+    # Additive increase: about one slot per round of `limit` successes
+    for _ in range(5):
+        await limiter.acquire()
+        await limiter.release(overloaded=False)
+    assert int(limiter.limit) == 5
+
+    for _ in range(10):
+        await limiter.acquire()
+        await limiter.release(overloaded=True)
+    assert limiter.limit == 1
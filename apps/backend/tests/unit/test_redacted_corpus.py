@@ -0,0 +1,72 @@
+from src.infrastructure.cache.disk_cache import DiskCache
+from src.infrastructure.pdf.corpus import (
+    DocumentRedactor,
+    RedactedCorpus,
+    RedactedDocument,
+    RedactedText,
+)
+from src.infrastructure.pdf.preprocessor import PIIPreprocessor
+
+
+class CountingPreprocessor(PIIPreprocessor):
+    def __init__(self):
+        self.scanned = 0
+
+    def redact(self, text: str) -> str:
+        self.scanned += len(text)
+        return super().redact(text)
+
+
+PAGES = ["Verkoper: test@example.com", "", "Vraagprijs € 500.000 k.k."]
+
+
+def test_page_redaction_matches_whole_document():
+    p = PIIPreprocessor()
+    redacted = DocumentRedactor(p).redact_pages(PAGES)
+
+    assert redacted.text == p.redact("\n\n".join(t for t in PAGES if t))
+    assert redacted.page_starts == [0, len("Verkoper: [EMAIL_REDACTED]"), 28]
+
+
+def test_redaction_is_cached_by_content(tmp_path):
+    p = CountingPreprocessor()
+    redactor = DocumentRedactor(p, DiskCache(tmp_path, 1024 * 1024))
+
+    first = redactor.redact_pages(PAGES)
+    scanned = p.scanned
+    again = redactor.redact("\n\n".join(t for t in PAGES if t))
+
+    assert p.scanned == scanned
+    assert again == first
+
+
+def test_corpus_indexes_documents_and_pages():
+    corpus = RedactedCorpus()
+    corpus.add("brochure.pdf (property_listing)", RedactedDocument.from_pages(["Pagina een", "Pagina twee"]))
+    corpus.add("label.pdf (energy_label)", RedactedDocument("Energielabel: C"))
+
+    assert isinstance(corpus.text, RedactedText)
+    assert corpus.text.startswith("\n\n--- brochure.pdf (property_listing) ---\nPagina een")
+    assert corpus.document(1) == "Energielabel: C"
+    assert corpus.page(0, 1) == "Pagina een"
+    assert corpus.page(0, 2) == "Pagina twee"
+    assert corpus.locate(corpus.text.index("twee")) == (0, 2)
+    assert corpus.locate(corpus.text.index("Energielabel")) == (1, 1)
+
+
+def test_chunks_stay_within_budget_and_document():
+    long_page = "\n\n".join(f"Sectie {i}: " + "fundering " * 30 for i in range(10))
+    first = RedactedDocument.from_pages([long_page, "Korte pagina"])
+    corpus = RedactedCorpus()
+    corpus.add("rapport.pdf (inspection_report)", first)
+    chunks = corpus.chunks(100)
+
+    assert all(len(c) <= 400 for c in chunks)
+    assert all(c.startswith("--- rapport.pdf (inspection_report) ---\n") for c in chunks)
+    assert chunks[-1].endswith("Korte pagina")
+
+    grown = RedactedCorpus()
+    grown.add("rapport.pdf (inspection_report)", first)
+    grown.add("label.pdf (energy_label)", RedactedDocument("Energielabel: C"))
+
+    assert grown.chunks(100) == [*chunks, "--- label.pdf (energy_label) ---\nEnergielabel: C"]
@@ -0,0 +1,54 @@
+from src.infrastructure.pdf.corpus import RedactedCorpus, RedactedDocument
+from src.infrastructure.pdf.relevance import GAP_MARKER, RelevanceRanker
+
+COVER = "Bouwkundig rapport\nWoonhuis te Utrecht"
+CONTENTS = "Inhoudsopgave\n1. Inleiding ..... 3\n2. Bevindingen ..... 6"
+FILLER = "De woonkamer heeft een eikenhouten vloer. " * 20
+FOUNDATION = "Bij het funderingsonderzoek is paalrot vastgesteld; herstelkosten € 60.000."
+LEASE = "Het perceel is uitgegeven in erfpacht; de canon wordt herzien."
+
+
+def make_corpus() -> RedactedCorpus:
+    corpus = RedactedCorpus()
+    corpus.add(
+        "rapport.pdf (inspection_report)",
+        RedactedDocument.from_pages([COVER, CONTENTS, FILLER, FOUNDATION, FILLER]),
+    )
+    corpus.add("akte.pdf (purchase_agreement)", RedactedDocument.from_pages([FILLER, LEASE]))
+    return corpus
+
+
+def test_relevant_passages_are_kept_in_reading_order():
+    corpus = make_corpus()
+
+    selected = RelevanceRanker().select(corpus, "risks", 400)
+
+    assert len(selected) <= 400
+    assert selected == (
+        "--- rapport.pdf (inspection_report) ---\n"
+        f"{GAP_MARKER}\n\n{FOUNDATION}\n\n"
+        "--- akte.pdf (purchase_agreement) ---\n"
+        f"{GAP_MARKER}\n\n{LEASE}"
+    )
+
+
+def test_boilerplate_ranks_below_findings():
+    ranker = RelevanceRanker()
+
+    assert ranker.score(CONTENTS + "\nfundering", "risks") < ranker.score(FOUNDATION, "risks")
+    assert ranker.score(CONTENTS, "risks") < 0
+
+
+def test_a_corpus_that_fits_is_sent_whole():
+    corpus = make_corpus()
+
+    assert RelevanceRanker().select(corpus, "risks", len(corpus)) is corpus.text
+
+
+def test_without_relevant_passages_the_start_is_kept():
+    corpus = RedactedCorpus()
+    corpus.add("brief.pdf (other)", RedactedDocument.from_pages([COVER, FILLER, FILLER]))
+
+    selected = RelevanceRanker().select(corpus, "property", 100)
+
+    assert COVER in selected and FILLER not in selected
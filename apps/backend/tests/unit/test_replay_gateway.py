@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from src.domain.enums import DocumentType
+from src.infrastructure.ai.replay_gateway import (
+    Cassette,
+    InjectedAIError,
+    LatencyModel,
+    ReplayAIGateway,
+    request_key,
+)
+
+
+@pytest.fixture
+def cassette(tmp_path):
+    cassette = Cassette(tmp_path / "cassette.jsonl")
+    cassette.record("classify_document", request_key("classify_document", ["Energielabel C"]), "energy_label")
+    cassette.record("classify_document", request_key("classify_document", ["Koopovereenkomst"]), "purchase_agreement")
+    cassette.record(
+        "extract_property_data",
+        request_key("extract_property_data", ["Vraagprijs", "property_listing", None]),
+        {"asking_price": 450000, "living_area_m2": 96, "confidence_notes": "listing"},
+    )
+    return cassette
+
+
+async def test_recorded_calls_replay_exactly(cassette):
+    gateway = ReplayAIGateway(Cassette(cassette.path), exact=True)
+
+    assert await gateway.classify_document("Energielabel C") == DocumentType.ENERGY_LABEL
+    assert await gateway.classify_document("Koopovereenkomst") == DocumentType.PURCHASE_AGREEMENT
+    with pytest.raises(KeyError):
+        await gateway.classify_document("Bouwkundig rapport")
+    assert gateway.calls == 3
+
+
+async def test_unrecorded_calls_fall_back_deterministically(cassette):
+    first = [await ReplayAIGateway(cassette).classify_document(f"doc {i}") for i in range(10)]
+    second = [await ReplayAIGateway(cassette).classify_document(f"doc {i}") for i in range(10)]
+
+    assert first == second
+    assert set(first) == {DocumentType.ENERGY_LABEL, DocumentType.PURCHASE_AGREEMENT}
+
+
+async def test_extraction_is_limited_to_requested_fields(cassette):
+    gateway = ReplayAIGateway(cassette)
+
+    data = await gateway.extract_property_data("Vraagprijs", DocumentType.PROPERTY_LISTING, ["asking_price"])
+
+    assert data == {"asking_price": 450000, "confidence_notes": "listing"}
+
+
+async def test_injected_errors_are_reproducible_for_a_seed(cassette):
+    async def outcomes(seed):
+        gateway = ReplayAIGateway(cassette, error_rate=0.3, seed=seed)
+        results = []
+        for _ in range(40):
+            try:
+                await gateway.classify_document("Energielabel C")
+                results.append(True)
+            except InjectedAIError:
+                results.append(False)
+        return results
+
+    runs = await outcomes(1)
+    assert runs == await outcomes(1)
+    assert 0 < runs.count(False) < 40
+
+
+def test_latency_specs():
+    rng = random.Random(0)
+    assert LatencyModel("fixed:250", rng).sample() == 0.25
+    assert all(0.1 <= LatencyModel("uniform:100,200", rng).sample() <= 0.2 for _ in range(50))
+    assert LatencyModel("lognormal:1000,0.5", rng).sample() > 0
+    with pytest.raises(ValueError):
+        LatencyModel("normal:1000", rng)
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from src.application.services.stage_graph import StageGraph
+
+
+def recording_stage(events: list[str], name: str, value=None, fail: bool = False):
+    async def run(graph: StageGraph):
+        events.append(f"{name}:start")
+        await asyncio.sleep(0.01)
+        if fail:
+            raise RuntimeError(f"{name} failed")
+        events.append(f"{name}:end")
+        return value
+
+    return run
+
+
+async def test_independent_stages_overlap_and_dependents_wait():
+    events: list[str] = []
+    graph = StageGraph()
+    graph.add("a", recording_stage(events, "a", 1))
+    graph.add("b", recording_stage(events, "b", 2))
+    graph.add("c", lambda g: asyncio.sleep(0, result=g["a"] + g["b"]), after=["a", "b"])
+
+    results = await graph.run()
+
+    assert results == {"a": 1, "b": 2, "c": 3}
+    assert events.index("b:start") < events.index("a:end")
+
+
+async def test_stage_can_wait_for_an_undeclared_result():
+    graph = StageGraph()
+    graph.add("address", lambda g: asyncio.sleep(0.01, result="Keizersgracht 1"))
+
+    async def market(g: StageGraph):
+        return f"market data for {await g.result('address')}"
+
+    graph.add("market", market)
+
+    assert (await graph.run())["market"] == "market data for Keizersgracht 1"
+
+
+async def test_failure_cancels_running_stages():
+    events: list[str] = []
+    graph = StageGraph()
+    graph.add("slow", lambda g: asyncio.sleep(1))
+    graph.add("broken", recording_stage(events, "broken", fail=True))
+    graph.add("after_broken", recording_stage(events, "after_broken"), after=["broken"])
+
+    with pytest.raises(RuntimeError, match="broken failed"):
+        await asyncio.wait_for(graph.run(), timeout=0.5)
+
+    assert "after_broken:start" not in events
+
+
+def test_dependencies_must_be_added_first():
+    graph = StageGraph()
+    with pytest.raises(ValueError):
+        graph.add("strengths", lambda g: asyncio.sleep(0), after=["property"])
@@ -43,17 +43,31 @@ export const api = {
     request<void>(`/api/v1/sessions/${sessionId}/documents/${docId}`, { method: 'DELETE' }),
 
   startAnalysis: (sessionId: string) =>
-    request<{ session_id: string; analysis_id: string; status: string }>(
+    request<{
+      session_id: string;
+      analysis_id: string;
+      status: string;
+      mode: 'full' | 'incremental';
+      queue_position: number;
+    }>(
       `/api/v1/sessions/${sessionId}/analyze`,
       { method: 'POST' },
     ),
 
+  cancelAnalysis: (sessionId: string) =>
+    request<{ session_id: string; analysis_id: string; status: string }>(
+      `/api/v1/sessions/${sessionId}/analysis/cancel`,
+      { method: 'POST' },
+    ),
+
   getAnalysisStatus: (sessionId: string) =>
     request<AnalysisStatusResponse>(`/api/v1/sessions/${sessionId}/analysis/status`),
 
   getAnalysis: (sessionId: string) =>
     request<AnalysisResponse>(`/api/v1/sessions/${sessionId}/analysis`),
 
+  analysisEventsUrl: (sessionId: string) => `${BASE}/api/v1/sessions/${sessionId}/analysis/events`,
+
   getMarketData: (sessionId: string) =>
     request<MarketDataResponse>(`/api/v1/sessions/${sessionId}/market`),
 
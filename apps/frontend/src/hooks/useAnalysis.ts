@@ -1,5 +1,7 @@
-import { useMutation, useQuery } from '@tanstack/react-query';
+import { useEffect, useState } from 'react';
+import { useMutation, useQuery, useQueryClient } from '@tanstack/react-query';
 import { api } from '../api/client';
+import type { AnalysisResponse, AnalysisStatusResponse } from '../types';
 
 export function useCreateSession() {
   return useMutation({ mutationFn: () => api.createSession() });
@@ -13,27 +15,90 @@ export function useStartAnalysis() {
   return useMutation({ mutationFn: (sessionId: string) => api.startAnalysis(sessionId) });
 }
 
-export function useAnalysisStatus(sessionId: string | undefined, enabled: boolean) {
+const TERMINAL_STATUSES = ['complete', 'failed', 'cancelled'];
+
+export function useCancelAnalysis() {
+  const queryClient = useQueryClient();
+  return useMutation({
+    mutationFn: (sessionId: string) => api.cancelAnalysis(sessionId),
+    onSuccess: (_, sessionId) => {
+      queryClient.invalidateQueries({ queryKey: ['analysisStatus', sessionId] });
+      queryClient.invalidateQueries({ queryKey: ['analysis', sessionId] });
+    },
+  });
+}
+
+// `streaming`: progress arrives over useAnalysisEvents, so polling pauses
+export function useAnalysisStatus(sessionId: string | undefined, enabled: boolean, streaming = false) {
   return useQuery({
     queryKey: ['analysisStatus', sessionId],
     queryFn: () => api.getAnalysisStatus(sessionId!),
     enabled: !!sessionId && enabled,
     refetchInterval: (query) => {
       const status = query.state.data?.status;
-      if (status === 'complete' || status === 'failed') return false;
+      if (streaming || (status && TERMINAL_STATUSES.includes(status))) return false;
       return 2000;
     },
   });
 }
 
-export function useAnalysis(sessionId: string | undefined) {
+export function useAnalysis(sessionId: string | undefined, streaming = false) {
   return useQuery({
     queryKey: ['analysis', sessionId],
     queryFn: () => api.getAnalysis(sessionId!),
     enabled: !!sessionId,
+    // Partial results grow while the analysis runs
+    refetchInterval: (query) => {
+      const data = query.state.data;
+      if (streaming || !data?.partial || data.status === 'failed') return false;
+      return 2000;
+    },
   });
 }
 
+// Live progress over Server-Sent Events. Returns whether the stream is open;
+// while it is not (unsupported, proxy trouble, reconnecting), callers poll.
+export function useAnalysisEvents(sessionId: string | undefined) {
+  const queryClient = useQueryClient();
+  const [connected, setConnected] = useState(false);
+
+  useEffect(() => {
+    if (!sessionId || typeof EventSource === 'undefined') return;
+    const source = new EventSource(api.analysisEventsUrl(sessionId));
+    source.onopen = () => setConnected(true);
+    source.onerror = () => setConnected(false);
+
+    source.addEventListener('status', (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      queryClient.setQueryData<AnalysisStatusResponse>(['analysisStatus', sessionId], (old) => ({
+        ...old,
+        session_id: sessionId,
+        status: data.status,
+        progress_message: data.progress_message,
+      }));
+      if (TERMINAL_STATUSES.includes(data.status)) {
+        // The stream is done; fetch the saved result
+        source.close();
+        setConnected(false);
+        queryClient.invalidateQueries({ queryKey: ['analysis', sessionId] });
+      }
+    });
+    source.addEventListener('partial', (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      queryClient.setQueryData<AnalysisResponse>(['analysis', sessionId], (old) =>
+        old ? { ...old, ...data, partial: true } : old,
+      );
+    });
+
+    return () => {
+      source.close();
+      setConnected(false);
+    };
+  }, [sessionId, queryClient]);
+
+  return connected;
+}
+
 export function useMarketData(sessionId: string | undefined) {
   return useQuery({
     queryKey: ['market', sessionId],
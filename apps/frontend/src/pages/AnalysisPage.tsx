@@ -1,5 +1,12 @@
 import { useParams, useNavigate } from 'react-router-dom';
-import { useAnalysisStatus, useAnalysis, useDeleteSession, useExportData } from '../hooks/useAnalysis';
+import {
+  useAnalysisStatus,
+  useAnalysis,
+  useAnalysisEvents,
+  useCancelAnalysis,
+  useDeleteSession,
+  useExportData,
+} from '../hooks/useAnalysis';
 import RiskDashboard from '../components/analysis/RiskDashboard';
 import StrengthsWeaknesses from '../components/analysis/StrengthsWeaknesses';
 import MarketPosition from '../components/market/MarketPosition';
@@ -43,11 +50,18 @@ export default function AnalysisPage() {
   const { sessionId } = useParams<{ sessionId: string }>();
   const navigate = useNavigate();
 
-  const statusQuery = useAnalysisStatus(sessionId, true);
+  const streaming = useAnalysisEvents(sessionId);
+  const statusQuery = useAnalysisStatus(sessionId, true, streaming);
   const isComplete = statusQuery.data?.status === 'complete';
   const isFailed = statusQuery.data?.status === 'failed';
+  const isCancelled = statusQuery.data?.status === 'cancelled';
 
-  const analysisQuery = useAnalysis(isComplete ? sessionId : undefined);
+  // Fetched while running too, to show findings as they are stored
+  const analysisQuery = useAnalysis(
+    statusQuery.data && !isFailed && !isCancelled ? sessionId : undefined,
+    streaming,
+  );
+  const cancelAnalysis = useCancelAnalysis();
   const deleteSession = useDeleteSession();
   const exportData = useExportData();
 
@@ -69,18 +83,55 @@ export default function AnalysisPage() {
     URL.revokeObjectURL(url);
   };
 
-  // Loading state
-  if (!isComplete && !isFailed) {
+  // Loading state, with whatever findings are already in
+  if (!isComplete && !isFailed && !isCancelled) {
+    const partial = analysisQuery.data;
+    const hasFindings =
+      partial && (partial.strengths.length > 0 || partial.weaknesses.length > 0 || partial.risk_score);
+    return (
+      <div className="max-w-5xl mx-auto px-4 py-8 space-y-8">
+        <div className="max-w-3xl mx-auto py-12 text-center">
+          <svg className="animate-spin h-12 w-12 mx-auto mb-6 text-primary-500" viewBox="0 0 24 24">
+            <circle className="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" strokeWidth="4" fill="none" />
+            <path className="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4z" />
+          </svg>
+          <h2 className="text-2xl font-bold text-primary-500 mb-2">Analyzing Your Documents</h2>
+          <p className="text-gray-500 text-lg">
+            {statusQuery.data?.progress_message || 'Starting analysis...'}
+          </p>
+          {hasFindings && (
+            <p className="text-gray-400 text-sm mt-2">Preliminary findings below; more may follow.</p>
+          )}
+          <button
+            onClick={() => sessionId && cancelAnalysis.mutate(sessionId)}
+            disabled={cancelAnalysis.isPending}
+            className="btn-outline text-sm px-4 py-2 mt-6"
+          >
+            {cancelAnalysis.isPending ? 'Cancelling...' : 'Cancel Analysis'}
+          </button>
+        </div>
+
+        {partial?.property_data && <PropertySummary data={partial.property_data} />}
+
+        {partial?.risk_score && <RiskDashboard riskScore={partial.risk_score} />}
+
+        {partial && (partial.strengths.length > 0 || partial.weaknesses.length > 0) && (
+          <StrengthsWeaknesses strengths={partial.strengths} weaknesses={partial.weaknesses} />
+        )}
+      </div>
+    );
+  }
+
+  if (isCancelled) {
     return (
       <div className="max-w-3xl mx-auto px-4 py-20 text-center">
-        <svg className="animate-spin h-12 w-12 mx-auto mb-6 text-primary-500" viewBox="0 0 24 24">
-          <circle className="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" strokeWidth="4" fill="none" />
-          <path className="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4z" />
-        </svg>
-        <h2 className="text-2xl font-bold text-primary-500 mb-2">Analyzing Your Documents</h2>
-        <p className="text-gray-500 text-lg">
-          {statusQuery.data?.progress_message || 'Starting analysis...'}
-        </p>
+        <div className="bg-gray-50 border border-gray-200 rounded-xl p-8">
+          <h2 className="text-2xl font-bold text-gray-700 mb-2">Analysis Cancelled</h2>
+          <p className="text-gray-600">{statusQuery.data?.progress_message}</p>
+          <button onClick={() => navigate('/upload')} className="btn-primary mt-6">
+            Start Over
+          </button>
+        </div>
       </div>
     );
   }
@@ -58,6 +58,7 @@ export interface AnalysisResponse {
   id: string;
   session_id: string;
   status: string;
+  partial: boolean;
   property_data: PropertyData | null;
   strengths: string[];
   weaknesses: string[];